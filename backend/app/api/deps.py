@@ -1,5 +1,7 @@
 """FastAPI dependencies for authentication."""
 
+import uuid
+
 from fastapi import Depends, HTTPException, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -46,3 +48,23 @@ async def get_optional_user(
         return None
 
     return await get_user_by_id(session, payload["sub"])
+
+
+def get_optional_user_id(request: Request) -> uuid.UUID | None:
+    """User id from a valid access token, or None; no database lookup.
+
+    Cheap enough to call on every humanize/detect request to attribute the
+    request record to its user.
+    """
+    token = request.cookies.get("access_token")
+    if not token:
+        return None
+
+    payload = verify_access_token(token)
+    if payload is None:
+        return None
+
+    try:
+        return uuid.UUID(payload["sub"])
+    except (KeyError, ValueError):
+        return None
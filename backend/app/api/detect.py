@@ -1,76 +1,108 @@
-import asyncio
 import time
 
-import httpx
 import structlog
 from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 
-from app.models.schemas import DetectRequest, DetectResponse, DetectorResult
+from app.api.deps import get_optional_user_id
+from app.config import settings
+from app.models.database import RequestStatus, RequestType
+from app.models.schemas import (
+    DetectBatchItem,
+    DetectBatchRequest,
+    DetectorResult,
+    DetectRequest,
+    DetectResponse,
+)
+from app.services.detectors.fanout import (
+    DetectorSelectionError,
+    detect_matrix,
+    run_detectors,
+    select_detectors,
+)
+from app.services.http_client import borrow_detector_client
+from app.services.request_log import compact_detector_results
 
 router = APIRouter()
 logger = structlog.get_logger()
 
 
-@router.post("/detect", response_model=DetectResponse)
-async def detect_text(request: Request, body: DetectRequest):
+def _select(request: Request, names: list[str] | None):
     registry = getattr(request.app.state, "detector_registry", None)
     if registry is None:
         raise HTTPException(status_code=503, detail="Detector registry not initialized")
 
+    try:
+        return select_detectors(registry, names)
+    except DetectorSelectionError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+def _log_detection(
+    request: Request,
+    text: str,
+    results: list[DetectorResult],
+    processing_time_ms: int | None,
+) -> None:
+    """Queue the request record on the write-behind log (never blocks)."""
+    writer = getattr(request.app.state, "request_log", None)
+    if writer is None:
+        return
+    failed = bool(results) and all(r.error is not None for r in results)
+    writer.submit(
+        user_id=get_optional_user_id(request),
+        request_type=RequestType.detect,
+        input_text=text,
+        status=RequestStatus.failed if failed else RequestStatus.completed,
+        processing_time_ms=processing_time_ms,
+        detector_results=compact_detector_results(results),
+    )
+
+
+@router.post("/detect", response_model=DetectResponse)
+async def detect_text(request: Request, body: DetectRequest):
     # Determine which detectors to run
-    if body.detectors:
-        detectors = []
-        for name in body.detectors:
-            detector = registry.get(name)
-            if detector is None:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Unknown detector: {name}",
-                )
-            if not detector.is_available():
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Detector not available: {name}",
-                )
-            detectors.append(detector)
-    else:
-        detectors = registry.get_available()
-
-    if not detectors:
-        raise HTTPException(
-            status_code=400,
-            detail="No detectors available. Configure at least one detector API key.",
-        )
+    detectors = _select(request, body.detectors)
 
     start = time.perf_counter()
 
-    async with httpx.AsyncClient() as client:
-        tasks = [detector.detect(client, body.text) for detector in detectors]
-        raw_results = await asyncio.gather(*tasks, return_exceptions=True)
-
-    # Partial success: convert exceptions to per-detector error results
-    results: list[DetectorResult] = []
-    for detector, result in zip(detectors, raw_results):
-        if isinstance(result, Exception):
-            logger.error(
-                "Detector raised unexpected exception",
-                detector=detector.name,
-                error=str(result),
-            )
-            results.append(
-                DetectorResult(
-                    detector=detector.name,
-                    score=None,
-                    label=None,
-                    details=None,
-                    error=f"Unexpected error: {str(result)}",
-                )
-            )
-        else:
-            results.append(result)
+    # Partial success: exceptions become per-detector error results
+    shared_client = getattr(request.app.state, "detector_http_client", None)
+    async with borrow_detector_client(shared_client) as client:
+        results = await run_detectors(detectors, client, body.text)
 
     elapsed_ms = int((time.perf_counter() - start) * 1000)
 
-    # TODO: Save detection request/results to database (Plan 02 DB integration)
+    _log_detection(request, body.text, results, elapsed_ms)
 
     return DetectResponse(results=results, processing_time_ms=elapsed_ms)
+
+
+@router.post("/detect/batch")
+async def detect_batch(request: Request, body: DetectBatchRequest):
+    """Score many texts against the selected detectors as an NDJSON stream.
+
+    One line per (text, detector) pair in completion order, each carrying
+    the text ``index`` and a DetectorResult; detector failures come back as
+    results with ``error`` set, like POST /detect.
+    """
+    detectors = _select(request, body.detectors)
+    shared_client = getattr(request.app.state, "detector_http_client", None)
+
+    async def ndjson():
+        # Each text is logged once all of its detectors have reported
+        pending: dict[int, list[DetectorResult]] = {}
+        async with borrow_detector_client(shared_client) as client:
+            async for index, result in detect_matrix(
+                detectors,
+                client,
+                body.texts,
+                per_detector_concurrency=settings.DETECTOR_BATCH_CONCURRENCY,
+            ):
+                results = pending.setdefault(index, [])
+                results.append(result)
+                if len(results) == len(detectors):
+                    _log_detection(request, body.texts[index], pending.pop(index), None)
+                yield DetectBatchItem(index=index, result=result).model_dump_json() + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
@@ -1,7 +1,19 @@
 import structlog
 from fastapi import APIRouter, Request
 
-from app.models.schemas import DetectorInfo, DetectorListResponse, HealthResponse
+from app.config import settings
+from app.models.schemas import (
+    DetectorInfo,
+    DetectorListResponse,
+    DetectorQuotaResponse,
+    DetectorUsage,
+    HealthResponse,
+    MetricsResponse,
+)
+from app.services.circuit_breaker import breaker_states
+from app.services.detectors.limits import current_period
+from app.services.http_client import pool_stats
+from app.services.humanizer_pool import HumanizerPool
 
 logger = structlog.get_logger()
 
@@ -30,6 +42,31 @@ async def health_check(request: Request):
         model_loaded=model_loaded,
         database_connected=getattr(request.app.state, "database_connected", False),
         detectors_available=detectors_available,
+        circuits=breaker_states(),
+    )
+
+
+@router.get("/metrics", response_model=MetricsResponse)
+async def metrics(request: Request):
+    detector_cache = getattr(request.app.state, "detector_cache", None)
+    humanize_cache = getattr(request.app.state, "humanize_cache", None)
+    registry = getattr(request.app.state, "detector_registry", None)
+    humanizer = getattr(request.app.state, "humanizer", None)
+    admission = getattr(request.app.state, "admission", None)
+    request_log = getattr(request.app.state, "request_log", None)
+    batcher = getattr(humanizer, "batcher", None)
+    replicas = humanizer.stats() if isinstance(humanizer, HumanizerPool) else None
+    return MetricsResponse(
+        detector_http_pool=pool_stats(
+            getattr(request.app.state, "detector_http_client", None)
+        ),
+        detector_cache=detector_cache.stats() if detector_cache else None,
+        humanize_cache=humanize_cache.stats() if humanize_cache else None,
+        humanizer_batching=batcher.stats() if batcher else None,
+        humanizer_replicas=replicas,
+        humanize_admission=admission.stats() if admission else None,
+        detector_hedging=registry.hedging_stats() if registry else None,
+        request_log=request_log.stats() if request_log else None,
     )
 
 
@@ -49,3 +86,29 @@ async def list_detectors(request: Request):
         for d in registry.get_all()
     ]
     return DetectorListResponse(detectors=detectors)
+
+
+@router.get("/detectors/quota", response_model=DetectorQuotaResponse)
+async def detector_quota(request: Request, period: str | None = None):
+    """Provider calls and characters sent per detector for a month (YYYY-MM)."""
+    quota = getattr(request.app.state, "detector_quota", None)
+    period = period or current_period()
+    usage = await quota.usage(period) if quota else {}
+
+    names = set(usage) | set(settings.DETECTOR_MONTHLY_QUOTAS)
+    registry = getattr(request.app.state, "detector_registry", None)
+    if registry is not None:
+        names |= {d.name for d in registry.get_all()}
+
+    detectors = {}
+    for name in sorted(names):
+        counters = usage.get(name, {})
+        limit = settings.DETECTOR_MONTHLY_QUOTAS.get(name)
+        calls = counters.get("calls", 0)
+        detectors[name] = DetectorUsage(
+            calls=calls,
+            characters=counters.get("characters", 0),
+            monthly_quota=limit,
+            remaining=max(0, limit - calls) if limit is not None else None,
+        )
+    return DetectorQuotaResponse(period=period, detectors=detectors)
@@ -0,0 +1,67 @@
+import base64
+import uuid
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_current_user
+from app.db.crud import list_requests
+from app.db.session import get_session
+from app.models.database import RequestRecord, RequestType
+from app.models.schemas import RequestHistoryItem, RequestHistoryResponse
+from app.models.user import User
+
+router = APIRouter()
+
+
+def encode_cursor(record: RequestRecord) -> str:
+    raw = f"{record.created_at.isoformat()}|{record.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, _, record_id = raw.partition("|")
+        return datetime.fromisoformat(created_at), uuid.UUID(record_id)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from exc
+
+
+@router.get("/history", response_model=RequestHistoryResponse)
+async def get_history(
+    type: RequestType | None = None,
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: str | None = None,
+    user: User = Depends(get_current_user),
+    session: AsyncSession = Depends(get_session),
+):
+    """The current user's requests, newest first.
+
+    Pass ``next_cursor`` from a response as ``cursor`` to get the next page.
+    """
+    records = await list_requests(
+        session,
+        request_type=type,
+        user_id=user.id,
+        limit=limit,
+        before=decode_cursor(cursor) if cursor else None,
+    )
+    items = [
+        RequestHistoryItem(
+            id=r.id,
+            type=r.request_type,
+            status=r.status,
+            created_at=r.created_at,
+            input_text=r.input_text,
+            output_text=r.output_text,
+            processing_time_ms=r.processing_time_ms,
+            ai_score=r.ai_score,
+            attempts_count=r.attempts_count,
+            threshold_met=r.threshold_met,
+        )
+        for r in records
+    ]
+    next_cursor = encode_cursor(records[-1]) if len(records) == limit else None
+    return RequestHistoryResponse(items=items, next_cursor=next_cursor)
@@ -1,101 +1,327 @@
+import asyncio
+import hashlib
+import json
 import time
 
-import httpx
 import structlog
 from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 
+from app.api.deps import get_optional_user_id
 from app.config import settings
-from app.models.schemas import HumanizeRequest, HumanizeResponse
+from app.models.database import RequestStatus, RequestType
+from app.models.schemas import (
+    HumanizeAttempt,
+    HumanizeBatchItem,
+    HumanizeBatchRequest,
+    HumanizeBatchResponse,
+    HumanizeRequest,
+    HumanizeResponse,
+)
+from app.services.admission import (
+    AdmissionRejected,
+    Priority,
+    admission_request,
+    priority,
+)
+from app.services.circuit_breaker import CircuitOpenError
+from app.services.http_client import borrow_detector_client
 from app.services.humanize_loop import (
+    HumanizeLoopResult,
+    current_attempt_number,
     humanize_single,
     humanize_with_detector_gate,
 )
+from app.services.humanize_runner import resolve_options, run_humanization, to_response
+from app.services.request_log import compact_attempts
+from app.services.single_flight import SingleFlight
+from app.services.targeted_retry import rewriting_segment
 
 logger = structlog.get_logger()
 
 router = APIRouter()
 
+# Coalesces concurrent identical humanize requests into one run
+_humanize_flights = SingleFlight()
 
-@router.post("/humanize", response_model=HumanizeResponse)
-async def humanize_text(request: Request, body: HumanizeRequest):
-    humanizer = request.app.state.humanizer
 
+def _flight_key(text: str, *parts) -> str:
+    digest = hashlib.sha256(text.encode()).hexdigest()
+    return ":".join([digest, *(str(p) for p in parts)])
+
+
+def _overloaded(exc: AdmissionRejected) -> HTTPException:
+    return HTTPException(
+        status_code=429 if exc.queue_full else 503,
+        detail=exc.reason,
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+def _get_humanizer(request: Request):
+    humanizer = request.app.state.humanizer
     if humanizer is None or not humanizer.is_loaded:
         raise HTTPException(status_code=503, detail="Humanizer model is not available")
+    return humanizer
+
 
-    options = body.options
-    temperature = options.temperature if options else settings.TEMPERATURE
-    max_tokens = options.max_tokens if options else settings.MAX_OUTPUT_TOKENS
-    enable_gate = options.enable_detector_gate if options else True
-    max_attempts = (
-        options.max_attempts
-        if options and options.max_attempts is not None
-        else settings.HUMANIZE_MAX_ATTEMPTS
+def _log_humanization(
+    request: Request,
+    body: HumanizeRequest,
+    loop_result: HumanizeLoopResult,
+    processing_time_ms: int,
+) -> None:
+    """Queue the request record on the write-behind log (never blocks)."""
+    writer = getattr(request.app.state, "request_log", None)
+    if writer is None:
+        return
+    writer.submit(
+        user_id=get_optional_user_id(request),
+        request_type=RequestType.humanize,
+        input_text=body.text,
+        output_text=loop_result.humanized_text,
+        status=RequestStatus.completed,
+        processing_time_ms=processing_time_ms,
+        ai_score=loop_result.ai_score,
+        attempts_count=len(loop_result.attempts),
+        threshold_met=loop_result.threshold_met,
+        detector_results=compact_attempts(loop_result.attempts),
     )
 
-    registry = getattr(request.app.state, "detector_registry", None)
 
-    start = time.perf_counter()
-    try:
-        if not enable_gate or registry is None:
-            loop_result = await humanize_single(
+async def _humanize(request: Request, humanizer, body: HumanizeRequest) -> HumanizeLoopResult:
+    temperature, max_tokens, enable_gate, max_attempts = resolve_options(body)
+    shared_client = getattr(request.app.state, "detector_http_client", None)
+    with admission_request():
+        async with borrow_detector_client(shared_client) as http_client:
+            return await run_humanization(
                 humanizer=humanizer,
+                registry=getattr(request.app.state, "detector_registry", None),
+                http_client=http_client,
+                humanize_cache=getattr(request.app.state, "humanize_cache", None),
                 text=body.text,
                 temperature=temperature,
                 max_tokens=max_tokens,
-                threshold=settings.HUMANIZE_AI_SCORE_THRESHOLD,
+                enable_gate=enable_gate,
+                max_attempts=max_attempts,
             )
-        else:
-            async with httpx.AsyncClient() as http_client:
-                loop_result = await humanize_with_detector_gate(
-                    humanizer=humanizer,
-                    registry=registry,
-                    http_client=http_client,
-                    text=body.text,
-                    base_temperature=temperature,
-                    max_tokens=max_tokens,
-                    max_attempts=max_attempts,
-                    threshold=settings.HUMANIZE_AI_SCORE_THRESHOLD,
-                    detector_name=settings.HUMANIZE_DETECTOR_NAME,
-                    temp_bump_per_retry=settings.HUMANIZE_TEMP_BUMP_PER_RETRY,
-                    detector_timeout_seconds=settings.HUMANIZE_DETECTOR_TIMEOUT_SECONDS,
-                )
+
+
+async def _humanize_and_log(
+    request: Request, humanizer, body: HumanizeRequest
+) -> HumanizeResponse:
+    temperature, max_tokens, enable_gate, max_attempts = resolve_options(body)
+    if not enable_gate:
+        max_attempts = 1
+
+    start = time.perf_counter()
+    loop_result = await _humanize_flights.do(
+        _flight_key(body.text, enable_gate, temperature, max_tokens, max_attempts),
+        lambda: _humanize(request, humanizer, body),
+    )
+    processing_time_ms = int((time.perf_counter() - start) * 1000)
+
+    _log_humanization(request, body, loop_result, processing_time_ms)
+
+    return to_response(body, loop_result, processing_time_ms)
+
+
+@router.post("/humanize", response_model=HumanizeResponse)
+async def humanize_text(request: Request, body: HumanizeRequest):
+    humanizer = _get_humanizer(request)
+    try:
+        return await _humanize_and_log(request, humanizer, body)
+    except AdmissionRejected as exc:
+        raise _overloaded(exc) from exc
+    except CircuitOpenError as exc:
+        raise HTTPException(
+            status_code=503,
+            detail="Model inference temporarily unavailable",
+            headers={"Retry-After": str(exc.retry_after)},
+        ) from exc
     except Exception as exc:
         logger.error("Model inference failed", error=str(exc))
         raise HTTPException(
             status_code=503, detail="Model inference failed"
         ) from exc
 
-    processing_time_ms = int((time.perf_counter() - start) * 1000)
 
-    try:
-        from app.db.crud import create_request
-        from app.db.session import async_session_factory
-        from app.models.database import RequestStatus, RequestType
-
-        async with async_session_factory() as session:
-            await create_request(
-                session,
-                request_type=RequestType.humanize,
-                input_text=body.text,
-                output_text=loop_result.humanized_text,
-                status=RequestStatus.completed,
-                processing_time_ms=processing_time_ms,
-                ai_score=loop_result.ai_score,
-                attempts_count=len(loop_result.attempts),
-                threshold_met=loop_result.threshold_met,
+@router.post("/humanize/batch", response_model=HumanizeBatchResponse)
+async def humanize_batch(
+    request: Request, body: HumanizeBatchRequest, stream: bool = False
+):
+    """Humanize many texts with at most HUMANIZE_BATCH_CONCURRENCY in flight.
+
+    Items run at batch admission priority, behind interactive traffic. A
+    failing item yields an item-level ``error`` instead of failing the
+    batch. With ``?stream=true`` items are written as NDJSON lines in
+    completion order (use ``index`` to match them to the request);
+    otherwise one response lists them in request order.
+    """
+    humanizer = _get_humanizer(request)
+    semaphore = asyncio.Semaphore(settings.HUMANIZE_BATCH_CONCURRENCY)
+
+    async def run_item(index: int, item: HumanizeRequest) -> HumanizeBatchItem:
+        async with semaphore:
+            try:
+                with priority(Priority.batch):
+                    result = await _humanize_and_log(request, humanizer, item)
+            except AdmissionRejected as exc:
+                return HumanizeBatchItem(
+                    index=index,
+                    error=f"{exc.reason}; retry after {exc.retry_after}s",
+                )
+            except Exception as exc:
+                logger.warning("Batch item failed", index=index, error=str(exc))
+                return HumanizeBatchItem(index=index, error="Model inference failed")
+        return HumanizeBatchItem(index=index, result=result)
+
+    start = time.perf_counter()
+    tasks = [
+        asyncio.create_task(run_item(i, item)) for i, item in enumerate(body.items)
+    ]
+
+    if not stream:
+        items = await asyncio.gather(*tasks)
+        return HumanizeBatchResponse(
+            items=items,
+            processing_time_ms=int((time.perf_counter() - start) * 1000),
+        )
+
+    async def ndjson():
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield (await finished).model_dump_json() + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
+class _StreamingHumanizer:
+    """Humanizer adapter that forwards token deltas onto an event queue.
+
+    Deltas are tagged with the attempt number the loop is generating, so the
+    client can tell retries apart. A targeted retry rewrites its flagged
+    sentences concurrently; those fragments are not streamed, and
+    ``on_attempt`` emits the spliced attempt text as one delta instead.
+    """
+
+    def __init__(self, inner, queue: asyncio.Queue) -> None:
+        self.inner = inner
+        self.queue = queue
+        self.streamed: set[int] = set()
+
+    async def humanize(self, text: str, temperature: float, max_tokens: int) -> str:
+        if rewriting_segment():
+            return await self.inner.humanize(
+                text=text, temperature=temperature, max_tokens=max_tokens
             )
-    except Exception as db_exc:
-        logger.warning("Failed to log humanization to DB", error=str(db_exc))
+        attempt = current_attempt_number()
+        self.streamed.add(attempt)
+        parts: list[str] = []
+        async for delta in self.inner.humanize_stream(
+            text=text, temperature=temperature, max_tokens=max_tokens
+        ):
+            parts.append(delta)
+            await self.queue.put(("delta", {"attempt": attempt, "text": delta}))
+        return "".join(parts).strip()
 
-    return HumanizeResponse(
-        humanized_text=loop_result.humanized_text,
-        input_length=len(body.text),
-        output_length=len(loop_result.humanized_text),
-        processing_time_ms=processing_time_ms,
-        ai_score=loop_result.ai_score,
-        threshold_met=loop_result.threshold_met,
-        attempts=loop_result.attempts,
-        threshold=loop_result.threshold,
-        warning=loop_result.warning,
+    async def on_attempt(self, attempt: HumanizeAttempt) -> None:
+        """Emit the text of an attempt that was spliced rather than streamed."""
+        if attempt.attempt not in self.streamed:
+            await self.queue.put(
+                ("delta", {"attempt": attempt.attempt, "text": attempt.humanized_text})
+            )
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/humanize/stream")
+async def humanize_text_stream(request: Request, body: HumanizeRequest):
+    """Stream a humanization over Server-Sent Events.
+
+    Events: ``delta`` (token text per attempt), ``attempt`` (score and
+    pass/fail once an attempt is scored), then one ``result`` carrying the
+    same payload as POST /humanize, or ``error``. Attempts run one at a
+    time so deltas arrive in order; ``targeted`` mode is honoured, other
+    loop modes fall back to sequential. A targeted retry's text arrives as
+    a single delta holding the whole spliced attempt.
+    """
+    humanizer = _get_humanizer(request)
+    temperature, max_tokens, enable_gate, max_attempts = resolve_options(body)
+    registry = getattr(request.app.state, "detector_registry", None)
+    threshold = settings.HUMANIZE_AI_SCORE_THRESHOLD
+    mode = "targeted" if settings.HUMANIZE_LOOP_MODE == "targeted" else "sequential"
+
+    queue: asyncio.Queue = asyncio.Queue()
+    streaming = _StreamingHumanizer(humanizer, queue)
+
+    async def on_attempt(attempt: HumanizeAttempt) -> None:
+        await streaming.on_attempt(attempt)
+        data = attempt.model_dump()
+        data["passed"] = attempt.ai_score is not None and attempt.ai_score <= threshold
+        await queue.put(("attempt", data))
+
+    async def produce() -> None:
+        start = time.perf_counter()
+        try:
+            if not enable_gate or registry is None:
+                loop_result = await humanize_single(
+                    humanizer=streaming,
+                    text=body.text,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    threshold=threshold,
+                )
+            else:
+                shared_client = getattr(request.app.state, "detector_http_client", None)
+                async with borrow_detector_client(shared_client) as http_client:
+                    loop_result = await humanize_with_detector_gate(
+                        humanizer=streaming,
+                        registry=registry,
+                        http_client=http_client,
+                        text=body.text,
+                        base_temperature=temperature,
+                        max_tokens=max_tokens,
+                        max_attempts=max_attempts,
+                        threshold=threshold,
+                        detector_name=settings.HUMANIZE_DETECTOR_NAME,
+                        temp_bump_per_retry=settings.HUMANIZE_TEMP_BUMP_PER_RETRY,
+                        detector_timeout_seconds=settings.HUMANIZE_DETECTOR_TIMEOUT_SECONDS,
+                        mode=mode,
+                        on_attempt=on_attempt,
+                    )
+            processing_time_ms = int((time.perf_counter() - start) * 1000)
+            response = to_response(body, loop_result, processing_time_ms)
+            await queue.put(("result", response.model_dump()))
+            _log_humanization(request, body, loop_result, processing_time_ms)
+        except AdmissionRejected as exc:
+            await queue.put(
+                ("error", {"detail": exc.reason, "retry_after": exc.retry_after})
+            )
+        except Exception as exc:
+            logger.error("Streaming humanization failed", error=str(exc))
+            await queue.put(("error", {"detail": "Model inference failed"}))
+        finally:
+            await queue.put(None)
+
+    async def event_stream():
+        # The task copies the context, so the whole run is one admitted request
+        with admission_request():
+            task = asyncio.create_task(produce())
+        try:
+            while (item := await queue.get()) is not None:
+                yield _sse(*item)
+        finally:
+            if not task.done():
+                task.cancel()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
@@ -0,0 +1,95 @@
+import uuid
+
+import structlog
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_optional_user_id
+from app.db.crud import get_request
+from app.db.session import get_session
+from app.models.database import RequestStatus, RequestType
+from app.models.schemas import (
+    DetectRequest,
+    DetectResponse,
+    HumanizeRequest,
+    HumanizeResponse,
+    JobCreatedResponse,
+    JobStatusResponse,
+)
+from app.services.jobs import enqueue_job, load_job_result
+
+logger = structlog.get_logger()
+
+router = APIRouter(prefix="/jobs")
+
+_RESULT_MODELS = {
+    RequestType.humanize.value: HumanizeResponse,
+    RequestType.detect.value: DetectResponse,
+}
+
+
+async def _enqueue(
+    session: AsyncSession,
+    request_type: RequestType,
+    payload: dict,
+    user_id: uuid.UUID | None,
+) -> JobCreatedResponse:
+    try:
+        job_id = await enqueue_job(session, request_type, payload, user_id=user_id)
+    except RuntimeError as exc:
+        logger.error("Job enqueue failed", type=request_type.value, error=str(exc))
+        raise HTTPException(status_code=503, detail="Job queue unavailable") from exc
+    return JobCreatedResponse(job_id=job_id, status="pending")
+
+
+@router.post("/humanize", response_model=JobCreatedResponse, status_code=202)
+async def create_humanize_job(
+    body: HumanizeRequest,
+    session: AsyncSession = Depends(get_session),
+    user_id: uuid.UUID | None = Depends(get_optional_user_id),
+):
+    return await _enqueue(session, RequestType.humanize, body.model_dump(), user_id)
+
+
+@router.post("/detect", response_model=JobCreatedResponse, status_code=202)
+async def create_detect_job(
+    body: DetectRequest,
+    session: AsyncSession = Depends(get_session),
+    user_id: uuid.UUID | None = Depends(get_optional_user_id),
+):
+    return await _enqueue(session, RequestType.detect, body.model_dump(), user_id)
+
+
+@router.get("/{job_id}", response_model=JobStatusResponse)
+async def get_job(
+    job_id: uuid.UUID,
+    session: AsyncSession = Depends(get_session),
+    user_id: uuid.UUID | None = Depends(get_optional_user_id),
+):
+    """Status and result of a job; only its submitter can see it.
+
+    Anonymous jobs are visible to anonymous callers (the job id is the
+    capability). Other users' jobs and non-job requests are a 404, so
+    request ids can't be probed.
+    """
+    record = await get_request(session, job_id)
+    if record is None or not record.is_job or record.user_id != user_id:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    stored = record.detector_results or {}
+    result = None
+    if record.status == RequestStatus.completed.value and record.request_type in _RESULT_MODELS:
+        # None once the stored result has expired (JOB_RESULT_TTL_SECONDS)
+        payload = await load_job_result(record.id)
+        if payload is not None:
+            result = _RESULT_MODELS[record.request_type].model_validate(payload)
+
+    return JobStatusResponse(
+        job_id=record.id,
+        type=record.request_type,
+        status=record.status,
+        created_at=record.created_at,
+        processing_time_ms=record.processing_time_ms,
+        result=result,
+        error=stored.get("error"),
+    )
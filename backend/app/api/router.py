@@ -1,10 +1,12 @@
 from fastapi import APIRouter
 
-from app.api import auth, detect, health, humanize
+from app.api import auth, detect, health, history, humanize, jobs
 
 api_router = APIRouter()
 
 api_router.include_router(auth.router)
 api_router.include_router(humanize.router, tags=["Humanize"])
 api_router.include_router(detect.router, tags=["Detect"])
+api_router.include_router(jobs.router, tags=["Jobs"])
+api_router.include_router(history.router, tags=["History"])
 api_router.include_router(health.router, tags=["Health"])
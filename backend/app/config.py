@@ -16,6 +16,29 @@ class Settings(BaseSettings):
     MAX_OUTPUT_TOKENS: int = 2048
     TEMPERATURE: float = 0.95
 
+    # Multiple vLLM replicas (overrides HUMANIZER_API_URL when set)
+    HUMANIZER_API_URLS: list[str] = []
+    HUMANIZER_PROBE_INTERVAL_SECONDS: float = 10.0
+    HUMANIZER_EJECT_AFTER_FAILURES: int = 3
+    HUMANIZER_PREFIX_AFFINITY: bool = True
+    HUMANIZER_AFFINITY_MAX_SKEW: int = 4
+
+    # Admission control: generations in flight against vLLM, bounded wait
+    # queue, and how long interactive / batch callers may wait for a slot
+    # before being shed with 429/503 + Retry-After (0 in-flight = disabled)
+    HUMANIZE_MAX_IN_FLIGHT: int = 32
+    HUMANIZE_MAX_QUEUE: int = 128
+    HUMANIZE_QUEUE_TIMEOUT_SECONDS: float = 20.0
+    HUMANIZE_BATCH_QUEUE_TIMEOUT_SECONDS: float = 120.0
+
+    # Humanizer micro-batching (off unless window > 0 and max size > 1).
+    # Batches go to /v1/completions, which skips the chat template, so the
+    # template must reproduce the model's chat format around {content};
+    # required when batching is on (startup fails without it).
+    HUMANIZER_BATCH_WINDOW_MS: float = 0.0
+    HUMANIZER_BATCH_MAX_SIZE: int = 16
+    HUMANIZER_BATCH_PROMPT_TEMPLATE: str = ""
+
     # CORS
     CORS_ORIGINS: list[str] = ["http://localhost:5173"]
 
@@ -30,6 +53,20 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRY_MINUTES: int = 60        # 1 hour
     REFRESH_TOKEN_EXPIRY_DAYS: int = 7           # 7 days
 
+    # Write-behind request logging: rows are queued (dropped past the queue
+    # limit) and inserted in batches of up to BATCH_SIZE every FLUSH_INTERVAL
+    REQUEST_LOG_MAX_QUEUE: int = 10000
+    REQUEST_LOG_BATCH_SIZE: int = 500
+    REQUEST_LOG_FLUSH_INTERVAL_SECONDS: float = 1.0
+
+    # Monthly requests partitions (Postgres): created MONTHS_AHEAD in advance;
+    # partitions older than RETENTION_MONTHS (0 = keep all) are dropped, or
+    # detached for archiving with RETENTION_ARCHIVE
+    REQUEST_PARTITION_MONTHS_AHEAD: int = 3
+    REQUEST_RETENTION_MONTHS: int = 12
+    REQUEST_RETENTION_ARCHIVE: bool = False
+    REQUEST_PARTITION_MAINTENANCE_INTERVAL_HOURS: float = 24
+
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
 
@@ -47,12 +84,84 @@ class Settings(BaseSettings):
     COPYLEAKS_API_KEY: str = ""
     ZEROGPT_API_KEY: str = ""
 
+    # Copyleaks access-token cache
+    COPYLEAKS_TOKEN_REFRESH_MARGIN_SECONDS: float = 600.0
+    COPYLEAKS_TOKEN_SHARE_VIA_REDIS: bool = True
+
+    # Shared detector HTTP client (connection pool)
+    DETECTOR_HTTP_MAX_CONNECTIONS: int = 100
+    DETECTOR_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    DETECTOR_HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    DETECTOR_HTTP_HTTP2: bool = True
+
+    # Detector result cache (in-process LRU + optional Redis tier)
+    DETECTOR_CACHE_ENABLED: bool = True
+    DETECTOR_CACHE_MAX_ENTRIES: int = 2048
+    DETECTOR_CACHE_TTL_SECONDS: int = 86400
+    DETECTOR_CACHE_USE_REDIS: bool = True
+
+    # POST /api/detect/batch — concurrent calls per detector per request
+    DETECTOR_BATCH_CONCURRENCY: int = 4
+
+    # Per-detector client-side rate limits in requests/second, e.g.
+    # {"zerogpt": 2, "gptzero": 5}; shared across processes through Redis.
+    # Callers over the limit are paced (delayed), not failed.
+    DETECTOR_RATE_LIMITS: dict[str, float] = {}
+    DETECTOR_RATE_LIMIT_BURST_SECONDS: float = 1.0
+    DETECTOR_RATE_LIMIT_USE_REDIS: bool = True
+    DETECTOR_RATE_LIMIT_MAX_WAIT_SECONDS: float = 10.0  # longer waits fail fast; 0 = unbounded
+    # Monthly call quotas per detector, reported by GET /api/detectors/quota
+    DETECTOR_MONTHLY_QUOTAS: dict[str, int] = {}
+
+    # Circuit breakers (each vLLM replica and each detector)
+    CIRCUIT_BREAKERS_ENABLED: bool = True
+    CIRCUIT_WINDOW_SECONDS: float = 60.0
+    CIRCUIT_MIN_CALLS: int = 5
+    CIRCUIT_ERROR_RATE_THRESHOLD: float = 0.5
+    CIRCUIT_SLOW_CALL_SECONDS: float = 25.0
+    CIRCUIT_SLOW_CALL_RATE_THRESHOLD: float = 0.8
+    CIRCUIT_OPEN_SECONDS: float = 30.0
+    CIRCUIT_HALF_OPEN_MAX_CALLS: int = 1
+
+    # Hedged detector calls (opt-in): re-issue a call still pending at the
+    # detector's observed latency quantile to the same detector; hedges
+    # capped at budget x calls
+    DETECTOR_HEDGING_ENABLED: bool = False
+    DETECTOR_HEDGE_QUANTILE: float = 0.9
+    DETECTOR_HEDGE_BUDGET_RATIO: float = 0.1
+    DETECTOR_HEDGE_MIN_SAMPLES: int = 20
+    DETECTOR_HEDGE_INITIAL_DELAY_SECONDS: float = 5.0
+
     # Humanize retry-loop tuning
     HUMANIZE_DETECTOR_NAME: str = "zerogpt"
     HUMANIZE_AI_SCORE_THRESHOLD: float = 0.35
     HUMANIZE_MAX_ATTEMPTS: int = 3
     HUMANIZE_TEMP_BUMP_PER_RETRY: float = 0.05
     HUMANIZE_DETECTOR_TIMEOUT_SECONDS: float = 30.0
+    HUMANIZE_LOOP_MODE: str = "sequential"       # sequential | parallel | pipelined | targeted | batched
+
+    # Long-input chunking (split + humanize chunks concurrently). Opt-in:
+    # chunks are rewritten without each other's context, which changes output
+    HUMANIZE_CHUNKING_ENABLED: bool = False
+    HUMANIZE_CHUNK_MAX_TOKENS: int = 400
+    HUMANIZE_CHUNK_CONCURRENCY: int = 8
+
+    # POST /api/humanize/batch — items humanized concurrently per request
+    HUMANIZE_BATCH_CONCURRENCY: int = 8
+
+    # Humanization result cache (opt-in)
+    HUMANIZE_CACHE_ENABLED: bool = False
+    HUMANIZE_CACHE_MAX_ENTRIES: int = 512
+    HUMANIZE_CACHE_TTL_SECONDS: int = 3600
+    HUMANIZE_CACHE_USE_REDIS: bool = True
+    HUMANIZE_CACHE_MAX_OUTPUT_TEMPERATURE: float = 0.3  # single outputs above this are never cached
+
+    # Background job queue (POST /api/jobs/*, consumed by `python -m app.worker`)
+    JOB_QUEUE_NAME: str = "jobs:queue"
+    JOB_WORKER_CONCURRENCY: int = 4
+    JOB_WORKER_HEARTBEAT_SECONDS: int = 10   # dead after 3 missed beats; its jobs are re-queued
+    JOB_MAX_REDELIVERIES: int = 3            # re-queues before a job is marked failed
+    JOB_RESULT_TTL_SECONDS: int = 86400      # full job results are kept in Redis this long
 
     model_config = {"env_file": ".env", "env_file_encoding": "utf-8"}
 
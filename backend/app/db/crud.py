@@ -1,11 +1,40 @@
-"""CRUD operations for the requests table."""
+"""CRUD operations for the requests and texts tables."""
 
+import enum
 import uuid
+from collections.abc import Iterable
+from datetime import datetime
 
+from sqlalchemy import tuple_
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlmodel import select
 
-from app.models.database import RequestRecord, RequestStatus, RequestType
+from app.models.database import RequestRecord, RequestStatus, RequestType, TextBlob
+
+_UPSERT_DIALECTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+async def store_texts(session: AsyncSession, texts: Iterable[str]) -> dict[str, str]:
+    """Insert any texts not stored yet; returns {text: hash}.
+
+    Texts that already exist get their ``created_at`` bumped, which keeps
+    texts still in use out of the retention sweep (``sweep_orphaned_texts``
+    only looks at texts older than the retention window). Does not commit,
+    so the texts land in the same transaction as the requests that
+    reference them.
+    """
+    blobs = {text: TextBlob.from_text(text) for text in texts}
+    if blobs:
+        insert = _UPSERT_DIALECTS[session.bind.dialect.name]
+        rows = [blob.model_dump() for blob in blobs.values()]
+        stmt = insert(TextBlob).values(rows)
+        await session.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["hash"], set_={"created_at": stmt.excluded.created_at}
+            )
+        )
+    return {text: blob.hash for text, blob in blobs.items()}
 
 
 async def create_request(
@@ -20,18 +49,25 @@ async def create_request(
     ai_score: float | None = None,
     attempts_count: int | None = None,
     threshold_met: bool | None = None,
+    user_id: uuid.UUID | None = None,
+    is_job: bool = False,
 ) -> RequestRecord:
     """Insert a new request record and return it."""
+    hashes = await store_texts(
+        session, [t for t in (input_text, output_text) if t is not None]
+    )
     record = RequestRecord(
         request_type=request_type.value,
-        input_text=input_text,
-        output_text=output_text,
+        user_id=user_id,
+        input_hash=hashes[input_text],
+        output_hash=hashes[output_text] if output_text is not None else None,
         detector_results=detector_results,
         status=status.value,
         processing_time_ms=processing_time_ms,
         ai_score=ai_score,
         attempts_count=attempts_count,
         threshold_met=threshold_met,
+        is_job=is_job,
     )
     session.add(record)
     await session.commit()
@@ -44,20 +80,55 @@ async def get_request(
     request_id: uuid.UUID,
 ) -> RequestRecord | None:
     """Fetch a single request by ID, or None if not found."""
-    return await session.get(RequestRecord, request_id)
+    # The primary key is (id, created_at); look up by id alone
+    result = await session.execute(select(RequestRecord).where(RequestRecord.id == request_id))
+    return result.scalars().first()
+
+
+async def update_request(
+    session: AsyncSession,
+    request_id: uuid.UUID,
+    **fields,
+) -> RequestRecord | None:
+    """Update columns on an existing request; returns None if it doesn't exist."""
+    record = await get_request(session, request_id)
+    if record is None:
+        return None
+    for name, value in fields.items():
+        if isinstance(value, enum.Enum):
+            value = value.value
+        if name in ("input_text", "output_text"):
+            name = name.replace("_text", "_hash")
+            if value is not None:
+                value = (await store_texts(session, [value]))[value]
+        setattr(record, name, value)
+    session.add(record)
+    await session.commit()
+    await session.refresh(record)
+    return record
 
 
 async def list_requests(
     session: AsyncSession,
     *,
     request_type: RequestType | None = None,
+    user_id: uuid.UUID | None = None,
     limit: int = 50,
-    offset: int = 0,
+    before: tuple[datetime, uuid.UUID] | None = None,
 ) -> list[RequestRecord]:
-    """List request records with optional type filter and pagination."""
+    """List request records, newest first, with optional filters.
+
+    Keyset pagination: pass the ``(created_at, id)`` of the last record of
+    the previous page as ``before`` to get the next page. Every page is an
+    index range scan, however deep.
+    """
     stmt = select(RequestRecord)
     if request_type is not None:
         stmt = stmt.where(RequestRecord.request_type == request_type.value)
-    stmt = stmt.order_by(RequestRecord.created_at.desc()).offset(offset).limit(limit)
+    if user_id is not None:
+        stmt = stmt.where(RequestRecord.user_id == user_id)
+    if before is not None:
+        stmt = stmt.where(tuple_(RequestRecord.created_at, RequestRecord.id) < tuple_(*before))
+    stmt = stmt.order_by(RequestRecord.created_at.desc(), RequestRecord.id.desc()).limit(limit)
     result = await session.execute(stmt)
     return list(result.scalars().all())
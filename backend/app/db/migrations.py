@@ -0,0 +1,211 @@
+"""In-place upgrades for databases created by older versions.
+
+``init_db`` only creates missing tables, so schema changes to existing
+tables are applied here: ``python -m app.db.migrations`` runs every step in
+order. Each step checks the current schema first, so re-running is safe.
+Run it before starting a new API version.
+
+- ``migrate_texts``: move request bodies into the content-addressed
+  ``texts`` table. Adds ``input_hash`` / ``output_hash``, backfills them in
+  batches (each distinct text stored once, compressed) and drops the old
+  ``input_text`` / ``output_text`` columns. An interrupted run resumes
+  where it stopped.
+- ``migrate_request_history``: add ``requests.user_id`` and the history
+  indexes.
+- ``migrate_request_jobs``: add ``requests.is_job``. Rows still pending or
+  processing can only be queued jobs, so they are marked as such.
+- ``migrate_request_partitioning`` (Postgres): rebuild ``requests`` as a
+  monthly-partitioned table and copy the existing rows into it. This runs
+  in one transaction and holds the table for the duration of the copy.
+"""
+
+import argparse
+import asyncio
+from datetime import datetime, timezone
+
+import structlog
+from sqlalchemy import inspect, text
+
+from app.config import settings
+from app.db.crud import store_texts
+from app.db.partitions import create_partitions, is_partitioned, month_start
+from app.logging_config import setup_logging
+from app.models.database import RequestRecord
+
+logger = structlog.get_logger()
+
+
+async def _request_columns(session) -> set[str]:
+    conn = await session.connection()
+    columns = await conn.run_sync(lambda c: inspect(c).get_columns("requests"))
+    return {column["name"] for column in columns}
+
+
+async def migrate_texts(session_factory, *, batch_size: int = 1000) -> int:
+    """Backfill text hashes for legacy rows; returns the number of rows migrated."""
+    async with session_factory() as session:
+        columns = await _request_columns(session)
+        if "input_text" not in columns:
+            logger.info("requests table already uses the texts table")
+            return 0
+        for name in ("input_hash", "output_hash"):
+            if name not in columns:
+                await session.execute(
+                    text(f"ALTER TABLE requests ADD COLUMN {name} VARCHAR(64)")
+                )
+        await session.commit()
+
+    migrated = 0
+    while True:
+        async with session_factory() as session:
+            rows = (
+                await session.execute(
+                    text(
+                        "SELECT id, input_text, output_text FROM requests "
+                        "WHERE input_hash IS NULL LIMIT :limit"
+                    ),
+                    {"limit": batch_size},
+                )
+            ).all()
+            if not rows:
+                break
+
+            hashes = await store_texts(
+                session,
+                {t for row in rows for t in (row.input_text, row.output_text) if t is not None},
+            )
+            await session.execute(
+                text(
+                    "UPDATE requests SET input_hash = :input_hash, "
+                    "output_hash = :output_hash WHERE id = :id"
+                ),
+                [
+                    {
+                        "id": row.id,
+                        "input_hash": hashes[row.input_text],
+                        "output_hash": (
+                            hashes[row.output_text] if row.output_text is not None else None
+                        ),
+                    }
+                    for row in rows
+                ],
+            )
+            await session.commit()
+            migrated += len(rows)
+            logger.info("Migrated request texts", rows=migrated)
+
+    async with session_factory() as session:
+        if session.bind.dialect.name == "postgresql":
+            await session.execute(
+                text("ALTER TABLE requests ALTER COLUMN input_hash SET NOT NULL")
+            )
+            for name in ("input_hash", "output_hash"):
+                await session.execute(
+                    text(
+                        f"ALTER TABLE requests ADD CONSTRAINT requests_{name}_fkey "
+                        f"FOREIGN KEY ({name}) REFERENCES texts (hash)"
+                    )
+                )
+        await session.execute(text("ALTER TABLE requests DROP COLUMN input_text"))
+        await session.execute(text("ALTER TABLE requests DROP COLUMN output_text"))
+        await session.commit()
+    logger.info("Dropped legacy text columns from requests")
+
+    return migrated
+
+
+async def migrate_request_history(session_factory) -> None:
+    """Add ``requests.user_id`` and create any missing ``requests`` indexes."""
+    async with session_factory() as session:
+        if "user_id" not in await _request_columns(session):
+            if session.bind.dialect.name == "postgresql":
+                await session.execute(text(
+                    "ALTER TABLE requests ADD COLUMN user_id UUID REFERENCES users (id)"
+                ))
+            else:
+                await session.execute(text(
+                    "ALTER TABLE requests ADD COLUMN user_id CHAR(32) REFERENCES users (id)"
+                ))
+            logger.info("Added requests.user_id")
+
+        conn = await session.connection()
+        for index in RequestRecord.__table__.indexes:
+            await conn.run_sync(lambda c, index=index: index.create(c, checkfirst=True))
+        await session.commit()
+
+
+async def migrate_request_jobs(session_factory) -> None:
+    """Add ``requests.is_job`` and mark unfinished rows as jobs."""
+    async with session_factory() as session:
+        if "is_job" in await _request_columns(session):
+            return
+        await session.execute(text(
+            "ALTER TABLE requests ADD COLUMN is_job BOOLEAN NOT NULL DEFAULT FALSE"
+        ))
+        await session.execute(text(
+            "UPDATE requests SET is_job = TRUE WHERE status IN ('pending', 'processing')"
+        ))
+        await session.commit()
+    logger.info("Added requests.is_job")
+
+
+async def migrate_request_partitioning(session_factory) -> int:
+    """Convert a plain ``requests`` table to monthly partitions; returns rows copied."""
+    async with session_factory() as session:
+        if session.bind.dialect.name != "postgresql" or await is_partitioned(session):
+            return 0
+
+        await session.execute(text("ALTER TABLE requests RENAME TO requests_unpartitioned"))
+        await session.execute(text(
+            "ALTER TABLE requests_unpartitioned "
+            "RENAME CONSTRAINT requests_pkey TO requests_unpartitioned_pkey"
+        ))
+        # Index names are schema-wide; the new table recreates them
+        for index in RequestRecord.__table__.indexes:
+            await session.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+
+        conn = await session.connection()
+        await conn.run_sync(lambda c: RequestRecord.__table__.create(c))
+        oldest = (
+            await session.execute(text("SELECT min(created_at) FROM requests_unpartitioned"))
+        ).scalar()
+        today = datetime.now(timezone.utc).date()
+        await create_partitions(
+            session,
+            oldest.date() if oldest else today,
+            month_start(today, settings.REQUEST_PARTITION_MONTHS_AHEAD),
+        )
+
+        columns = ", ".join(c.name for c in RequestRecord.__table__.columns)
+        result = await session.execute(text(
+            f"INSERT INTO requests ({columns}) SELECT {columns} FROM requests_unpartitioned"
+        ))
+        await session.execute(text("DROP TABLE requests_unpartitioned"))
+        await session.commit()
+
+    logger.info("Partitioned requests table", rows=result.rowcount)
+    return result.rowcount
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    setup_logging(debug=settings.DEBUG)
+
+    from app.db.session import async_session, close_db, init_db
+
+    # Creates missing tables; existing tables are left as they are
+    await init_db()
+    try:
+        await migrate_texts(async_session, batch_size=args.batch_size)
+        await migrate_request_history(async_session)
+        await migrate_request_jobs(async_session)
+        await migrate_request_partitioning(async_session)
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,212 @@
+"""Monthly partitions and retention for the requests table (PostgreSQL).
+
+``requests`` is range-partitioned by ``created_at``, one partition per
+calendar month (``requests_y2026m01``, ...) plus ``requests_default`` as a
+safety net. ``maintain_partitions`` keeps REQUEST_PARTITION_MONTHS_AHEAD
+months of partitions created ahead of time and removes partitions older
+than REQUEST_RETENTION_MONTHS: dropped, or detached and left as standalone
+tables for archiving when REQUEST_RETENTION_ARCHIVE is set. Retention is a
+metadata operation per month instead of a DELETE over millions of rows.
+
+Expired rows that ended up in ``requests_default`` are deleted (that
+partition should stay nearly empty; a warning is logged when it isn't).
+After dropping partitions, texts no surviving request references are
+swept from ``texts``, since that is where the bulk of the storage lives.
+When archiving, neither happens: detached partitions still reference
+their texts.
+
+The API runs maintenance at startup and every
+REQUEST_PARTITION_MAINTENANCE_INTERVAL_HOURS; ``python -m app.db.partitions``
+runs it once (e.g. from cron). On other databases these are no-ops.
+"""
+
+import asyncio
+import re
+from datetime import date, datetime, timezone
+
+import structlog
+from sqlalchemy import text
+
+from app.config import settings
+from app.logging_config import setup_logging
+
+logger = structlog.get_logger()
+
+# Serializes maintenance across API processes (pg_advisory_xact_lock key)
+_LOCK_KEY = 0x72657170  # "reqp"
+
+_PARTITION_RE = re.compile(r"^requests_y(\d{4})m(\d{2})$")
+
+
+def month_start(day: date, offset: int = 0) -> date:
+    """First day of the month ``offset`` months after ``day``'s month."""
+    index = day.year * 12 + day.month - 1 + offset
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"requests_y{month.year:04d}m{month.month:02d}"
+
+
+def _is_postgres(session) -> bool:
+    return session.bind.dialect.name == "postgresql"
+
+
+async def is_partitioned(session) -> bool:
+    result = await session.execute(
+        text("SELECT relkind FROM pg_class WHERE oid = to_regclass('requests')")
+    )
+    return result.scalar() == "p"
+
+
+async def create_partitions(session, first: date, last: date) -> list[str]:
+    """Create monthly partitions for every month from ``first`` to ``last``."""
+    created = []
+    month = month_start(first)
+    while month <= last:
+        name = partition_name(month)
+        exists = await session.execute(text("SELECT to_regclass(:name)"), {"name": name})
+        if exists.scalar() is None:
+            await session.execute(text(
+                f"CREATE TABLE {name} PARTITION OF requests "
+                f"FOR VALUES FROM ('{month.isoformat()}') "
+                f"TO ('{month_start(month, 1).isoformat()}')"
+            ))
+            created.append(name)
+        month = month_start(month, 1)
+    await session.execute(
+        text("CREATE TABLE IF NOT EXISTS requests_default PARTITION OF requests DEFAULT")
+    )
+    return created
+
+
+async def list_partitions(session) -> list[tuple[str, date]]:
+    """(name, month) of every monthly partition attached to ``requests``."""
+    result = await session.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass('requests')"
+    ))
+    partitions = []
+    for name in result.scalars():
+        match = _PARTITION_RE.match(name)
+        if match:
+            partitions.append((name, date(int(match[1]), int(match[2]), 1)))
+    return sorted(partitions, key=lambda p: p[1])
+
+
+async def expire_partitions(
+    session, *, retention_months: int, archive: bool, today: date
+) -> list[str]:
+    """Drop (or detach) monthly partitions that ended before the retention window."""
+    if retention_months <= 0:
+        return []
+    cutoff = month_start(today, -retention_months)
+    expired = []
+    for name, month in await list_partitions(session):
+        if month >= cutoff:
+            break
+        if archive:
+            await session.execute(text(f"ALTER TABLE requests DETACH PARTITION {name}"))
+        else:
+            await session.execute(text(f"DROP TABLE {name}"))
+        expired.append(name)
+    return expired
+
+
+async def expire_default_partition(session, *, retention_months: int, today: date) -> int:
+    """Delete expired rows from ``requests_default``; returns rows deleted."""
+    remaining = (
+        await session.execute(text("SELECT count(*) FROM requests_default"))
+    ).scalar()
+    if remaining:
+        logger.warning(
+            "requests_default holds rows; a monthly partition is missing",
+            rows=remaining,
+        )
+    if retention_months <= 0 or not remaining:
+        return 0
+    result = await session.execute(
+        text("DELETE FROM requests_default WHERE created_at < :cutoff"),
+        {"cutoff": month_start(today, -retention_months)},
+    )
+    return result.rowcount
+
+
+async def sweep_orphaned_texts(session, *, retention_months: int, today: date) -> int:
+    """Delete texts older than the retention window that no request references."""
+    if retention_months <= 0:
+        return 0
+    result = await session.execute(
+        text(
+            "DELETE FROM texts t WHERE t.created_at < :cutoff "
+            "AND NOT EXISTS (SELECT 1 FROM requests r WHERE r.input_hash = t.hash) "
+            "AND NOT EXISTS (SELECT 1 FROM requests r WHERE r.output_hash = t.hash)"
+        ),
+        {"cutoff": month_start(today, -retention_months)},
+    )
+    return result.rowcount
+
+
+async def maintain_partitions(session_factory, *, today: date | None = None) -> dict:
+    """Pre-create upcoming partitions and apply retention. Postgres only."""
+    today = today or datetime.now(timezone.utc).date()
+    retention_months = settings.REQUEST_RETENTION_MONTHS
+    archive = settings.REQUEST_RETENTION_ARCHIVE
+    async with session_factory() as session:
+        if not _is_postgres(session) or not await is_partitioned(session):
+            return {"created": [], "expired": [], "default_rows_deleted": 0, "texts_deleted": 0}
+
+        await session.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _LOCK_KEY})
+        created = await create_partitions(
+            session, today, month_start(today, settings.REQUEST_PARTITION_MONTHS_AHEAD)
+        )
+        expired = await expire_partitions(
+            session, retention_months=retention_months, archive=archive, today=today
+        )
+        # Archiving never deletes rows; it still warns about default rows
+        default_rows_deleted = await expire_default_partition(
+            session, retention_months=0 if archive else retention_months, today=today
+        )
+        texts_deleted = 0
+        if not archive:
+            texts_deleted = await sweep_orphaned_texts(
+                session, retention_months=retention_months, today=today
+            )
+        await session.commit()
+
+    summary = {
+        "created": created,
+        "expired": expired,
+        "default_rows_deleted": default_rows_deleted,
+        "texts_deleted": texts_deleted,
+    }
+    if created or expired or default_rows_deleted or texts_deleted:
+        logger.info("Request partitions maintained", archived=archive, **summary)
+    return summary
+
+
+async def run_partition_maintenance(session_factory, *, interval_seconds: float) -> None:
+    """Run ``maintain_partitions`` forever, every ``interval_seconds``."""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await maintain_partitions(session_factory)
+        except Exception as exc:
+            logger.warning("Request partition maintenance failed", error=str(exc))
+
+
+async def main() -> None:
+    setup_logging(debug=settings.DEBUG)
+
+    from app.db.session import async_session, close_db, init_db
+
+    await init_db()
+    try:
+        await maintain_partitions(async_session)
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
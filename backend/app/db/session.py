@@ -28,9 +28,16 @@ async def get_session():
 
 
 async def init_db() -> None:
-    """Create all tables defined by SQLModel metadata."""
+    """Create all tables defined by SQLModel metadata.
+
+    On Postgres this also creates the current and upcoming ``requests``
+    partitions, so inserts have somewhere to go.
+    """
+    from app.db.partitions import maintain_partitions
+
     async with engine.begin() as conn:
         await conn.run_sync(SQLModel.metadata.create_all)
+    await maintain_partitions(async_session)
 
 
 async def close_db() -> None:
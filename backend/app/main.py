@@ -1,3 +1,5 @@
+import asyncio
+import contextlib
 from contextlib import asynccontextmanager
 
 import structlog
@@ -24,22 +26,61 @@ async def lifespan(app: FastAPI):
     app.state.database_connected = True
     logger.info("Database initialized")
 
+    # Write-behind request logging (batched inserts off the response path)
+    from app.db.session import async_session
+    from app.services.request_log import RequestLogWriter
+
+    app.state.request_log = RequestLogWriter(
+        async_session,
+        max_queue=settings.REQUEST_LOG_MAX_QUEUE,
+        batch_size=settings.REQUEST_LOG_BATCH_SIZE,
+        flush_interval_seconds=settings.REQUEST_LOG_FLUSH_INTERVAL_SECONDS,
+    )
+    app.state.request_log.start()
+
+    # Periodic requests partition maintenance (no-op unless Postgres)
+    from app.db.partitions import run_partition_maintenance
+
+    app.state.partition_maintenance = asyncio.create_task(
+        run_partition_maintenance(
+            async_session,
+            interval_seconds=settings.REQUEST_PARTITION_MAINTENANCE_INTERVAL_HOURS * 3600,
+        )
+    )
+
     # Redis (for refresh tokens)
     from app.db.redis import init_redis, close_redis
 
     await init_redis()
     app.state.redis_connected = True
 
-    # Humanizer (vLLM remote inference)
-    if settings.HUMANIZER_API_URL:
-        try:
-            from app.services.humanizer import HumanizerService
+    # Humanization result cache (opt-in); built the same way as in the worker
+    from app.services import builders
+
+    app.state.humanize_cache = builders.build_humanize_cache()
+
+    # Admission control for vLLM generations (applied below the output cache)
+    app.state.admission = None
+    if settings.HUMANIZE_MAX_IN_FLIGHT > 0:
+        from app.services.admission import AdmissionController, Priority
+
+        app.state.admission = AdmissionController(
+            max_in_flight=settings.HUMANIZE_MAX_IN_FLIGHT,
+            max_queue=settings.HUMANIZE_MAX_QUEUE,
+            queue_timeout_seconds={
+                Priority.interactive: settings.HUMANIZE_QUEUE_TIMEOUT_SECONDS,
+                Priority.batch: settings.HUMANIZE_BATCH_QUEUE_TIMEOUT_SECONDS,
+            },
+        )
 
-            app.state.humanizer = HumanizerService(
-                base_url=settings.HUMANIZER_API_URL,
-                model_name=settings.HUMANIZER_MODEL_NAME,
-                api_key=settings.HUMANIZER_API_KEY,
-            )
+    # Humanizer (vLLM remote inference; pooled when several replicas are set)
+    from app.services.humanizer_pool import create_humanizer
+
+    app.state.humanizer = create_humanizer(
+        cache=app.state.humanize_cache, admission=app.state.admission
+    )
+    if app.state.humanizer is not None:
+        try:
             await app.state.humanizer.connect()
             app.state.model_loaded = app.state.humanizer.is_loaded
             logger.info("Humanizer service initialized", available=app.state.model_loaded)
@@ -49,13 +90,22 @@ async def lifespan(app: FastAPI):
             app.state.model_loaded = False
     else:
         logger.warning("HUMANIZER_API_URL not set — humanizer disabled")
-        app.state.humanizer = None
         app.state.model_loaded = False
 
-    # Detector registry
-    from app.services.detectors.registry import DetectorRegistry
+    # Shared pooled HTTP client for detector API calls
+    from app.services.http_client import create_detector_http_client
+
+    app.state.detector_http_client = create_detector_http_client()
+
+    # Detector result cache
+    app.state.detector_cache = builders.build_detector_cache()
 
-    app.state.detector_registry = DetectorRegistry.register_defaults()
+    # Detector registry (with per-detector rate limits and usage accounting)
+    app.state.detector_quota = builders.build_detector_quota()
+    app.state.detector_registry = builders.build_detector_registry(
+        result_cache=app.state.detector_cache,
+        quota=app.state.detector_quota,
+    )
     logger.info(
         "Detector registry initialized",
         available=len(app.state.detector_registry.get_available()),
@@ -67,6 +117,16 @@ async def lifespan(app: FastAPI):
     if getattr(app.state, "humanizer", None):
         await app.state.humanizer.disconnect()
 
+    if getattr(app.state, "detector_http_client", None):
+        await app.state.detector_http_client.aclose()
+
+    app.state.partition_maintenance.cancel()
+    with contextlib.suppress(asyncio.CancelledError):
+        await app.state.partition_maintenance
+
+    await app.state.request_log.stop()
+    logger.info("Request log drained", **app.state.request_log.stats())
+
     await close_redis()
     await close_db()
     logger.info("Database and Redis connections closed")
@@ -1,12 +1,22 @@
-"""SQLModel ORM models for the requests table."""
+"""SQLModel ORM models for the requests and texts tables.
+
+Request bodies are content-addressed: each distinct text is stored once in
+``texts``, keyed by its SHA-256 and zlib-compressed, and ``requests`` rows
+reference it by hash. ``RequestRecord.input_text`` / ``output_text`` read
+the text back through the (eagerly joined) relationship.
+"""
 
 import enum
+import hashlib
 import uuid
+import zlib
 from datetime import datetime, timezone
 from typing import Any
 
-from sqlalchemy import Column, Text
-from sqlmodel import Field, SQLModel
+from sqlalchemy import Column, Index, LargeBinary
+from sqlmodel import Field, Relationship, SQLModel
+
+from app.models.user import User  # noqa: F401 — users table for the user_id foreign key
 
 try:
     from sqlalchemy.dialects.postgresql import JSON as PG_JSON
@@ -29,21 +39,78 @@ class RequestStatus(str, enum.Enum):
     failed = "failed"
 
 
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class TextBlob(SQLModel, table=True):
+    __tablename__ = "texts"
+
+    hash: str = Field(primary_key=True, max_length=64)
+    body: bytes = Field(sa_column=Column(LargeBinary, nullable=False))
+    length: int
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc).replace(tzinfo=None)
+    )
+
+    @classmethod
+    def from_text(cls, text: str) -> "TextBlob":
+        return cls(hash=text_hash(text), body=zlib.compress(text.encode()), length=len(text))
+
+    @property
+    def text(self) -> str:
+        return zlib.decompress(self.body).decode()
+
+
 class RequestRecord(SQLModel, table=True):
     __tablename__ = "requests"
+    # Match list_requests: newest first, optionally per user or per type,
+    # with id as the keyset tie-breaker. On Postgres the table is partitioned
+    # by month (see app.db.partitions), so created_at is part of the key.
+    __table_args__ = (
+        Index("ix_requests_created_at_id", "created_at", "id"),
+        Index("ix_requests_user_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_requests_type_created_at_id", "request_type", "created_at", "id"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     request_type: str = Field(..., max_length=20)
-    input_text: str = Field(sa_column=Column(Text, nullable=False))
-    output_text: str | None = Field(default=None, sa_column=Column(Text, nullable=True))
+    user_id: uuid.UUID | None = Field(default=None, foreign_key="users.id")
+    input_hash: str = Field(foreign_key="texts.hash", max_length=64)
+    output_hash: str | None = Field(default=None, foreign_key="texts.hash", max_length=64)
     detector_results: dict[str, Any] | None = Field(
         default=None, sa_column=Column(JSON, nullable=True)
     )
     status: str = Field(default=RequestStatus.pending.value, max_length=20)
     created_at: datetime = Field(
-        default_factory=lambda: datetime.now(timezone.utc).replace(tzinfo=None)
+        default_factory=lambda: datetime.now(timezone.utc).replace(tzinfo=None),
+        primary_key=True,
     )
     processing_time_ms: int | None = Field(default=None)
     ai_score: float | None = Field(default=None)
     attempts_count: int | None = Field(default=None)
     threshold_met: bool | None = Field(default=None)
+    # Submitted through /api/jobs (polled via GET /api/jobs/{id})
+    is_job: bool = Field(default=False)
+
+    input_blob: TextBlob = Relationship(
+        sa_relationship_kwargs={
+            "foreign_keys": "[RequestRecord.input_hash]",
+            "lazy": "joined",
+        }
+    )
+    output_blob: TextBlob | None = Relationship(
+        sa_relationship_kwargs={
+            "foreign_keys": "[RequestRecord.output_hash]",
+            "lazy": "joined",
+        }
+    )
+
+    @property
+    def input_text(self) -> str:
+        return self.input_blob.text
+
+    @property
+    def output_text(self) -> str | None:
+        return self.output_blob.text if self.output_blob is not None else None
@@ -1,3 +1,7 @@
+import uuid
+from datetime import datetime
+from typing import Annotated
+
 from pydantic import BaseModel, Field
 
 
@@ -34,6 +38,21 @@ class HumanizeResponse(BaseModel):
     warning: str | None = None
 
 
+class HumanizeBatchRequest(BaseModel):
+    items: list[HumanizeRequest] = Field(..., min_length=1, max_length=500)
+
+
+class HumanizeBatchItem(BaseModel):
+    index: int
+    result: HumanizeResponse | None = None
+    error: str | None = None
+
+
+class HumanizeBatchResponse(BaseModel):
+    items: list[HumanizeBatchItem]
+    processing_time_ms: int
+
+
 class DetectRequest(BaseModel):
     text: str = Field(..., min_length=1, max_length=10000)
     detectors: list[str] | None = None
@@ -52,11 +71,68 @@ class DetectResponse(BaseModel):
     processing_time_ms: int
 
 
+class DetectBatchRequest(BaseModel):
+    texts: list[Annotated[str, Field(min_length=1, max_length=10000)]] = Field(
+        ..., min_length=1, max_length=1000
+    )
+    detectors: list[str] | None = None
+
+
+class DetectBatchItem(BaseModel):
+    index: int
+    result: DetectorResult
+
+
+class JobCreatedResponse(BaseModel):
+    job_id: uuid.UUID
+    status: str
+
+
+class JobStatusResponse(BaseModel):
+    job_id: uuid.UUID
+    type: str
+    status: str
+    created_at: datetime
+    processing_time_ms: int | None = None
+    result: HumanizeResponse | DetectResponse | None = None
+    error: str | None = None
+
+
+class RequestHistoryItem(BaseModel):
+    id: uuid.UUID
+    type: str
+    status: str
+    created_at: datetime
+    input_text: str
+    output_text: str | None = None
+    processing_time_ms: int | None = None
+    ai_score: float | None = None
+    attempts_count: int | None = None
+    threshold_met: bool | None = None
+
+
+class RequestHistoryResponse(BaseModel):
+    items: list[RequestHistoryItem]
+    next_cursor: str | None = None
+
+
 class HealthResponse(BaseModel):
     status: str
     model_loaded: bool
     database_connected: bool
     detectors_available: int
+    circuits: dict[str, str] = {}
+
+
+class MetricsResponse(BaseModel):
+    detector_http_pool: dict | None = None
+    detector_cache: dict | None = None
+    humanize_cache: dict | None = None
+    humanizer_batching: dict | None = None
+    humanizer_replicas: list[dict] | None = None
+    humanize_admission: dict | None = None
+    detector_hedging: dict | None = None
+    request_log: dict | None = None
 
 
 class DetectorInfo(BaseModel):
@@ -68,3 +144,15 @@ class DetectorInfo(BaseModel):
 
 class DetectorListResponse(BaseModel):
     detectors: list[DetectorInfo]
+
+
+class DetectorUsage(BaseModel):
+    calls: int = 0
+    characters: int = 0
+    monthly_quota: int | None = None
+    remaining: int | None = None
+
+
+class DetectorQuotaResponse(BaseModel):
+    period: str
+    detectors: dict[str, DetectorUsage]
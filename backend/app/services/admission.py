@@ -0,0 +1,259 @@
+"""Admission control for humanizer generations.
+
+Caps how many generations are in flight against vLLM. Callers beyond the cap
+wait in a bounded priority queue (interactive before batch). Requests that
+can't be served in time are shed early with ``AdmissionRejected``, which
+carries a Retry-After hint:
+
+- queue full: the caller is rejected, unless it is interactive and a batch
+  waiter can be evicted instead;
+- estimated wait (queue position x observed generation time) already past
+  the caller's deadline: rejected without queueing;
+- deadline reached while queued: rejected.
+
+Admission is per request, not per generation. ``admission_request()``
+opens a request scope (a context variable, so tasks spawned inside share
+it); the slot is taken at the vLLM call, below the output cache, so cache
+hits never queue. The request's deadline starts at its first generation and
+covers every generation queued before the request is first admitted. After
+that its later generations (retries, chunks) are never shed: they queue
+ahead of new requests, so GPU and detector work already spent isn't thrown
+away. Outside a scope, each generation is admitted on its own.
+
+The priority of the current request is a context variable too. Set it with
+``priority(Priority.batch)`` around batch work so that every generation in
+that task, including its chunks and retries, queues behind interactive
+traffic.
+"""
+
+import asyncio
+import contextlib
+import enum
+import heapq
+import itertools
+import math
+import time
+from contextvars import ContextVar
+
+import structlog
+
+logger = structlog.get_logger()
+
+
+class Priority(enum.IntEnum):
+    interactive = 0
+    batch = 1
+
+
+_current_priority: ContextVar[Priority] = ContextVar(
+    "humanize_priority", default=Priority.interactive
+)
+
+
+@contextlib.contextmanager
+def priority(value: Priority):
+    """Run the enclosed block (and tasks it spawns) at ``value`` priority."""
+    token = _current_priority.set(value)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+# Heap priority of generations from requests that were already admitted
+_CONTINUATION = -1
+
+
+class _RequestAdmission:
+    def __init__(self) -> None:
+        self.deadline: float | None = None
+        self.admitted = False
+
+
+_current_request: ContextVar[_RequestAdmission | None] = ContextVar(
+    "humanize_admission_request", default=None
+)
+
+
+@contextlib.contextmanager
+def admission_request():
+    """Admit the enclosed block (and tasks it spawns) as one request."""
+    token = _current_request.set(_RequestAdmission())
+    try:
+        yield
+    finally:
+        _current_request.reset(token)
+
+
+class AdmissionRejected(Exception):
+    """The humanizer is saturated; retry after ``retry_after`` seconds."""
+
+    def __init__(self, reason: str, retry_after: float, *, queue_full: bool = False):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+        self.queue_full = queue_full
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        *,
+        max_in_flight: int,
+        max_queue: int,
+        queue_timeout_seconds: dict[Priority, float],
+        initial_service_seconds: float = 5.0,
+    ) -> None:
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self._in_flight = 0
+        self._waiters: list[tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        # EWMA of how long one generation holds a slot
+        self._service_seconds = initial_service_seconds
+        self.admitted = 0
+        self.rejected = 0
+
+    def _queued(self) -> int:
+        return sum(1 for *_, f in self._waiters if not f.done())
+
+    def _ahead_of(self, prio: Priority) -> int:
+        return sum(1 for p, _, f in self._waiters if p <= prio and not f.done())
+
+    def _estimated_wait(self, position: int) -> float:
+        return position / self.max_in_flight * self._service_seconds
+
+    def _evict_batch_waiter(self) -> bool:
+        """Reject the most recently queued batch waiter to make room."""
+        candidates = [
+            w for w in self._waiters if w[0] == Priority.batch and not w[2].done()
+        ]
+        if not candidates:
+            return False
+        victim = max(candidates, key=lambda w: w[1])
+        self.rejected += 1
+        victim[2].set_exception(
+            AdmissionRejected(
+                "Evicted for interactive traffic",
+                self._estimated_wait(self._queued()),
+                queue_full=True,
+            )
+        )
+        return True
+
+    def _reject(self, reason: str, retry_after: float, **kwargs) -> AdmissionRejected:
+        self.rejected += 1
+        logger.warning("Humanize request shed", reason=reason, retry_after=retry_after)
+        return AdmissionRejected(reason, retry_after, **kwargs)
+
+    async def acquire(self) -> None:
+        request = _current_request.get()
+        if request is not None and request.admitted:
+            await self._acquire_continuation()
+            return
+
+        prio = _current_priority.get()
+        loop = asyncio.get_running_loop()
+        if request is not None and request.deadline is None:
+            request.deadline = loop.time() + self.queue_timeout_seconds[prio]
+
+        if self._in_flight < self.max_in_flight and not self._queued():
+            self._in_flight += 1
+            self._admit(request)
+            return
+
+        if request is not None:
+            timeout = request.deadline - loop.time()
+            if timeout <= 0:
+                raise self._reject(
+                    "Timed out waiting for a humanizer slot", self._service_seconds
+                )
+        else:
+            timeout = self.queue_timeout_seconds[prio]
+        if self._queued() >= self.max_queue and not (
+            prio == Priority.interactive and self._evict_batch_waiter()
+        ):
+            raise self._reject(
+                "Humanize queue is full",
+                self._estimated_wait(self._queued()),
+                queue_full=True,
+            )
+
+        estimate = self._estimated_wait(self._ahead_of(prio) + 1)
+        if estimate > timeout:
+            raise self._reject("Estimated queue wait exceeds deadline", estimate)
+
+        future = loop.create_future()
+        heapq.heappush(self._waiters, (prio, next(self._seq), future))
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            raise self._reject("Timed out waiting for a humanizer slot", estimate) from None
+        except BaseException:
+            self._pass_on(future)
+            raise
+        finally:
+            self._prune()
+        self._admit(request)
+
+    async def _acquire_continuation(self) -> None:
+        """Take a slot for an admitted request: ahead of the queue, never shed."""
+        if self._in_flight < self.max_in_flight and not self._queued():
+            self._in_flight += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (_CONTINUATION, next(self._seq), future))
+        try:
+            await future
+        except BaseException:
+            self._pass_on(future)
+            raise
+        finally:
+            self._prune()
+
+    def _admit(self, request: _RequestAdmission | None) -> None:
+        self.admitted += 1
+        if request is not None:
+            request.admitted = True
+
+    def _pass_on(self, future: asyncio.Future) -> None:
+        # Handed a slot just as we were cancelled: pass it on
+        if future.done() and not future.cancelled() and future.exception() is None:
+            self.release()
+
+    def release(self) -> None:
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                # The slot transfers directly to the waiter
+                future.set_result(None)
+                return
+        self._in_flight -= 1
+
+    def _prune(self) -> None:
+        if any(f.done() for *_, f in self._waiters):
+            self._waiters = [w for w in self._waiters if not w[2].done()]
+            heapq.heapify(self._waiters)
+
+    @contextlib.asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - start
+            self._service_seconds = 0.8 * self._service_seconds + 0.2 * elapsed
+            self.release()
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self._in_flight,
+            "max_in_flight": self.max_in_flight,
+            "queued": self._queued(),
+            "max_queue": self.max_queue,
+            "service_seconds_ewma": round(self._service_seconds, 3),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,55 @@
+"""Builders for the services the API and the job worker both run.
+
+``app.main`` and ``app.worker`` construct these from the same settings, so
+a process that humanizes or detects behaves the same whichever entry point
+started it.
+"""
+
+from app.config import settings
+from app.services.cache import TieredCache
+from app.services.detectors.limits import DetectorQuota
+from app.services.detectors.registry import DetectorRegistry
+from app.services.humanize_cache import HumanizeCache
+
+
+def build_humanize_cache() -> HumanizeCache | None:
+    """Humanization result cache, or None unless HUMANIZE_CACHE_ENABLED."""
+    if not settings.HUMANIZE_CACHE_ENABLED:
+        return None
+
+    from app.services.humanizer import PROMPT_TEMPLATE_VERSION
+
+    return HumanizeCache(
+        TieredCache(
+            namespace="humcache",
+            max_entries=settings.HUMANIZE_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.HUMANIZE_CACHE_TTL_SECONDS,
+            use_redis=settings.HUMANIZE_CACHE_USE_REDIS,
+        ),
+        model_name=settings.HUMANIZER_MODEL_NAME,
+        prompt_version=PROMPT_TEMPLATE_VERSION,
+        max_output_temperature=settings.HUMANIZE_CACHE_MAX_OUTPUT_TEMPERATURE,
+    )
+
+
+def build_detector_cache() -> TieredCache | None:
+    """Detector result cache, or None unless DETECTOR_CACHE_ENABLED."""
+    if not settings.DETECTOR_CACHE_ENABLED:
+        return None
+    return TieredCache(
+        namespace="detcache",
+        max_entries=settings.DETECTOR_CACHE_MAX_ENTRIES,
+        ttl_seconds=settings.DETECTOR_CACHE_TTL_SECONDS,
+        use_redis=settings.DETECTOR_CACHE_USE_REDIS,
+    )
+
+
+def build_detector_quota() -> DetectorQuota:
+    return DetectorQuota(use_redis=settings.DETECTOR_RATE_LIMIT_USE_REDIS)
+
+
+def build_detector_registry(
+    *, result_cache: TieredCache | None, quota: DetectorQuota
+) -> DetectorRegistry:
+    """Every configured detector, with rate limits, breakers, hedging and cache."""
+    return DetectorRegistry.register_defaults(result_cache=result_cache, quota=quota)
@@ -0,0 +1,102 @@
+"""Two-tier cache: an in-process LRU in front of an optional Redis tier.
+
+Values must be JSON-serializable. Every entry carries a TTL in both tiers.
+The Redis tier is best-effort: if Redis is not initialized or a command
+fails, the cache silently behaves as local-only.
+"""
+
+import json
+import time
+from collections import OrderedDict
+from typing import Any
+
+import structlog
+
+from app.db.redis import get_redis
+
+logger = structlog.get_logger()
+
+
+class TieredCache:
+    def __init__(
+        self,
+        *,
+        namespace: str,
+        max_entries: int,
+        ttl_seconds: int,
+        use_redis: bool = False,
+    ) -> None:
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.use_redis = use_redis
+        self._local: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._hits_local = 0
+        self._hits_redis = 0
+        self._misses = 0
+
+    def _redis_key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def _get_local(self, key: str) -> Any | None:
+        entry = self._local.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self._local[key]
+            return None
+        self._local.move_to_end(key)
+        return value
+
+    def _set_local(self, key: str, value: Any) -> None:
+        self._local[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+
+    async def get(self, key: str) -> Any | None:
+        """Return the cached value for ``key`` or None on a miss."""
+        value = self._get_local(key)
+        if value is not None:
+            self._hits_local += 1
+            return value
+
+        if self.use_redis:
+            try:
+                raw = await get_redis().get(self._redis_key(key))
+            except Exception as exc:
+                logger.debug("Cache Redis read failed", namespace=self.namespace, error=str(exc))
+                raw = None
+            if raw is not None:
+                value = json.loads(raw)
+                self._set_local(key, value)
+                self._hits_redis += 1
+                return value
+
+        self._misses += 1
+        return None
+
+    async def set(self, key: str, value: Any) -> None:
+        """Store ``value`` in both tiers."""
+        self._set_local(key, value)
+        if self.use_redis:
+            try:
+                await get_redis().set(
+                    self._redis_key(key), json.dumps(value), ex=self.ttl_seconds
+                )
+            except Exception as exc:
+                logger.debug("Cache Redis write failed", namespace=self.namespace, error=str(exc))
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current local size."""
+        lookups = self._hits_local + self._hits_redis + self._misses
+        hits = self._hits_local + self._hits_redis
+        return {
+            "size": len(self._local),
+            "max_entries": self.max_entries,
+            "hits_local": self._hits_local,
+            "hits_redis": self._hits_redis,
+            "misses": self._misses,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+        }
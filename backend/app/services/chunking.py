@@ -0,0 +1,144 @@
+"""Paragraph-level chunking and parallel humanization of long inputs.
+
+Long inputs are split at paragraph, then line, then sentence boundaries into
+segments of at most ``max_chunk_tokens`` (estimated), humanized
+concurrently, and reassembled in order. Leading whitespace, list markers and
+trailing whitespace/separators of every chunk are kept verbatim, so
+paragraph breaks and list structure survive regardless of what the model
+does at the edges of a chunk.
+"""
+
+import asyncio
+import re
+from dataclasses import dataclass
+
+# Paragraph breaks, then single line breaks, then sentence ends. Each pattern
+# has one capturing group so re.split keeps the separators.
+_SPLIT_PATTERNS = (
+    re.compile(r"(\n[ \t]*\n\s*)"),
+    re.compile(r"(\n)"),
+    re.compile(r"(?<=[.!?])(\s+)"),
+)
+_PREFIX = re.compile(r"^\s*(?:(?:[-*•]|\d+[.)])\s+)?")
+_SUFFIX = re.compile(r"\s*$")
+
+# Rough average for English text with BPE tokenizers
+_CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate used to size chunks (no tokenizer round trip)."""
+    return -(-len(text) // _CHARS_PER_TOKEN)
+
+
+@dataclass
+class Chunk:
+    text: str
+    prefix: str = ""
+    suffix: str = ""
+
+
+def _split_units(text: str, max_tokens: int, level: int = 0) -> list[str]:
+    """Split ``text`` into units that each end with their own separator."""
+    if estimate_tokens(text) <= max_tokens or level >= len(_SPLIT_PATTERNS):
+        return [text]
+
+    pieces = _SPLIT_PATTERNS[level].split(text)
+    units: list[str] = []
+    for i in range(0, len(pieces), 2):
+        content = pieces[i]
+        separator = pieces[i + 1] if i + 1 < len(pieces) else ""
+        sub_units = _split_units(content, max_tokens, level + 1)
+        sub_units[-1] += separator
+        units.extend(sub_units)
+    return [u for u in units if u]
+
+
+def split_into_chunks(text: str, max_chunk_tokens: int) -> list[Chunk]:
+    """Split text into token-bounded chunks that reassemble to the original."""
+    chunks: list[Chunk] = []
+    current = ""
+    for unit in _split_units(text, max_chunk_tokens):
+        if current and estimate_tokens(current + unit) > max_chunk_tokens:
+            chunks.append(_make_chunk(current))
+            current = ""
+        current += unit
+    if current:
+        chunks.append(_make_chunk(current))
+    return chunks
+
+
+def _make_chunk(raw: str) -> Chunk:
+    prefix = _PREFIX.match(raw).group(0)
+    rest = raw[len(prefix):]
+    suffix = _SUFFIX.search(rest).group(0)
+    return Chunk(text=rest[: len(rest) - len(suffix)], prefix=prefix, suffix=suffix)
+
+
+def reassemble(chunks: list[Chunk], outputs: list[str]) -> str:
+    """Join humanized chunk bodies back with their original edges."""
+    return "".join(
+        chunk.prefix + output.strip() + chunk.suffix
+        for chunk, output in zip(chunks, outputs)
+    )
+
+
+class ChunkedHumanizer:
+    """Humanizer adapter that fans long inputs out across chunks.
+
+    Exposes the same ``humanize`` / ``humanize_many`` interface as
+    HumanizerService, so the detector-gate loop can use it unchanged. Inputs
+    that fit in one chunk go straight to the wrapped humanizer.
+    """
+
+    def __init__(self, inner, *, max_chunk_tokens: int, max_concurrency: int) -> None:
+        self.inner = inner
+        self.max_chunk_tokens = max_chunk_tokens
+        self.max_concurrency = max_concurrency
+
+    async def _map_chunks(self, chunks: list[Chunk], call) -> list:
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(chunk: Chunk):
+            if not chunk.text:
+                return None
+            async with semaphore:
+                return await call(chunk.text)
+
+        return await asyncio.gather(*(run(c) for c in chunks))
+
+    async def humanize(self, text: str, temperature: float, max_tokens: int) -> str:
+        chunks = split_into_chunks(text, self.max_chunk_tokens)
+        if len(chunks) <= 1:
+            return await self.inner.humanize(
+                text=text, temperature=temperature, max_tokens=max_tokens
+            )
+
+        outputs = await self._map_chunks(
+            chunks,
+            lambda chunk_text: self.inner.humanize(
+                text=chunk_text, temperature=temperature, max_tokens=max_tokens
+            ),
+        )
+        return reassemble(chunks, [o or "" for o in outputs])
+
+    async def humanize_many(
+        self, text: str, n: int, temperature: float, max_tokens: int
+    ) -> list[str]:
+        chunks = split_into_chunks(text, self.max_chunk_tokens)
+        if len(chunks) <= 1:
+            return await self.inner.humanize_many(
+                text=text, n=n, temperature=temperature, max_tokens=max_tokens
+            )
+
+        per_chunk = await self._map_chunks(
+            chunks,
+            lambda chunk_text: self.inner.humanize_many(
+                text=chunk_text, n=n, temperature=temperature, max_tokens=max_tokens
+            ),
+        )
+        candidates = min((len(o) for o in per_chunk if o is not None), default=0)
+        return [
+            reassemble(chunks, [o[j] if o is not None else "" for o in per_chunk])
+            for j in range(candidates)
+        ]
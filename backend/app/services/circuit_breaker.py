@@ -0,0 +1,184 @@
+"""Per-dependency circuit breakers (vLLM replicas, each detector).
+
+A breaker watches a rolling window of recent calls. It opens when, over at
+least ``min_calls`` calls, the error rate or the slow-call rate crosses its
+threshold. While open, calls fail immediately with ``CircuitOpenError``
+instead of waiting for a timeout. After ``open_seconds`` it goes half-open
+and lets ``half_open_max_calls`` trial calls through: one success closes it,
+one failure opens it again.
+
+Breakers are process-wide and looked up by name with ``get_breaker``
+(``"humanizer:<base_url>"``, ``"detector:<name>"``).
+"""
+
+import enum
+import math
+import time
+from collections import deque
+from collections.abc import Callable
+
+import structlog
+
+from app.config import settings
+
+logger = structlog.get_logger()
+
+
+class CircuitState(str, enum.Enum):
+    closed = "closed"
+    open = "open"
+    half_open = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """The dependency's breaker is open; the call was not attempted."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} circuit open; retry in {math.ceil(retry_after)}s")
+        self.name = name
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        *,
+        window_seconds: float,
+        min_calls: int,
+        error_rate_threshold: float,
+        slow_call_seconds: float,
+        slow_call_rate_threshold: float,
+        open_seconds: float,
+        half_open_max_calls: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.error_rate_threshold = error_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self._clock = clock
+        self._state = CircuitState.closed
+        self._opened_at = 0.0
+        self._trial_calls = 0
+        # (timestamp, failed, slow)
+        self._calls: deque[tuple[float, bool, bool]] = deque()
+
+    @property
+    def state(self) -> CircuitState:
+        if (
+            self._state == CircuitState.open
+            and self._clock() - self._opened_at >= self.open_seconds
+        ):
+            self._state = CircuitState.half_open
+            self._trial_calls = 0
+        return self._state
+
+    def is_open(self) -> bool:
+        return self.state == CircuitState.open
+
+    def reopens_in(self) -> float:
+        """Seconds until an open breaker lets trial calls through (0 if not open)."""
+        if not self.is_open():
+            return 0.0
+        return self.open_seconds - (self._clock() - self._opened_at)
+
+    def allow(self) -> None:
+        """Raise CircuitOpenError unless a call may go ahead now."""
+        state = self.state
+        if state == CircuitState.open:
+            raise CircuitOpenError(self.name, self.reopens_in())
+        if state == CircuitState.half_open:
+            if self._trial_calls >= self.half_open_max_calls:
+                raise CircuitOpenError(self.name, 1)
+            self._trial_calls += 1
+
+    def record(self, *, ok: bool, duration: float) -> None:
+        """Record the outcome of a call that ``allow`` let through."""
+        slow = duration >= self.slow_call_seconds
+        if self._state == CircuitState.half_open:
+            self._trial_calls = max(0, self._trial_calls - 1)
+            if ok and not slow:
+                self._close()
+            else:
+                self._open()
+            return
+
+        now = self._clock()
+        self._calls.append((now, not ok, slow))
+        while self._calls and now - self._calls[0][0] > self.window_seconds:
+            self._calls.popleft()
+
+        if self._state == CircuitState.closed and len(self._calls) >= self.min_calls:
+            total = len(self._calls)
+            error_rate = sum(c[1] for c in self._calls) / total
+            slow_rate = sum(c[2] for c in self._calls) / total
+            if (
+                error_rate >= self.error_rate_threshold
+                or slow_rate >= self.slow_call_rate_threshold
+            ):
+                self._open()
+
+    def release(self) -> None:
+        """Give back a half-open trial slot for a call that was abandoned."""
+        if self._state == CircuitState.half_open:
+            self._trial_calls = max(0, self._trial_calls - 1)
+
+    def _open(self) -> None:
+        self._state = CircuitState.open
+        self._opened_at = self._clock()
+        self._calls.clear()
+        logger.warning("Circuit opened", breaker=self.name)
+
+    def _close(self) -> None:
+        self._state = CircuitState.closed
+        self._calls.clear()
+        logger.info("Circuit closed", breaker=self.name)
+
+    def stats(self) -> dict:
+        total = len(self._calls)
+        return {
+            "state": self.state.value,
+            "calls_in_window": total,
+            "error_rate": sum(c[1] for c in self._calls) / total if total else 0.0,
+            "slow_rate": sum(c[2] for c in self._calls) / total if total else 0.0,
+        }
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Return the process-wide breaker for ``name``, creating it from settings."""
+    breaker = _breakers.get(name)
+    if breaker is None:
+        breaker = CircuitBreaker(
+            name,
+            window_seconds=settings.CIRCUIT_WINDOW_SECONDS,
+            min_calls=settings.CIRCUIT_MIN_CALLS,
+            error_rate_threshold=settings.CIRCUIT_ERROR_RATE_THRESHOLD,
+            slow_call_seconds=settings.CIRCUIT_SLOW_CALL_SECONDS,
+            slow_call_rate_threshold=settings.CIRCUIT_SLOW_CALL_RATE_THRESHOLD,
+            open_seconds=settings.CIRCUIT_OPEN_SECONDS,
+            half_open_max_calls=settings.CIRCUIT_HALF_OPEN_MAX_CALLS,
+        )
+        _breakers[name] = breaker
+    return breaker
+
+
+def breaker_states() -> dict[str, str]:
+    return {name: b.state.value for name, b in sorted(_breakers.items())}
+
+
+def reset_breakers() -> None:
+    _breakers.clear()
+
+
+def circuit_open(name: str) -> bool:
+    """True if ``name`` has a breaker and it is currently open."""
+    breaker = _breakers.get(name)
+    return breaker is not None and breaker.is_open()
@@ -0,0 +1,51 @@
+"""Content-addressed caching wrapper for detectors.
+
+Results are keyed by (detector name, SHA-256 of the normalized text). Only
+successful results from this detector are cached, so transient API errors
+are retried on the next call.
+"""
+
+import hashlib
+import unicodedata
+
+import httpx
+
+from app.models.schemas import DetectorResult
+from app.services.cache import TieredCache
+from app.services.detectors.base import BaseDetector
+
+
+def detector_cache_key(detector_name: str, text: str) -> str:
+    """Cache key for a detector/text pair (NFC-normalized, trimmed)."""
+    normalized = unicodedata.normalize("NFC", text).strip()
+    digest = hashlib.sha256(normalized.encode()).hexdigest()
+    return f"{detector_name}:{digest}"
+
+
+class CachedDetector(BaseDetector):
+    """Wraps another detector and serves repeated texts from a cache."""
+
+    def __init__(self, inner: BaseDetector, cache: TieredCache) -> None:
+        self.inner = inner
+        self.cache = cache
+        self.name = inner.name
+        self.display_name = inner.display_name
+        self.description = inner.description
+
+    def is_available(self) -> bool:
+        return self.inner.is_available()
+
+    async def detect(self, client: httpx.AsyncClient, text: str) -> DetectorResult:
+        key = detector_cache_key(self.name, text)
+        cached = await self.cache.get(key)
+        if cached is not None:
+            return DetectorResult.model_validate(cached)
+
+        result = await self.inner.detect(client, text)
+        if (
+            result.error is None
+            and result.score is not None
+            and result.detector == self.name
+        ):
+            await self.cache.set(key, result.model_dump())
+        return result
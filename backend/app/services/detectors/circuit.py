@@ -0,0 +1,81 @@
+"""Circuit-breaker wrapper for detectors.
+
+Only failures that say something about the provider count against it:
+transport errors, timeouts, 429 and 5xx responses. Most providers report
+these as a result with ``error`` set (HTTP errors carry ``status_code`` in
+``details``) rather than raising. Input errors such as 400, 413 or 422 are
+recorded as successful calls, and other exceptions (e.g. quota exceeded)
+are not recorded at all. While the breaker is open, ``detect`` raises
+CircuitOpenError without touching the network.
+"""
+
+import asyncio
+import time
+
+import httpx
+
+from app.models.schemas import DetectorResult
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.detectors.base import BaseDetector
+from app.services.detectors.limits import track_provider_call
+
+
+def _is_failure_status(status_code: int) -> bool:
+    return status_code == 429 or status_code >= 500
+
+
+def _is_failed_result(result: DetectorResult) -> bool:
+    if result.error is None:
+        return False
+    status_code = (result.details or {}).get("status_code")
+    # No status: the request never got a response (transport error, timeout)
+    return status_code is None or _is_failure_status(status_code)
+
+
+def _is_failed_call(exc: Exception) -> bool | None:
+    """Whether a raised exception counts as a failure; None if it says nothing."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return _is_failure_status(exc.response.status_code)
+    if isinstance(exc, (httpx.TransportError, asyncio.TimeoutError)):
+        return True
+    return None
+
+
+class CircuitBreakerDetector(BaseDetector):
+    def __init__(self, inner: BaseDetector, breaker: CircuitBreaker) -> None:
+        self.inner = inner
+        self.breaker = breaker
+        self.name = inner.name
+        self.display_name = inner.display_name
+        self.description = inner.description
+
+    def is_available(self) -> bool:
+        return self.inner.is_available()
+
+    async def detect(self, client: httpx.AsyncClient, text: str) -> DetectorResult:
+        self.breaker.allow()
+        start = time.monotonic()
+        with track_provider_call() as call:
+            try:
+                result = await self.inner.detect(client, text)
+            except asyncio.CancelledError:
+                # Cancelled by a caller's timeout counts as slow; anything else
+                # (e.g. a sibling attempt passed) says nothing about the provider
+                duration = time.monotonic() - call.start_or(start)
+                if duration >= self.breaker.slow_call_seconds:
+                    self.breaker.record(ok=False, duration=duration)
+                else:
+                    self.breaker.release()
+                raise
+            except Exception as exc:
+                failed = _is_failed_call(exc)
+                if failed is None:
+                    self.breaker.release()
+                else:
+                    duration = time.monotonic() - call.start_or(start)
+                    self.breaker.record(ok=not failed, duration=duration)
+                raise
+        # Rate-limit pacing is excluded from the call's duration
+        duration = time.monotonic() - call.start_or(start)
+        self.breaker.record(ok=not _is_failed_result(result), duration=duration)
+        return result
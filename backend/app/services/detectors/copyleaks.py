@@ -1,3 +1,9 @@
+import asyncio
+import json
+import time
+from datetime import datetime
+from typing import Awaitable, Callable
+
 import structlog
 import httpx
 
@@ -10,17 +16,124 @@ logger = structlog.get_logger()
 COPYLEAKS_AUTH_URL = "https://id.copyleaks.com/v3/account/login/api"
 COPYLEAKS_SCAN_URL = "https://api.copyleaks.com/v2/writer-detector/{scan_id}/check"
 
+# Copyleaks access tokens are valid for 48 hours
+COPYLEAKS_TOKEN_DEFAULT_LIFETIME_SECONDS = 48 * 3600
+COPYLEAKS_TOKEN_REDIS_KEY = "copyleaks:access_token"
+
+
+class _AccessTokenCache:
+    """Holds the Copyleaks access token until shortly before it expires.
+
+    Within ``refresh_margin`` seconds of expiry the current token is still
+    served while a single background refresh runs. Logins are serialized by
+    a lock so concurrent detects never stampede the login endpoint. When
+    Redis is available the token is shared across workers; a token rejected
+    with 401 is remembered so it isn't picked up again from Redis.
+    """
+
+    def __init__(self) -> None:
+        self._token: str | None = None
+        self._expires_at = 0.0
+        self._revoked: str | None = None
+        self._lock = asyncio.Lock()
+        self._refresh_task: asyncio.Task | None = None
+
+    def _is_fresh(self, now: float) -> bool:
+        return (
+            self._token is not None
+            and now < self._expires_at - settings.COPYLEAKS_TOKEN_REFRESH_MARGIN_SECONDS
+        )
+
+    def invalidate(self, token: str) -> None:
+        """Forget ``token`` after the API rejected it; the next call logs in."""
+        self._revoked = token
+        if self._token == token:
+            self._token = None
+            self._expires_at = 0.0
+
+    async def get(self, login: Callable[[], Awaitable[tuple[str, float]]]) -> str:
+        now = time.time()
+        if self._is_fresh(now):
+            return self._token
+        if self._token is not None and now < self._expires_at:
+            # Still valid but close to expiry: refresh in the background
+            if self._refresh_task is None or self._refresh_task.done():
+                self._refresh_task = asyncio.create_task(self._background_refresh(login))
+            return self._token
+        return await self._refresh(login)
+
+    async def _background_refresh(self, login) -> None:
+        try:
+            await self._refresh(login)
+        except Exception as exc:
+            logger.warning("Copyleaks background token refresh failed", error=str(exc))
+
+    async def _refresh(self, login) -> str:
+        async with self._lock:
+            if self._is_fresh(time.time()):
+                return self._token
+
+            shared = await self._read_shared()
+            # Another worker may not have replaced a revoked token yet
+            if shared is not None and shared[0] != self._revoked:
+                self._token, self._expires_at = shared
+                if self._is_fresh(time.time()):
+                    return self._token
+
+            token, expires_at = await login()
+            self._token, self._expires_at = token, expires_at
+            await self._write_shared(token, expires_at)
+            return token
+
+    async def _read_shared(self) -> tuple[str, float] | None:
+        if not settings.COPYLEAKS_TOKEN_SHARE_VIA_REDIS:
+            return None
+        try:
+            from app.db.redis import get_redis
+
+            raw = await get_redis().get(COPYLEAKS_TOKEN_REDIS_KEY)
+        except Exception:
+            return None
+        if raw is None:
+            return None
+        data = json.loads(raw)
+        return data["access_token"], float(data["expires_at"])
+
+    async def _write_shared(self, token: str, expires_at: float) -> None:
+        if not settings.COPYLEAKS_TOKEN_SHARE_VIA_REDIS:
+            return
+        ttl = int(expires_at - time.time())
+        if ttl <= 0:
+            return
+        try:
+            from app.db.redis import get_redis
+
+            await get_redis().set(
+                COPYLEAKS_TOKEN_REDIS_KEY,
+                json.dumps({"access_token": token, "expires_at": expires_at}),
+                ex=ttl,
+            )
+        except Exception as exc:
+            logger.debug("Could not share Copyleaks token via Redis", error=str(exc))
+
 
 class CopyleaksDetector(BaseDetector):
     name = "copyleaks"
     display_name = "Copyleaks"
     description = "Copyleaks AI content detector"
 
+    def __init__(self) -> None:
+        self._token_cache = _AccessTokenCache()
+
     def is_available(self) -> bool:
         return bool(settings.COPYLEAKS_API_KEY)
 
     async def _authenticate(self, client: httpx.AsyncClient) -> str:
-        """Authenticate with Copyleaks and return an access token."""
+        """Return a cached access token, logging in only when needed."""
+        return await self._token_cache.get(lambda: self._login(client))
+
+    async def _login(self, client: httpx.AsyncClient) -> tuple[str, float]:
+        """Log in to Copyleaks and return (access_token, expires_at epoch)."""
         # COPYLEAKS_API_KEY is expected as "email:api_key"
         parts = settings.COPYLEAKS_API_KEY.split(":", 1)
         if len(parts) != 2:
@@ -34,9 +147,20 @@ class CopyleaksDetector(BaseDetector):
         )
         response.raise_for_status()
         data = response.json()
-        return data["access_token"]
+
+        expires_at = time.time() + COPYLEAKS_TOKEN_DEFAULT_LIFETIME_SECONDS
+        if data.get(".expires"):
+            try:
+                expires_at = datetime.fromisoformat(
+                    data[".expires"].replace("Z", "+00:00")
+                ).timestamp()
+            except ValueError:
+                pass
+        logger.info("Copyleaks access token obtained")
+        return data["access_token"], expires_at
 
     async def detect(self, client: httpx.AsyncClient, text: str) -> DetectorResult:
+        access_token = None
         try:
             access_token = await self._authenticate(client)
 
@@ -71,12 +195,14 @@ class CopyleaksDetector(BaseDetector):
                 error=None,
             )
         except httpx.HTTPStatusError as exc:
+            if exc.response.status_code == 401 and access_token is not None:
+                self._token_cache.invalidate(access_token)
             logger.error("Copyleaks API error", status=exc.response.status_code)
             return DetectorResult(
                 detector=self.name,
                 score=None,
                 label=None,
-                details=None,
+                details={"status_code": exc.response.status_code},
                 error=f"Copyleaks API returned {exc.response.status_code}",
             )
         except Exception as exc:
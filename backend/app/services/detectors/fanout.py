@@ -0,0 +1,136 @@
+"""Run one text across several detectors with partial-success semantics.
+
+Shared by /api/detect, the batch endpoint and the job worker. Concurrent
+identical (detector, text) scans are coalesced into one call.
+"""
+
+import asyncio
+from collections.abc import AsyncIterator
+
+import httpx
+import structlog
+
+from app.models.schemas import DetectorResult
+from app.services.circuit_breaker import CircuitOpenError
+from app.services.detectors.base import BaseDetector
+from app.services.detectors.cache import detector_cache_key
+from app.services.detectors.registry import DetectorRegistry
+from app.services.rate_limit import RateLimitExceeded
+from app.services.single_flight import SingleFlight
+
+logger = structlog.get_logger()
+
+# Coalesces concurrent identical (detector, text) scans into one call
+_detect_flights = SingleFlight()
+
+
+class DetectorSelectionError(ValueError):
+    """Requested detectors are unknown, unavailable, or none are configured."""
+
+
+def select_detectors(
+    registry: DetectorRegistry, names: list[str] | None
+) -> list[BaseDetector]:
+    """Resolve requested detector names, defaulting to every available one."""
+    if names:
+        detectors = []
+        for name in names:
+            detector = registry.get(name)
+            if detector is None:
+                raise DetectorSelectionError(f"Unknown detector: {name}")
+            if not detector.is_available():
+                raise DetectorSelectionError(f"Detector not available: {name}")
+            detectors.append(detector)
+    else:
+        detectors = registry.get_available()
+
+    if not detectors:
+        raise DetectorSelectionError(
+            "No detectors available. Configure at least one detector API key."
+        )
+    return detectors
+
+
+def to_detector_result(detector: BaseDetector, raw) -> DetectorResult:
+    """Convert a gather() outcome into a DetectorResult (exceptions → error)."""
+    if isinstance(raw, (CircuitOpenError, RateLimitExceeded)):
+        return DetectorResult(
+            detector=detector.name,
+            score=None,
+            label=None,
+            details=None,
+            error=str(raw),
+        )
+    if isinstance(raw, BaseException):
+        logger.error(
+            "Detector raised unexpected exception",
+            detector=detector.name,
+            error=str(raw),
+        )
+        return DetectorResult(
+            detector=detector.name,
+            score=None,
+            label=None,
+            details=None,
+            error=f"Unexpected error: {str(raw)}",
+        )
+    return raw
+
+
+async def detect_coalesced(
+    detector: BaseDetector, client: httpx.AsyncClient, text: str
+) -> DetectorResult:
+    """``detector.detect`` with concurrent identical calls sharing one scan."""
+    return await _detect_flights.do(
+        detector_cache_key(detector.name, text),
+        lambda: detector.detect(client, text),
+    )
+
+
+async def run_detectors(
+    detectors: list[BaseDetector], client: httpx.AsyncClient, text: str
+) -> list[DetectorResult]:
+    """Score ``text`` with every detector concurrently; never raises per detector."""
+    raw_results = await asyncio.gather(
+        *(detect_coalesced(d, client, text) for d in detectors),
+        return_exceptions=True,
+    )
+    return [to_detector_result(d, r) for d, r in zip(detectors, raw_results)]
+
+
+async def detect_matrix(
+    detectors: list[BaseDetector],
+    client: httpx.AsyncClient,
+    texts: list[str],
+    *,
+    per_detector_concurrency: int,
+) -> AsyncIterator[tuple[int, DetectorResult]]:
+    """Score every (text, detector) pair, yielding ``(text_index, result)`` as each finishes.
+
+    Each detector gets its own concurrency cap so one slow or rate-limited
+    provider can't starve the others. Outstanding calls are cancelled if
+    the consumer stops iterating.
+    """
+    semaphores = {
+        d.name: asyncio.Semaphore(per_detector_concurrency) for d in detectors
+    }
+
+    async def score(index: int, detector: BaseDetector, text: str):
+        async with semaphores[detector.name]:
+            try:
+                raw = await detect_coalesced(detector, client, text)
+            except Exception as exc:
+                raw = exc
+        return index, to_detector_result(detector, raw)
+
+    tasks = [
+        asyncio.create_task(score(i, d, text))
+        for i, text in enumerate(texts)
+        for d in detectors
+    ]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            yield await finished
+    finally:
+        for task in tasks:
+            task.cancel()
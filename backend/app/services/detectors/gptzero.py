@@ -32,7 +32,8 @@ class GPTZeroDetector(BaseDetector):
             response.raise_for_status()
             data = response.json()
 
-            score = data["documents"][0]["completely_generated_prob"]
+            document = data["documents"][0]
+            score = document["completely_generated_prob"]
             label = "ai" if score > 0.5 else "human"
 
             return DetectorResult(
@@ -41,7 +42,14 @@ class GPTZeroDetector(BaseDetector):
                 label=label,
                 details={
                     "completely_generated_prob": score,
-                    "class_probabilities": data["documents"][0].get("class_probabilities"),
+                    "class_probabilities": document.get("class_probabilities"),
+                    "sentences": [
+                        {
+                            "sentence": s.get("sentence"),
+                            "generated_prob": s.get("generated_prob"),
+                        }
+                        for s in document.get("sentences") or []
+                    ],
                 },
                 error=None,
             )
@@ -51,7 +59,7 @@ class GPTZeroDetector(BaseDetector):
                 detector=self.name,
                 score=None,
                 label=None,
-                details=None,
+                details={"status_code": exc.response.status_code},
                 error=f"GPTZero API returned {exc.response.status_code}",
             )
         except Exception as exc:
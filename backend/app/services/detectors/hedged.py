@@ -0,0 +1,131 @@
+"""Hedged detector calls to cut tail latency.
+
+If a call hasn't returned by the detector's observed latency quantile
+(p90 by default), a duplicate request is issued to the same detector.
+Whichever returns a usable result first wins and the other is cancelled.
+Hedges never go to a different detector: its result would be cached,
+reported and scored under this detector's name. Hedges are capped at
+``budget_ratio`` of calls, so a detector that is slow across the board
+costs at most that fraction of extra requests. Latency is measured from
+when the call reaches the provider, after any rate-limit pacing.
+"""
+
+import asyncio
+import math
+import time
+from collections import deque
+
+import httpx
+import structlog
+
+from app.models.schemas import DetectorResult
+from app.services.detectors.base import BaseDetector
+from app.services.detectors.limits import ProviderCall, track_provider_call
+
+logger = structlog.get_logger()
+
+
+def _usable(task: asyncio.Task) -> bool:
+    if task.cancelled() or task.exception() is not None:
+        return False
+    result = task.result()
+    return result.error is None and result.score is not None
+
+
+class HedgedDetector(BaseDetector):
+    def __init__(
+        self,
+        inner: BaseDetector,
+        *,
+        quantile: float = 0.9,
+        budget_ratio: float = 0.1,
+        min_samples: int = 20,
+        initial_delay_seconds: float = 5.0,
+        window: int = 200,
+    ) -> None:
+        self.inner = inner
+        self.name = inner.name
+        self.display_name = inner.display_name
+        self.description = inner.description
+        self.quantile = quantile
+        self.budget_ratio = budget_ratio
+        self.min_samples = min_samples
+        self.initial_delay_seconds = initial_delay_seconds
+        self._latencies: deque[float] = deque(maxlen=window)
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def is_available(self) -> bool:
+        return self.inner.is_available()
+
+    def hedge_delay(self) -> float:
+        """Seconds to wait on the primary call before hedging."""
+        if len(self._latencies) < self.min_samples:
+            return self.initial_delay_seconds
+        ordered = sorted(self._latencies)
+        index = min(len(ordered) - 1, math.ceil(self.quantile * len(ordered)) - 1)
+        return ordered[index]
+
+    async def _timed(
+        self, client: httpx.AsyncClient, text: str, call: ProviderCall
+    ) -> DetectorResult:
+        start = time.monotonic()
+        result = await self.inner.detect(client, text)
+        if result.error is None:
+            self._latencies.append(time.monotonic() - call.start_or(start))
+        return result
+
+    async def _wait_hedge_delay(self, primary: asyncio.Task, call: ProviderCall) -> bool:
+        """Wait until the primary's provider call is ``hedge_delay`` old; True if it finished.
+
+        The clock starts when the call is due to reach the provider, so time
+        spent queued behind a rate limiter never triggers a hedge.
+        """
+        delay = self.hedge_delay()
+        start = time.monotonic()
+        while True:
+            remaining = call.start_or(start) + delay - time.monotonic()
+            if remaining <= 0:
+                return False
+            done, _ = await asyncio.wait({primary}, timeout=remaining)
+            if done:
+                return True
+
+    async def detect(self, client: httpx.AsyncClient, text: str) -> DetectorResult:
+        self.calls += 1
+        with track_provider_call() as call:
+            primary = asyncio.create_task(self._timed(client, text, call))
+        try:
+            finished = await self._wait_hedge_delay(primary, call)
+            if finished or self.hedges >= self.budget_ratio * self.calls:
+                return await primary
+
+            self.hedges += 1
+            logger.info("Hedging detector call", detector=self.name)
+            hedge = asyncio.create_task(self.inner.detect(client, text))
+            try:
+                pending = {primary, hedge}
+                while pending:
+                    done, pending = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for task in done:
+                        if _usable(task):
+                            if task is hedge:
+                                self.hedge_wins += 1
+                            return task.result()
+                # Neither produced a score; report the primary's outcome
+                return await primary
+            finally:
+                hedge.cancel()
+        finally:
+            primary.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "hedge_delay_seconds": round(self.hedge_delay(), 3),
+        }
@@ -0,0 +1,177 @@
+"""Provider rate limits and monthly usage accounting for detectors.
+
+``RateLimitedDetector`` paces calls through a per-detector token bucket
+(failing fast with ``RateLimitExceeded`` when the wait would exceed the
+limiter's cap) and records each call that reaches the provider (count and
+characters) in ``DetectorQuota``. Usage is bucketed by calendar month (UTC), the period
+commercial detector plans are billed on. Counters live in Redis when it is
+available, so they are shared across processes, and in memory otherwise.
+
+Time spent waiting for a token is queueing, not provider latency. Wrappers
+that time detector calls (circuit breaker, hedging, the humanize loop's
+detector timeout) open a ``track_provider_call`` scope and measure from
+``ProviderCall.started_at``, which ``RateLimitedDetector`` sets to the
+moment the paced call is due to reach the provider.
+"""
+
+import asyncio
+import contextlib
+import time
+from collections.abc import Iterator
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+import httpx
+import structlog
+
+from app.db.redis import get_redis
+from app.models.schemas import DetectorResult
+from app.services.detectors.base import BaseDetector
+from app.services.rate_limit import TokenBucketLimiter
+
+logger = structlog.get_logger()
+
+# Counters outlive the month they belong to by a few weeks for reporting
+_QUOTA_TTL_SECONDS = 60 * 60 * 24 * 62
+
+
+class ProviderCall:
+    """When a detector call actually goes out, once any pacing is over."""
+
+    def __init__(self, parent: "ProviderCall | None" = None) -> None:
+        self.parent = parent
+        self.started_at: float | None = None
+
+    def mark(self, started_at: float) -> None:
+        # The first provider call in a scope sets its start (hedges don't)
+        if self.started_at is None:
+            self.started_at = started_at
+        if self.parent is not None:
+            self.parent.mark(started_at)
+
+    def start_or(self, default: float) -> float:
+        """``started_at`` if known, else ``default`` (no pacing seen yet)."""
+        return self.started_at if self.started_at is not None else default
+
+
+_provider_call: ContextVar[ProviderCall | None] = ContextVar("provider_call", default=None)
+
+
+@contextlib.contextmanager
+def track_provider_call() -> Iterator[ProviderCall]:
+    """Scope whose detector calls (including tasks created inside) mark it."""
+    call = ProviderCall(_provider_call.get())
+    token = _provider_call.set(call)
+    try:
+        yield call
+    finally:
+        _provider_call.reset(token)
+
+
+async def detect_with_provider_timeout(
+    detector: BaseDetector,
+    client: httpx.AsyncClient,
+    text: str,
+    timeout_seconds: float,
+) -> DetectorResult:
+    """``detector.detect`` with a timeout that excludes rate-limit pacing.
+
+    Raises asyncio.TimeoutError once the call has been at the provider for
+    ``timeout_seconds``.
+    """
+    with track_provider_call() as call:
+        task = asyncio.create_task(detector.detect(client, text))
+    start = time.monotonic()
+    try:
+        while True:
+            remaining = call.start_or(start) + timeout_seconds - time.monotonic()
+            if remaining <= 0:
+                raise asyncio.TimeoutError
+            done, _ = await asyncio.wait({task}, timeout=remaining)
+            if done:
+                return task.result()
+    finally:
+        task.cancel()
+
+
+def current_period() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m")
+
+
+class DetectorQuota:
+    def __init__(self, *, use_redis: bool = True) -> None:
+        self.use_redis = use_redis
+        self._local: dict[str, dict[str, int]] = {}
+
+    @staticmethod
+    def _key(period: str) -> str:
+        return f"detector:quota:{period}"
+
+    async def record(self, detector: str, characters: int) -> None:
+        period = current_period()
+        if self.use_redis:
+            try:
+                redis = get_redis()
+                key = self._key(period)
+                pipe = redis.pipeline()
+                pipe.hincrby(key, f"{detector}:calls", 1)
+                pipe.hincrby(key, f"{detector}:characters", characters)
+                pipe.expire(key, _QUOTA_TTL_SECONDS)
+                await pipe.execute()
+                return
+            except Exception as exc:
+                logger.debug("Quota Redis write failed", detector=detector, error=str(exc))
+
+        counters = self._local.setdefault(f"{period}:{detector}", {"calls": 0, "characters": 0})
+        counters["calls"] += 1
+        counters["characters"] += characters
+
+    async def usage(self, period: str | None = None) -> dict[str, dict[str, int]]:
+        """Return {detector: {"calls", "characters"}} for ``period`` (YYYY-MM)."""
+        period = period or current_period()
+        if self.use_redis:
+            try:
+                raw = await get_redis().hgetall(self._key(period))
+                usage: dict[str, dict[str, int]] = {}
+                for field, value in raw.items():
+                    detector, _, metric = field.rpartition(":")
+                    usage.setdefault(detector, {"calls": 0, "characters": 0})[metric] = int(value)
+                return usage
+            except Exception as exc:
+                logger.debug("Quota Redis read failed", error=str(exc))
+
+        prefix = f"{period}:"
+        return {
+            key[len(prefix):]: dict(counters)
+            for key, counters in self._local.items()
+            if key.startswith(prefix)
+        }
+
+
+class RateLimitedDetector(BaseDetector):
+    def __init__(
+        self,
+        inner: BaseDetector,
+        *,
+        limiter: TokenBucketLimiter | None,
+        quota: DetectorQuota,
+    ) -> None:
+        self.inner = inner
+        self.limiter = limiter
+        self.quota = quota
+        self.name = inner.name
+        self.display_name = inner.display_name
+        self.description = inner.description
+
+    def is_available(self) -> bool:
+        return self.inner.is_available()
+
+    async def detect(self, client: httpx.AsyncClient, text: str) -> DetectorResult:
+        wait = await self.limiter.reserve() if self.limiter is not None else 0.0
+        call = _provider_call.get()
+        if call is not None:
+            call.mark(time.monotonic() + wait)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        await self.quota.record(self.name, len(text))
+        return await self.inner.detect(client, text)
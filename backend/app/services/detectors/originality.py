@@ -51,7 +51,7 @@ class OriginalityDetector(BaseDetector):
                 detector=self.name,
                 score=None,
                 label=None,
-                details=None,
+                details={"status_code": exc.response.status_code},
                 error=f"Originality API returned {exc.response.status_code}",
             )
         except Exception as exc:
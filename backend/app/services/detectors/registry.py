@@ -1,7 +1,13 @@
+from typing import TYPE_CHECKING
+
 import structlog
 
+from app.services.cache import TieredCache
 from app.services.detectors.base import BaseDetector
 
+if TYPE_CHECKING:
+    from app.services.detectors.limits import DetectorQuota
+
 logger = structlog.get_logger()
 
 
@@ -32,17 +38,86 @@ class DetectorRegistry:
         """Return all registered detectors regardless of availability."""
         return list(self._detectors.values())
 
+    def hedging_stats(self) -> dict[str, dict]:
+        """Hedge counters for every detector wrapped in a HedgedDetector."""
+        from app.services.detectors.hedged import HedgedDetector
+
+        stats = {}
+        for name, detector in self._detectors.items():
+            # Unwrap the cache layer, if any
+            inner = getattr(detector, "inner", None)
+            for candidate in (detector, inner):
+                if isinstance(candidate, HedgedDetector):
+                    stats[name] = candidate.stats()
+        return stats
+
     @staticmethod
-    def register_defaults() -> "DetectorRegistry":
-        """Create a registry with all built-in detectors registered."""
+    def register_defaults(
+        result_cache: TieredCache | None = None,
+        quota: "DetectorQuota | None" = None,
+    ) -> "DetectorRegistry":
+        """Create a registry with all built-in detectors registered.
+
+        If ``result_cache`` is given, every detector is wrapped so repeated
+        texts are served from the cache. If ``quota`` is given, provider calls
+        are counted there and paced by any DETECTOR_RATE_LIMITS entry. With
+        circuit breakers enabled, calls that reach the provider go through the
+        detector's breaker. With hedging enabled, slow calls are hedged with a
+        duplicate call to the same detector.
+
+        Wrapping order, outermost first: cache, hedging, circuit breaker, rate
+        limit, provider. Pacing applies to each provider call (hedges
+        included) and is excluded from the latencies the breaker and hedging
+        see.
+        """
+        from app.config import settings
+        from app.services.circuit_breaker import get_breaker
+        from app.services.detectors.cache import CachedDetector
+        from app.services.detectors.circuit import CircuitBreakerDetector
+        from app.services.detectors.hedged import HedgedDetector
+        from app.services.detectors.limits import RateLimitedDetector
+        from app.services.rate_limit import TokenBucketLimiter
         from app.services.detectors.gptzero import GPTZeroDetector
         from app.services.detectors.originality import OriginalityDetector
         from app.services.detectors.copyleaks import CopyleaksDetector
         from app.services.detectors.zerogpt import ZeroGPTDetector
 
+        detectors: dict[str, BaseDetector] = {}
+        for detector in (
+            GPTZeroDetector(),
+            OriginalityDetector(),
+            CopyleaksDetector(),
+            ZeroGPTDetector(),
+        ):
+            if quota is not None:
+                rate = settings.DETECTOR_RATE_LIMITS.get(detector.name)
+                limiter = None
+                if rate:
+                    limiter = TokenBucketLimiter(
+                        f"detector:{detector.name}",
+                        rate_per_second=rate,
+                        burst=rate * settings.DETECTOR_RATE_LIMIT_BURST_SECONDS,
+                        use_redis=settings.DETECTOR_RATE_LIMIT_USE_REDIS,
+                        max_wait_seconds=settings.DETECTOR_RATE_LIMIT_MAX_WAIT_SECONDS or None,
+                    )
+                detector = RateLimitedDetector(detector, limiter=limiter, quota=quota)
+            if settings.CIRCUIT_BREAKERS_ENABLED:
+                detector = CircuitBreakerDetector(
+                    detector, get_breaker(f"detector:{detector.name}")
+                )
+            detectors[detector.name] = detector
+
         registry = DetectorRegistry()
-        registry.register(GPTZeroDetector())
-        registry.register(OriginalityDetector())
-        registry.register(CopyleaksDetector())
-        registry.register(ZeroGPTDetector())
+        for detector in detectors.values():
+            if settings.DETECTOR_HEDGING_ENABLED:
+                detector = HedgedDetector(
+                    detector,
+                    quantile=settings.DETECTOR_HEDGE_QUANTILE,
+                    budget_ratio=settings.DETECTOR_HEDGE_BUDGET_RATIO,
+                    min_samples=settings.DETECTOR_HEDGE_MIN_SAMPLES,
+                    initial_delay_seconds=settings.DETECTOR_HEDGE_INITIAL_DELAY_SECONDS,
+                )
+            if result_cache is not None:
+                detector = CachedDetector(detector, result_cache)
+            registry.register(detector)
         return registry
@@ -65,6 +65,7 @@ class ZeroGPTDetector(BaseDetector):
                     "textWords": data.get("textWords"),
                     "aiWords": data.get("aiWords"),
                     "feedback": data.get("feedback"),
+                    "h": data.get("h"),
                 },
                 error=None,
             )
@@ -74,7 +75,7 @@ class ZeroGPTDetector(BaseDetector):
                 detector=self.name,
                 score=None,
                 label=None,
-                details=None,
+                details={"status_code": exc.response.status_code},
                 error=f"ZeroGPT API returned {exc.response.status_code}",
             )
         except Exception as exc:
@@ -0,0 +1,76 @@
+"""Shared, pooled HTTP client for outbound detector API calls.
+
+One client is created in ``main.lifespan`` and kept on
+``app.state.detector_http_client`` so every detector call reuses warm
+TCP/TLS connections instead of paying a fresh handshake per request.
+"""
+
+import importlib.util
+from contextlib import asynccontextmanager
+
+import httpx
+import structlog
+
+from app.config import settings
+
+logger = structlog.get_logger()
+
+
+def create_detector_http_client() -> httpx.AsyncClient:
+    """Build the pooled AsyncClient used for all detector API calls."""
+    http2 = settings.DETECTOR_HTTP_HTTP2
+    if http2 and importlib.util.find_spec("h2") is None:
+        logger.warning("HTTP/2 requested but 'h2' is not installed — using HTTP/1.1")
+        http2 = False
+
+    client = httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=settings.DETECTOR_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.DETECTOR_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.DETECTOR_HTTP_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        timeout=httpx.Timeout(30.0, connect=10.0),
+    )
+    logger.info(
+        "Detector HTTP client created",
+        http2=http2,
+        max_connections=settings.DETECTOR_HTTP_MAX_CONNECTIONS,
+    )
+    return client
+
+
+@asynccontextmanager
+async def borrow_detector_client(shared: httpx.AsyncClient | None):
+    """Yield the shared client, or a short-lived one if none is configured."""
+    if shared is not None:
+        yield shared
+        return
+    async with httpx.AsyncClient() as client:
+        yield client
+
+
+def pool_stats(client: httpx.AsyncClient | None) -> dict | None:
+    """Return connection pool statistics for monitoring.
+
+    httpx does not expose pool internals publicly, so this reads the
+    httpcore pool defensively and returns None if the layout is unknown.
+    """
+    if client is None:
+        return None
+    pool = getattr(getattr(client, "_transport", None), "_pool", None)
+    connections = getattr(pool, "connections", None)
+    if connections is None:
+        return None
+
+    idle = sum(1 for c in connections if c.is_idle())
+    http2 = sum(1 for c in connections if "HTTP/2" in c.info())
+    return {
+        "connections": len(connections),
+        "idle": idle,
+        "active": len(connections) - idle,
+        "http2_connections": http2,
+        "pending_requests": len(getattr(pool, "_requests", [])),
+        "max_connections": settings.DETECTOR_HTTP_MAX_CONNECTIONS,
+        "max_keepalive_connections": settings.DETECTOR_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    }
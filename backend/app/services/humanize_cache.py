@@ -0,0 +1,83 @@
+"""Opt-in memoization of humanizer outputs and gated loop results.
+
+Single generations are keyed by (model, prompt template version, text hash,
+temperature, max_tokens), and only cached at temperatures up to
+``max_output_temperature``: above that the output is meant to be a fresh
+sample, and replaying one would pin every repeat to the same draw. Gated
+runs additionally include the loop parameters, since the same input can
+yield a different verdict under a different detector or threshold.
+"""
+
+import hashlib
+from dataclasses import fields
+
+from app.models.schemas import HumanizeAttempt
+from app.services.cache import TieredCache
+from app.services.humanize_loop import HumanizeLoopResult
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class HumanizeCache:
+    def __init__(
+        self,
+        cache: TieredCache,
+        *,
+        model_name: str,
+        prompt_version: str,
+        max_output_temperature: float | None = None,
+    ) -> None:
+        self.cache = cache
+        self.model_name = model_name
+        self.prompt_version = prompt_version
+        self.max_output_temperature = max_output_temperature
+
+    def caches_output(self, temperature: float) -> bool:
+        """Whether single generations at ``temperature`` are cached."""
+        return self.max_output_temperature is None or temperature <= self.max_output_temperature
+
+    def _base_key(self, text: str, temperature: float, max_tokens: int) -> str:
+        return (
+            f"{self.model_name}:{self.prompt_version}:{_text_hash(text)}"
+            f":{temperature:.4f}:{max_tokens}"
+        )
+
+    async def get_output(self, text: str, temperature: float, max_tokens: int) -> str | None:
+        if not self.caches_output(temperature):
+            return None
+        return await self.cache.get("out:" + self._base_key(text, temperature, max_tokens))
+
+    async def set_output(
+        self, text: str, temperature: float, max_tokens: int, output: str
+    ) -> None:
+        if not self.caches_output(temperature):
+            return
+        await self.cache.set("out:" + self._base_key(text, temperature, max_tokens), output)
+
+    def loop_key(
+        self,
+        text: str,
+        temperature: float,
+        max_tokens: int,
+        **loop_params,
+    ) -> str:
+        params = ":".join(f"{k}={loop_params[k]}" for k in sorted(loop_params))
+        return "loop:" + self._base_key(text, temperature, max_tokens) + ":" + params
+
+    async def get_loop_result(self, key: str) -> HumanizeLoopResult | None:
+        data = await self.cache.get(key)
+        if data is None:
+            return None
+        data = dict(data)
+        data["attempts"] = [HumanizeAttempt.model_validate(a) for a in data["attempts"]]
+        return HumanizeLoopResult(**data)
+
+    async def set_loop_result(self, key: str, result: HumanizeLoopResult) -> None:
+        data = {f.name: getattr(result, f.name) for f in fields(result)}
+        data["attempts"] = [a.model_dump() for a in result.attempts]
+        await self.cache.set(key, data)
+
+    def stats(self) -> dict:
+        return self.cache.stats()
@@ -9,19 +9,42 @@ Fail-fast behavior: transport-level detector failures (timeout, connect
 error, read error) abort the loop immediately. Retrying when the detector
 is unreachable just burns humanizer compute to arrive at the same verdict.
 Per-call 4xx/5xx responses are treated as score=None and can still retry,
-since the next call might succeed.
+since the next call might succeed. A detector whose circuit breaker is open
+is treated as unavailable up front: one unverified humanization, no waiting.
+
+Loop modes:
+- "sequential": humanize → detect one attempt at a time (default).
+- "parallel": fire every attempt on the temperature ladder at once, score
+  them as they complete, and cancel the rest as soon as one passes.
+- "pipelined": start generating attempt N+1 while attempt N is being
+  scored, and cancel that generation if attempt N passes.
+- "targeted": like sequential, but a retry rewrites only the sentences the
+  detector flagged in the previous output and splices them back in. Falls
+  back to full regeneration when the detector gives no sentence detail.
+- "batched": generate every candidate in one ``humanize_many`` call (vLLM
+  ``n`` sampling shares the prompt prefill), then score them in order. All
+  candidates use ``base_temperature`` since choices share sampling params.
 """
 
 import asyncio
+import contextlib
+import functools
+from collections.abc import Iterator
+from contextvars import ContextVar
 from dataclasses import dataclass
+from typing import Awaitable, Callable
 
 import httpx
 import structlog
 
 from app.config import settings
-from app.models.schemas import HumanizeAttempt
+from app.models.schemas import DetectorResult, HumanizeAttempt
+from app.services.circuit_breaker import CircuitOpenError, circuit_open
 from app.services.detectors.base import BaseDetector
+from app.services.detectors.limits import detect_with_provider_timeout
 from app.services.detectors.registry import DetectorRegistry
+from app.services.rate_limit import RateLimitExceeded
+from app.services.targeted_retry import flagged_segments, rewrite_flagged_segments
 
 logger = structlog.get_logger()
 
@@ -31,6 +54,18 @@ _FATAL_DETECTOR_EXCEPTIONS: tuple[type[BaseException], ...] = (
     httpx.ConnectError,
     httpx.ReadError,
     httpx.NetworkError,
+    CircuitOpenError,
+    RateLimitExceeded,
+)
+
+
+AttemptCallback = Callable[[HumanizeAttempt], Awaitable[None]]
+
+_attempt_number: ContextVar[int] = ContextVar("humanize_attempt_number", default=1)
+
+_DETECTOR_UNAVAILABLE_WARNING = (
+    "AI detector functionality is currently unavailable; "
+    "returning unverified output."
 )
 
 
@@ -80,6 +115,48 @@ def _argmin_score(attempts: list[HumanizeAttempt]) -> int:
     return best_index
 
 
+def _ladder_temperature(base_temperature: float, index: int, bump: float) -> float:
+    """Temperature for the attempt at ``index`` on the retry ladder."""
+    return min(base_temperature + index * bump, 2.0)
+
+
+def _pack_exhausted(
+    attempts: list[HumanizeAttempt], *, threshold: float
+) -> HumanizeLoopResult:
+    """Pack the result when no attempt met the threshold."""
+    best_index = _argmin_score(attempts)
+    best = attempts[best_index]
+
+    if best.ai_score is None:
+        warning = (
+            "AI detector failed on all attempts; returning first humanization."
+        )
+    else:
+        pct = round(best.ai_score * 100, 1)
+        warning = (
+            f"We couldn't get the AI-detection score below "
+            f"{round(threshold * 100)}% after {len(attempts)} attempts. "
+            f"Showing the best result ({pct}%). Consider manually editing "
+            f"this output."
+        )
+
+    return _pack(
+        attempts,
+        best_index=best_index,
+        threshold=threshold,
+        threshold_met=False,
+        warning=warning,
+    )
+
+
+async def _cancel_all(tasks: list[asyncio.Task]) -> None:
+    """Cancel pending tasks and wait for them to unwind."""
+    for task in tasks:
+        if not task.done():
+            task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
 async def _run_detector_with_timeout(
     detector: BaseDetector,
     http_client: httpx.AsyncClient,
@@ -88,14 +165,16 @@ async def _run_detector_with_timeout(
 ):
     """Wrap detector.detect in an asyncio timeout.
 
+    The timeout covers time at the provider only; waiting on the detector's
+    rate limiter doesn't count against it.
+
     Returns (detector_result, fatal_error_message):
     - On success: (DetectorResult, None)
     - On fatal transport error: (None, error_message)
     """
     try:
-        result = await asyncio.wait_for(
-            detector.detect(http_client, text),
-            timeout=timeout_seconds,
+        result = await detect_with_provider_timeout(
+            detector, http_client, text, timeout_seconds
         )
         return result, None
     except _FATAL_DETECTOR_EXCEPTIONS as exc:
@@ -107,6 +186,364 @@ async def _run_detector_with_timeout(
         return None, f"{type(exc).__name__}: {exc}" if str(exc) else type(exc).__name__
 
 
+async def _score_attempt(
+    detector: BaseDetector,
+    http_client: httpx.AsyncClient,
+    *,
+    index: int,
+    humanized: str,
+    temperature: float,
+    timeout_seconds: float,
+    on_attempt: AttemptCallback | None = None,
+) -> tuple[HumanizeAttempt, DetectorResult | None]:
+    """Score one humanized output and wrap it as a HumanizeAttempt.
+
+    Returns (attempt, detector_result). ``detector_result`` is None on a
+    transport-level detector failure that should abort the loop. If given,
+    ``on_attempt`` is awaited with every scored attempt.
+    """
+    det_result, fatal_error = await _run_detector_with_timeout(
+        detector,
+        http_client,
+        humanized,
+        timeout_seconds=timeout_seconds,
+    )
+    if fatal_error is not None:
+        attempt = HumanizeAttempt(
+            attempt=index + 1,
+            humanized_text=humanized,
+            ai_score=None,
+            detector=detector.name,
+            detector_error=fatal_error,
+            temperature_used=temperature,
+        )
+    else:
+        attempt = HumanizeAttempt(
+            attempt=index + 1,
+            humanized_text=humanized,
+            ai_score=det_result.score,
+            detector=detector.name,
+            detector_error=det_result.error,
+            temperature_used=temperature,
+        )
+
+    if on_attempt is not None:
+        await on_attempt(attempt)
+    return attempt, det_result
+
+
+def current_attempt_number() -> int:
+    """1-based number of the attempt whose text is being generated.
+
+    The loop sets it around each attempt's humanizer calls, so a humanizer
+    adapter can tag its output even when attempts or the segment rewrites of
+    one targeted attempt run concurrently. Outside the loop it is 1.
+    """
+    return _attempt_number.get()
+
+
+@contextlib.contextmanager
+def _generating(index: int) -> Iterator[None]:
+    token = _attempt_number.set(index + 1)
+    try:
+        yield
+    finally:
+        _attempt_number.reset(token)
+
+
+def _passes(attempt: HumanizeAttempt, threshold: float) -> bool:
+    return attempt.ai_score is not None and attempt.ai_score <= threshold
+
+
+async def _run_sequential(
+    *,
+    humanizer,
+    detector: BaseDetector,
+    http_client: httpx.AsyncClient,
+    text: str,
+    base_temperature: float,
+    max_tokens: int,
+    max_attempts: int,
+    threshold: float,
+    temp_bump_per_retry: float,
+    detector_timeout_seconds: float,
+    on_attempt: AttemptCallback | None = None,
+    targeted: bool = False,
+) -> HumanizeLoopResult:
+    attempts: list[HumanizeAttempt] = []
+    previous: tuple[str, DetectorResult] | None = None
+
+    for i in range(max_attempts):
+        temp = _ladder_temperature(base_temperature, i, temp_bump_per_retry)
+
+        humanized = None
+        with _generating(i):
+            if targeted and previous is not None:
+                previous_text, previous_result = previous
+                segments = flagged_segments(previous_result)
+                if segments:
+                    humanized = await rewrite_flagged_segments(
+                        humanizer,
+                        text=previous_text,
+                        segments=segments,
+                        temperature=temp,
+                        max_tokens=max_tokens,
+                    )
+            if humanized is None:
+                humanized = await humanizer.humanize(
+                    text=text,
+                    temperature=temp,
+                    max_tokens=max_tokens,
+                )
+
+        attempt, det_result = await _score_attempt(
+            detector,
+            http_client,
+            index=i,
+            humanized=humanized,
+            temperature=temp,
+            timeout_seconds=detector_timeout_seconds,
+            on_attempt=on_attempt,
+        )
+        attempts.append(attempt)
+
+        if det_result is None:
+            # Fail fast with the current, unscored attempt.
+            return _pack(
+                attempts,
+                best_index=len(attempts) - 1,
+                threshold=threshold,
+                threshold_met=False,
+                warning=_DETECTOR_UNAVAILABLE_WARNING,
+            )
+
+        if _passes(attempt, threshold):
+            return _pack(
+                attempts,
+                best_index=i,
+                threshold=threshold,
+                threshold_met=True,
+                warning=None,
+            )
+
+        previous = (humanized, det_result)
+
+    # Exhausted all attempts without meeting threshold
+    return _pack_exhausted(attempts, threshold=threshold)
+
+
+async def _run_parallel(
+    *,
+    humanizer,
+    detector: BaseDetector,
+    http_client: httpx.AsyncClient,
+    text: str,
+    base_temperature: float,
+    max_tokens: int,
+    max_attempts: int,
+    threshold: float,
+    temp_bump_per_retry: float,
+    detector_timeout_seconds: float,
+    on_attempt: AttemptCallback | None = None,
+) -> HumanizeLoopResult:
+    """Speculatively run every attempt on the ladder concurrently.
+
+    Attempts are scored as they complete; the first one at or below the
+    threshold wins and the still-running attempts are cancelled. The
+    returned ``attempts`` list only contains attempts that finished, in
+    ladder order.
+    """
+
+    async def run_attempt(index: int) -> tuple[HumanizeAttempt, DetectorResult | None]:
+        temp = _ladder_temperature(base_temperature, index, temp_bump_per_retry)
+        with _generating(index):
+            humanized = await humanizer.humanize(
+                text=text,
+                temperature=temp,
+                max_tokens=max_tokens,
+            )
+        return await _score_attempt(
+            detector,
+            http_client,
+            index=index,
+            humanized=humanized,
+            temperature=temp,
+            timeout_seconds=detector_timeout_seconds,
+            on_attempt=on_attempt,
+        )
+
+    tasks = [asyncio.create_task(run_attempt(i)) for i in range(max_attempts)]
+    attempts: list[HumanizeAttempt] = []
+
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            attempt, det_result = await next_done
+            attempts.append(attempt)
+            attempts.sort(key=lambda a: a.attempt)
+
+            if det_result is None:
+                return _pack(
+                    attempts,
+                    best_index=attempts.index(attempt),
+                    threshold=threshold,
+                    threshold_met=False,
+                    warning=_DETECTOR_UNAVAILABLE_WARNING,
+                )
+
+            if _passes(attempt, threshold):
+                return _pack(
+                    attempts,
+                    best_index=attempts.index(attempt),
+                    threshold=threshold,
+                    threshold_met=True,
+                    warning=None,
+                )
+    finally:
+        await _cancel_all(tasks)
+
+    return _pack_exhausted(attempts, threshold=threshold)
+
+
+async def _run_pipelined(
+    *,
+    humanizer,
+    detector: BaseDetector,
+    http_client: httpx.AsyncClient,
+    text: str,
+    base_temperature: float,
+    max_tokens: int,
+    max_attempts: int,
+    threshold: float,
+    temp_bump_per_retry: float,
+    detector_timeout_seconds: float,
+    on_attempt: AttemptCallback | None = None,
+) -> HumanizeLoopResult:
+    """Overlap the next generation with scoring of the current attempt.
+
+    At most one speculative generation is in flight, so GPU load is bounded
+    at one extra generation while detector latency is hidden.
+    """
+
+    def start_generation(index: int) -> asyncio.Task:
+        temp = _ladder_temperature(base_temperature, index, temp_bump_per_retry)
+        # The task copies the current context, attempt number included
+        with _generating(index):
+            return asyncio.create_task(
+                humanizer.humanize(text=text, temperature=temp, max_tokens=max_tokens)
+            )
+
+    attempts: list[HumanizeAttempt] = []
+    pending = start_generation(0)
+
+    try:
+        for i in range(max_attempts):
+            temp = _ladder_temperature(base_temperature, i, temp_bump_per_retry)
+            humanized = await pending
+            if i + 1 < max_attempts:
+                pending = start_generation(i + 1)
+
+            attempt, det_result = await _score_attempt(
+                detector,
+                http_client,
+                index=i,
+                humanized=humanized,
+                temperature=temp,
+                timeout_seconds=detector_timeout_seconds,
+                on_attempt=on_attempt,
+            )
+            attempts.append(attempt)
+
+            if det_result is None:
+                return _pack(
+                    attempts,
+                    best_index=len(attempts) - 1,
+                    threshold=threshold,
+                    threshold_met=False,
+                    warning=_DETECTOR_UNAVAILABLE_WARNING,
+                )
+
+            if _passes(attempt, threshold):
+                return _pack(
+                    attempts,
+                    best_index=i,
+                    threshold=threshold,
+                    threshold_met=True,
+                    warning=None,
+                )
+    finally:
+        await _cancel_all([pending])
+
+    return _pack_exhausted(attempts, threshold=threshold)
+
+
+async def _run_batched(
+    *,
+    humanizer,
+    detector: BaseDetector,
+    http_client: httpx.AsyncClient,
+    text: str,
+    base_temperature: float,
+    max_tokens: int,
+    max_attempts: int,
+    threshold: float,
+    temp_bump_per_retry: float,
+    detector_timeout_seconds: float,
+    on_attempt: AttemptCallback | None = None,
+) -> HumanizeLoopResult:
+    """Generate all candidates in one completion call, then score in order."""
+    candidates = await humanizer.humanize_many(
+        text=text,
+        n=max_attempts,
+        temperature=base_temperature,
+        max_tokens=max_tokens,
+    )
+    if not candidates:
+        # Surfaces like any other failed generation
+        raise RuntimeError("Humanizer returned no candidates")
+
+    attempts: list[HumanizeAttempt] = []
+    for i, humanized in enumerate(candidates[:max_attempts]):
+        attempt, det_result = await _score_attempt(
+            detector,
+            http_client,
+            index=i,
+            humanized=humanized,
+            temperature=base_temperature,
+            timeout_seconds=detector_timeout_seconds,
+            on_attempt=on_attempt,
+        )
+        attempts.append(attempt)
+
+        if det_result is None:
+            return _pack(
+                attempts,
+                best_index=len(attempts) - 1,
+                threshold=threshold,
+                threshold_met=False,
+                warning=_DETECTOR_UNAVAILABLE_WARNING,
+            )
+
+        if _passes(attempt, threshold):
+            return _pack(
+                attempts,
+                best_index=i,
+                threshold=threshold,
+                threshold_met=True,
+                warning=None,
+            )
+
+    return _pack_exhausted(attempts, threshold=threshold)
+
+
+_LOOP_RUNNERS = {
+    "sequential": _run_sequential,
+    "parallel": _run_parallel,
+    "pipelined": _run_pipelined,
+    "targeted": functools.partial(_run_sequential, targeted=True),
+    "batched": _run_batched,
+}
+
+
 async def humanize_with_detector_gate(
     *,
     humanizer,
@@ -120,8 +557,17 @@ async def humanize_with_detector_gate(
     detector_name: str,
     temp_bump_per_retry: float = 0.05,
     detector_timeout_seconds: float = 30.0,
+    mode: str = "sequential",
+    on_attempt: AttemptCallback | None = None,
 ) -> HumanizeLoopResult:
-    """Humanize + score in a loop. Returns best attempt (≤ threshold or lowest)."""
+    """Humanize + score in a loop. Returns best attempt (≤ threshold or lowest).
+
+    ``on_attempt`` is awaited after each attempt is scored, e.g. to stream
+    progress to the client.
+    """
+
+    if mode not in _LOOP_RUNNERS:
+        raise ValueError(f"Unknown humanize loop mode: {mode}")
 
     detector = registry.get(detector_name)
 
@@ -148,90 +594,42 @@ async def humanize_with_detector_gate(
             warning="AI detector not configured; returning unverified output.",
         )
 
-    attempts: list[HumanizeAttempt] = []
-
-    for i in range(max_attempts):
-        temp = min(base_temperature + i * temp_bump_per_retry, 2.0)
-
+    # Known-down detector → don't wait on it, humanize once unverified
+    if circuit_open(f"detector:{detector_name}"):
         humanized = await humanizer.humanize(
             text=text,
-            temperature=temp,
+            temperature=base_temperature,
             max_tokens=max_tokens,
         )
-
-        det_result, fatal_error = await _run_detector_with_timeout(
-            detector,
-            http_client,
-            humanized,
-            timeout_seconds=detector_timeout_seconds,
-        )
-
-        if fatal_error is not None:
-            # Append the current attempt with no score, fail fast.
-            attempts.append(
-                HumanizeAttempt(
-                    attempt=i + 1,
-                    humanized_text=humanized,
-                    ai_score=None,
-                    detector=detector.name,
-                    detector_error=fatal_error,
-                    temperature_used=temp,
-                )
-            )
-            return _pack(
-                attempts,
-                best_index=len(attempts) - 1,
-                threshold=threshold,
-                threshold_met=False,
-                warning=(
-                    "AI detector functionality is currently unavailable; "
-                    "returning unverified output."
-                ),
-            )
-
-        attempts.append(
-            HumanizeAttempt(
-                attempt=i + 1,
-                humanized_text=humanized,
-                ai_score=det_result.score,
-                detector=detector.name,
-                detector_error=det_result.error,
-                temperature_used=temp,
-            )
-        )
-
-        if det_result.score is not None and det_result.score <= threshold:
-            return _pack(
-                attempts,
-                best_index=i,
-                threshold=threshold,
-                threshold_met=True,
-                warning=None,
-            )
-
-    # Exhausted all attempts without meeting threshold
-    best_index = _argmin_score(attempts)
-    best = attempts[best_index]
-
-    if best.ai_score is None:
-        warning = (
-            "AI detector failed on all attempts; returning first humanization."
+        attempt = HumanizeAttempt(
+            attempt=1,
+            humanized_text=humanized,
+            ai_score=None,
+            detector=detector_name,
+            detector_error="Detector circuit open",
+            temperature_used=base_temperature,
         )
-    else:
-        pct = round(best.ai_score * 100, 1)
-        warning = (
-            f"We couldn't get the AI-detection score below "
-            f"{round(threshold * 100)}% after {len(attempts)} attempts. "
-            f"Showing the best result ({pct}%). Consider manually editing "
-            f"this output."
+        return _pack(
+            [attempt],
+            best_index=0,
+            threshold=threshold,
+            threshold_met=False,
+            warning=_DETECTOR_UNAVAILABLE_WARNING,
         )
 
-    return _pack(
-        attempts,
-        best_index=best_index,
+    run = _LOOP_RUNNERS[mode]
+    return await run(
+        humanizer=humanizer,
+        detector=detector,
+        http_client=http_client,
+        text=text,
+        base_temperature=base_temperature,
+        max_tokens=max_tokens,
+        max_attempts=max_attempts,
         threshold=threshold,
-        threshold_met=False,
-        warning=warning,
+        temp_bump_per_retry=temp_bump_per_retry,
+        detector_timeout_seconds=detector_timeout_seconds,
+        on_attempt=on_attempt,
     )
 
 
@@ -0,0 +1,145 @@
+"""One humanization request end to end, driven by settings.
+
+Applies long-input chunking, the gated-result cache, and dispatches to
+either ``humanize_single`` or ``humanize_with_detector_gate``. Shared by
+the HTTP handlers and the background job worker.
+"""
+
+import httpx
+
+from app.config import settings
+from app.models.schemas import HumanizeRequest, HumanizeResponse
+from app.services.chunking import ChunkedHumanizer, estimate_tokens
+from app.services.detectors.registry import DetectorRegistry
+from app.services.humanize_cache import HumanizeCache
+from app.services.humanize_loop import (
+    HumanizeLoopResult,
+    humanize_single,
+    humanize_with_detector_gate,
+)
+
+
+def resolve_options(body: HumanizeRequest) -> tuple[float, int, bool, int]:
+    """Return (temperature, max_tokens, enable_gate, max_attempts)."""
+    options = body.options
+    temperature = options.temperature if options else settings.TEMPERATURE
+    max_tokens = options.max_tokens if options else settings.MAX_OUTPUT_TOKENS
+    enable_gate = options.enable_detector_gate if options else True
+    max_attempts = (
+        options.max_attempts
+        if options and options.max_attempts is not None
+        else settings.HUMANIZE_MAX_ATTEMPTS
+    )
+    return temperature, max_tokens, enable_gate, max_attempts
+
+
+def to_response(
+    body: HumanizeRequest, loop_result: HumanizeLoopResult, processing_time_ms: int
+) -> HumanizeResponse:
+    return HumanizeResponse(
+        humanized_text=loop_result.humanized_text,
+        input_length=len(body.text),
+        output_length=len(loop_result.humanized_text),
+        processing_time_ms=processing_time_ms,
+        ai_score=loop_result.ai_score,
+        threshold_met=loop_result.threshold_met,
+        attempts=loop_result.attempts,
+        threshold=loop_result.threshold,
+        warning=loop_result.warning,
+    )
+
+
+async def _run_gated_loop(
+    *,
+    humanizer,
+    registry: DetectorRegistry,
+    http_client: httpx.AsyncClient,
+    humanize_cache: HumanizeCache | None,
+    text: str,
+    temperature: float,
+    max_tokens: int,
+    max_attempts: int,
+) -> HumanizeLoopResult:
+    """Run the detector-gated loop, serving repeats from the humanize cache.
+
+    Only results that met the threshold are cached. A miss (or unverified
+    output, detector down or unconfigured) is recomputed on repeat, so it
+    gets a fresh chance at passing instead of replaying the failure.
+    """
+    cache_key = None
+    if humanize_cache is not None:
+        cache_key = humanize_cache.loop_key(
+            text,
+            temperature,
+            max_tokens,
+            detector=settings.HUMANIZE_DETECTOR_NAME,
+            threshold=settings.HUMANIZE_AI_SCORE_THRESHOLD,
+            max_attempts=max_attempts,
+            temp_bump=settings.HUMANIZE_TEMP_BUMP_PER_RETRY,
+            mode=settings.HUMANIZE_LOOP_MODE,
+        )
+        cached = await humanize_cache.get_loop_result(cache_key)
+        if cached is not None:
+            return cached
+
+    loop_result = await humanize_with_detector_gate(
+        humanizer=humanizer,
+        registry=registry,
+        http_client=http_client,
+        text=text,
+        base_temperature=temperature,
+        max_tokens=max_tokens,
+        max_attempts=max_attempts,
+        threshold=settings.HUMANIZE_AI_SCORE_THRESHOLD,
+        detector_name=settings.HUMANIZE_DETECTOR_NAME,
+        temp_bump_per_retry=settings.HUMANIZE_TEMP_BUMP_PER_RETRY,
+        detector_timeout_seconds=settings.HUMANIZE_DETECTOR_TIMEOUT_SECONDS,
+        mode=settings.HUMANIZE_LOOP_MODE,
+    )
+
+    if cache_key is not None and loop_result.threshold_met:
+        await humanize_cache.set_loop_result(cache_key, loop_result)
+    return loop_result
+
+
+async def run_humanization(
+    *,
+    humanizer,
+    registry: DetectorRegistry | None,
+    http_client: httpx.AsyncClient,
+    humanize_cache: HumanizeCache | None,
+    text: str,
+    temperature: float,
+    max_tokens: int,
+    enable_gate: bool,
+    max_attempts: int,
+) -> HumanizeLoopResult:
+    if (
+        settings.HUMANIZE_CHUNKING_ENABLED
+        and estimate_tokens(text) > settings.HUMANIZE_CHUNK_MAX_TOKENS
+    ):
+        humanizer = ChunkedHumanizer(
+            humanizer,
+            max_chunk_tokens=settings.HUMANIZE_CHUNK_MAX_TOKENS,
+            max_concurrency=settings.HUMANIZE_CHUNK_CONCURRENCY,
+        )
+
+    if not enable_gate or registry is None:
+        return await humanize_single(
+            humanizer=humanizer,
+            text=text,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            threshold=settings.HUMANIZE_AI_SCORE_THRESHOLD,
+        )
+
+    return await _run_gated_loop(
+        humanizer=humanizer,
+        registry=registry,
+        http_client=http_client,
+        humanize_cache=humanize_cache,
+        text=text,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        max_attempts=max_attempts,
+    )
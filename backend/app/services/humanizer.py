@@ -1,18 +1,61 @@
+import contextlib
+import json
+import time
+from typing import AsyncIterator
+
 import httpx
 import structlog
 
 from app.config import settings
+from app.services.admission import AdmissionController
+from app.services.circuit_breaker import CircuitBreaker, get_breaker
+from app.services.humanize_cache import HumanizeCache
+from app.services.micro_batcher import MicroBatcher
 
 logger = structlog.get_logger()
 
+# Bump whenever the rewriting prompt changes so cached outputs are invalidated.
+PROMPT_TEMPLATE_VERSION = "v1"
+
 
 class HumanizerService:
-    def __init__(self, base_url: str, model_name: str, api_key: str = ""):
+    def __init__(
+        self,
+        base_url: str,
+        model_name: str,
+        api_key: str = "",
+        cache: HumanizeCache | None = None,
+        batch_window_ms: float = 0.0,
+        batch_max_size: int = 1,
+        batch_prompt_template: str = "",
+        admission: AdmissionController | None = None,
+    ):
         self.base_url = base_url.rstrip("/")
         self.model_name = model_name
         self.api_key = api_key
+        self.cache = cache
+        self.admission = admission
         self.client: httpx.AsyncClient | None = None
         self._available = False
+        self.breaker: CircuitBreaker | None = None
+        if settings.CIRCUIT_BREAKERS_ENABLED:
+            self.breaker = get_breaker(f"humanizer:{self.base_url}")
+        # Micro-batching is on when both a window and a batch size > 1 are set
+        self.batcher: MicroBatcher | None = None
+        self.batch_prompt_template = batch_prompt_template
+        if batch_window_ms > 0 and batch_max_size > 1:
+            # Batches skip the server-side chat template; without one of our
+            # own the model would see a bare instruction it wasn't tuned on
+            if "{content}" not in batch_prompt_template:
+                raise ValueError(
+                    "HUMANIZER_BATCH_PROMPT_TEMPLATE must render the model's chat "
+                    "format around {content} when micro-batching is enabled"
+                )
+            self.batcher = MicroBatcher(
+                self._complete_batch,
+                window_seconds=batch_window_ms / 1000,
+                max_batch_size=batch_max_size,
+            )
 
     @property
     def is_loaded(self) -> bool:
@@ -48,45 +91,208 @@ class HumanizerService:
             logger.error("Failed to connect to vLLM server", error=str(exc))
             self._available = False
 
-    async def humanize(
-        self,
-        text: str,
-        temperature: float = settings.TEMPERATURE,
-        max_tokens: int = settings.MAX_OUTPUT_TOKENS,
-    ) -> str:
-        """Send humanization request to vLLM server."""
+    async def ping(self) -> bool:
+        """Probe ``/v1/models`` and update availability accordingly."""
+        if not self.client:
+            return False
+        try:
+            resp = await self.client.get("/v1/models")
+            resp.raise_for_status()
+            self._available = True
+        except Exception as exc:
+            logger.warning("vLLM probe failed", base_url=self.base_url, error=str(exc))
+            self._available = False
+        return self._available
+
+    @staticmethod
+    def _build_instruction(text: str) -> str:
+        return (
+            "You are a rewriting assistant.\n"
+            "Rewrite the input text with minimal edits only.\n"
+            "Preserve the original meaning, facts, tone, structure, named entities, "
+            "numbers, dates, quoted text, and list order exactly.\n"
+            "Do not summarize, shorten, omit, or add new information.\n"
+            "Keep the output length similar to the input.\n"
+            "Output only the rewritten text.\n\n"
+            f"Input text:\n{text}"
+        )
+
+    def _build_payload(self, text: str, temperature: float, max_tokens: int) -> dict:
+        return {
+            "model": self.model_name,
+            "messages": [{"role": "user", "content": self._build_instruction(text)}],
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "top_p": 0.9,
+            "top_k": 50,
+        }
+
+    def _slot(self):
+        """Admission slot for one vLLM generation (cache hits never take one)."""
+        if self.admission is None:
+            return contextlib.nullcontext()
+        return self.admission.slot()
+
+    async def _post(self, path: str, payload: dict) -> httpx.Response:
+        """POST to vLLM through the circuit breaker (5xx and transport errors trip it)."""
+        if self.breaker is None:
+            return await self.client.post(path, json=payload)
+
+        self.breaker.allow()
+        start = time.monotonic()
+        try:
+            resp = await self.client.post(path, json=payload)
+        except Exception:
+            self.breaker.record(ok=False, duration=time.monotonic() - start)
+            raise
+        except BaseException:
+            self.breaker.release()
+            raise
+        self.breaker.record(ok=resp.status_code < 500, duration=time.monotonic() - start)
+        return resp
+
+    async def _complete(self, payload: dict) -> list[str]:
+        """POST a chat completion and return the choices' contents in order."""
         if not self._available or not self.client:
             raise RuntimeError("Humanizer service is not available")
 
+        resp = await self._post("/v1/chat/completions", payload)
+        if resp.status_code != 200:
+            logger.error("vLLM error", status=resp.status_code, body=resp.text, payload=payload)
+        resp.raise_for_status()
+        data = resp.json()
+        choices = sorted(data["choices"], key=lambda c: c.get("index", 0))
+        return [c["message"]["content"].strip() for c in choices]
+
+    async def _complete_batch(
+        self, params: tuple[float, int], texts: list[str]
+    ) -> list[str]:
+        """Rewrite several texts in one /v1/completions call (prompt list).
+
+        The completions endpoint does not apply the model's chat template, so
+        each prompt is rendered through ``batch_prompt_template``
+        (HUMANIZER_BATCH_PROMPT_TEMPLATE), which must match it.
+        Choice ``index`` is the position of the prompt in the list.
+        """
+        if not self._available or not self.client:
+            raise RuntimeError("Humanizer service is not available")
+
+        temperature, max_tokens = params
+        template = self.batch_prompt_template
         payload = {
             "model": self.model_name,
-            "messages": [
-                {
-                    "role": "user",
-                    "content": (
-                        "You are a rewriting assistant.\n"
-                        "Rewrite the input text with minimal edits only.\n"
-                        "Preserve the original meaning, facts, tone, structure, named entities, "
-                        "numbers, dates, quoted text, and list order exactly.\n"
-                        "Do not summarize, shorten, omit, or add new information.\n"
-                        "Keep the output length similar to the input.\n"
-                        "Output only the rewritten text.\n\n"
-                        f"Input text:\n{text}"
-                    ),
-                }
+            "prompt": [
+                template.replace("{content}", self._build_instruction(t)) for t in texts
             ],
             "max_tokens": max_tokens,
             "temperature": temperature,
             "top_p": 0.9,
             "top_k": 50,
         }
-
-        resp = await self.client.post("/v1/chat/completions", json=payload)
+        resp = await self._post("/v1/completions", payload)
         if resp.status_code != 200:
-            logger.error("vLLM error", status=resp.status_code, body=resp.text, payload=payload)
+            logger.error("vLLM error", status=resp.status_code, body=resp.text, batch_size=len(texts))
         resp.raise_for_status()
-        data = resp.json()
-        return data["choices"][0]["message"]["content"].strip()
+        choices = sorted(resp.json()["choices"], key=lambda c: c.get("index", 0))
+        return [c["text"].strip() for c in choices]
+
+    async def humanize(
+        self,
+        text: str,
+        temperature: float = settings.TEMPERATURE,
+        max_tokens: int = settings.MAX_OUTPUT_TOKENS,
+    ) -> str:
+        """Send humanization request to vLLM server."""
+        if self.cache is not None:
+            cached = await self.cache.get_output(text, temperature, max_tokens)
+            if cached is not None:
+                return cached
+
+        async with self._slot():
+            if self.batcher is not None:
+                output = await self.batcher.submit((temperature, max_tokens), text)
+            else:
+                payload = self._build_payload(text, temperature, max_tokens)
+                output = (await self._complete(payload))[0]
+
+        if self.cache is not None:
+            await self.cache.set_output(text, temperature, max_tokens, output)
+        return output
+
+    async def humanize_many(
+        self,
+        text: str,
+        n: int,
+        temperature: float = settings.TEMPERATURE,
+        max_tokens: int = settings.MAX_OUTPUT_TOKENS,
+    ) -> list[str]:
+        """Generate ``n`` independent rewrites in a single completion call.
+
+        vLLM samples all choices from one prefill of the prompt, so this is
+        much cheaper than ``n`` separate ``humanize`` calls. All choices share
+        the same sampling parameters.
+        """
+        payload = self._build_payload(text, temperature, max_tokens)
+        payload["n"] = n
+        async with self._slot():
+            return await self._complete(payload)
+
+    async def humanize_stream(
+        self,
+        text: str,
+        temperature: float = settings.TEMPERATURE,
+        max_tokens: int = settings.MAX_OUTPUT_TOKENS,
+    ) -> AsyncIterator[str]:
+        """Stream the rewrite as content deltas (vLLM ``stream: true``)."""
+        if not self._available or not self.client:
+            raise RuntimeError("Humanizer service is not available")
+
+        payload = self._build_payload(text, temperature, max_tokens)
+        payload["stream"] = True
+
+        async with self._slot():
+            async for delta in self._stream_through_breaker(payload):
+                yield delta
+
+    async def _stream_through_breaker(self, payload: dict) -> AsyncIterator[str]:
+        if self.breaker is not None:
+            self.breaker.allow()
+        start = time.monotonic()
+        outcome: bool | None = None  # None: abandoned by the consumer
+        try:
+            async for delta in self._stream_deltas(payload):
+                yield delta
+            outcome = True
+        except httpx.HTTPStatusError as exc:
+            outcome = exc.response.status_code < 500
+            raise
+        except Exception:
+            outcome = False
+            raise
+        finally:
+            if self.breaker is not None:
+                if outcome is None:
+                    self.breaker.release()
+                else:
+                    self.breaker.record(ok=outcome, duration=time.monotonic() - start)
+
+    async def _stream_deltas(self, payload: dict) -> AsyncIterator[str]:
+        async with self.client.stream("POST", "/v1/chat/completions", json=payload) as resp:
+            if resp.status_code != 200:
+                await resp.aread()
+                logger.error("vLLM error", status=resp.status_code, body=resp.text, payload=payload)
+            resp.raise_for_status()
+            async for line in resp.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                chunk = json.loads(data)
+                for choice in chunk.get("choices", []):
+                    delta = (choice.get("delta") or {}).get("content")
+                    if delta:
+                        yield delta
 
     async def disconnect(self):
         """Close HTTP client."""
@@ -0,0 +1,273 @@
+"""Load balancing across several vLLM replicas.
+
+``HumanizerPool`` exposes the same interface as HumanizerService and routes
+each call to one replica:
+
+- least outstanding requests among healthy replicas;
+- with prefix affinity on, the replica ranked highest for the input text by
+  rendezvous hashing, as long as it is no more than ``affinity_max_skew``
+  requests busier than the least-loaded one. Retries of the same text then
+  reuse that replica's warm prefix (KV) cache;
+- replicas are ejected after ``eject_after_failures`` consecutive failed
+  calls or a failed ``/v1/models`` probe, and re-admitted by the next
+  successful probe. Only transport errors, timeouts and 5xx responses count
+  as failed calls; a 4xx (bad request) or an open breaker says nothing
+  about the replica's health. A replica whose circuit breaker is open is skipped
+  until the breaker lets trial calls through again. If that leaves no
+  replica, calls fail with CircuitOpenError carrying the soonest reopen.
+"""
+
+import asyncio
+import contextlib
+import hashlib
+from collections.abc import AsyncIterator
+
+import httpx
+import structlog
+
+from app.config import settings
+from app.services.admission import AdmissionController
+from app.services.circuit_breaker import CircuitOpenError
+from app.services.humanize_cache import HumanizeCache
+from app.services.humanizer import HumanizerService
+
+logger = structlog.get_logger()
+
+
+def _is_replica_failure(exc: BaseException) -> bool:
+    """True if ``exc`` means the replica itself is unhealthy."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500
+    return isinstance(exc, (httpx.TransportError, asyncio.TimeoutError))
+
+
+class _Replica:
+    def __init__(self, service: HumanizerService) -> None:
+        self.service = service
+        self.outstanding = 0
+        self.consecutive_failures = 0
+        self.healthy = False
+
+    @property
+    def routable(self) -> bool:
+        """Healthy and not behind an open circuit breaker."""
+        breaker = getattr(self.service, "breaker", None)
+        return self.healthy and not (breaker is not None and breaker.is_open())
+
+    def affinity(self, key: bytes) -> int:
+        digest = hashlib.sha256(key + self.service.base_url.encode()).digest()
+        return int.from_bytes(digest[:8], "big")
+
+
+class HumanizerPool:
+    def __init__(
+        self,
+        replicas: list[HumanizerService],
+        *,
+        probe_interval_seconds: float = 10.0,
+        eject_after_failures: int = 3,
+        prefix_affinity: bool = True,
+        affinity_max_skew: int = 4,
+    ) -> None:
+        if not replicas:
+            raise ValueError("HumanizerPool needs at least one replica")
+        self._replicas = [_Replica(r) for r in replicas]
+        self.probe_interval_seconds = probe_interval_seconds
+        self.eject_after_failures = eject_after_failures
+        self.prefix_affinity = prefix_affinity
+        self.affinity_max_skew = affinity_max_skew
+        self._probe_task: asyncio.Task | None = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return any(r.healthy for r in self._replicas)
+
+    @property
+    def client(self) -> httpx.AsyncClient | None:
+        """HTTP client of a healthy replica (used by the health endpoint)."""
+        for replica in self._replicas:
+            if replica.healthy and replica.service.client is not None:
+                return replica.service.client
+        return None
+
+    async def connect(self) -> None:
+        await asyncio.gather(*(r.service.connect() for r in self._replicas))
+        for replica in self._replicas:
+            replica.healthy = replica.service.is_loaded
+        if self.probe_interval_seconds > 0:
+            self._probe_task = asyncio.create_task(self._probe_loop())
+        logger.info(
+            "Humanizer pool connected",
+            replicas=len(self._replicas),
+            healthy=sum(r.healthy for r in self._replicas),
+        )
+
+    async def disconnect(self) -> None:
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._probe_task
+            self._probe_task = None
+        await asyncio.gather(*(r.service.disconnect() for r in self._replicas))
+        for replica in self._replicas:
+            replica.healthy = False
+
+    async def probe(self) -> None:
+        """Probe every replica once, ejecting or re-admitting as needed."""
+        results = await asyncio.gather(*(r.service.ping() for r in self._replicas))
+        for replica, ok in zip(self._replicas, results):
+            if ok and not replica.healthy:
+                logger.info("Humanizer replica re-admitted", base_url=replica.service.base_url)
+                replica.consecutive_failures = 0
+            elif not ok and replica.healthy:
+                logger.warning("Humanizer replica ejected", base_url=replica.service.base_url)
+            replica.healthy = ok
+
+    async def _probe_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.probe_interval_seconds)
+            try:
+                await self.probe()
+            except Exception as exc:
+                logger.warning("Humanizer pool probe failed", error=str(exc))
+
+    def _pick(self, text: str) -> _Replica:
+        healthy = [r for r in self._replicas if r.routable]
+        if not healthy:
+            open_breakers = [
+                r.service.breaker
+                for r in self._replicas
+                if r.healthy and getattr(r.service, "breaker", None) is not None
+            ]
+            if open_breakers:
+                # Healthy replicas exist, but every one is behind an open breaker
+                raise CircuitOpenError(
+                    "humanizer", min(b.reopens_in() for b in open_breakers)
+                )
+            raise RuntimeError("Humanizer service is not available")
+
+        least = min(r.outstanding for r in healthy)
+        if self.prefix_affinity:
+            key = text.encode()
+            for replica in sorted(healthy, key=lambda r: r.affinity(key), reverse=True):
+                if replica.outstanding <= least + self.affinity_max_skew:
+                    return replica
+        return min(healthy, key=lambda r: r.outstanding)
+
+    def _record(self, replica: _Replica, ok: bool) -> None:
+        if ok:
+            replica.consecutive_failures = 0
+            return
+        replica.consecutive_failures += 1
+        if replica.healthy and replica.consecutive_failures >= self.eject_after_failures:
+            replica.healthy = False
+            logger.warning(
+                "Humanizer replica ejected",
+                base_url=replica.service.base_url,
+                consecutive_failures=replica.consecutive_failures,
+            )
+
+    async def _call(self, text: str, method: str, **kwargs):
+        replica = self._pick(text)
+        replica.outstanding += 1
+        try:
+            result = await getattr(replica.service, method)(text=text, **kwargs)
+        except Exception as exc:
+            if _is_replica_failure(exc):
+                self._record(replica, ok=False)
+            raise
+        finally:
+            replica.outstanding -= 1
+        self._record(replica, ok=True)
+        return result
+
+    async def humanize(
+        self,
+        text: str,
+        temperature: float = settings.TEMPERATURE,
+        max_tokens: int = settings.MAX_OUTPUT_TOKENS,
+    ) -> str:
+        return await self._call(
+            text, "humanize", temperature=temperature, max_tokens=max_tokens
+        )
+
+    async def humanize_many(
+        self,
+        text: str,
+        n: int,
+        temperature: float = settings.TEMPERATURE,
+        max_tokens: int = settings.MAX_OUTPUT_TOKENS,
+    ) -> list[str]:
+        return await self._call(
+            text, "humanize_many", n=n, temperature=temperature, max_tokens=max_tokens
+        )
+
+    async def humanize_stream(
+        self,
+        text: str,
+        temperature: float = settings.TEMPERATURE,
+        max_tokens: int = settings.MAX_OUTPUT_TOKENS,
+    ) -> AsyncIterator[str]:
+        replica = self._pick(text)
+        replica.outstanding += 1
+        try:
+            async for delta in replica.service.humanize_stream(
+                text=text, temperature=temperature, max_tokens=max_tokens
+            ):
+                yield delta
+        except Exception as exc:
+            if _is_replica_failure(exc):
+                self._record(replica, ok=False)
+            raise
+        finally:
+            replica.outstanding -= 1
+        self._record(replica, ok=True)
+
+    def stats(self) -> list[dict]:
+        return [
+            {
+                "base_url": r.service.base_url,
+                "healthy": r.healthy,
+                "outstanding": r.outstanding,
+                "consecutive_failures": r.consecutive_failures,
+            }
+            for r in self._replicas
+        ]
+
+
+def create_humanizer(
+    cache: HumanizeCache | None = None,
+    admission: AdmissionController | None = None,
+) -> HumanizerService | HumanizerPool | None:
+    """Build the configured humanizer: a pool for HUMANIZER_API_URLS, else one service.
+
+    Every replica shares ``admission``, so it caps generations across the pool.
+    """
+    urls = settings.HUMANIZER_API_URLS or (
+        [settings.HUMANIZER_API_URL] if settings.HUMANIZER_API_URL else []
+    )
+    if not urls:
+        return None
+
+    services = [
+        HumanizerService(
+            base_url=url,
+            model_name=settings.HUMANIZER_MODEL_NAME,
+            api_key=settings.HUMANIZER_API_KEY,
+            cache=cache,
+            batch_window_ms=settings.HUMANIZER_BATCH_WINDOW_MS,
+            batch_max_size=settings.HUMANIZER_BATCH_MAX_SIZE,
+            batch_prompt_template=settings.HUMANIZER_BATCH_PROMPT_TEMPLATE,
+            admission=admission,
+        )
+        for url in urls
+    ]
+    if len(services) == 1:
+        return services[0]
+    return HumanizerPool(
+        services,
+        probe_interval_seconds=settings.HUMANIZER_PROBE_INTERVAL_SECONDS,
+        eject_after_failures=settings.HUMANIZER_EJECT_AFTER_FAILURES,
+        prefix_affinity=settings.HUMANIZER_PREFIX_AFFINITY,
+        affinity_max_skew=settings.HUMANIZER_AFFINITY_MAX_SKEW,
+    )
@@ -0,0 +1,380 @@
+"""Redis-backed background jobs for humanize and detect.
+
+The API inserts a ``pending`` row into the requests table and LPUSHes a
+small JSON envelope onto ``JOB_QUEUE_NAME``; ``python -m app.worker`` moves
+envelopes with BLMOVE into its own processing list and runs them with bounded
+concurrency, moving the row through ``processing`` to ``completed`` or
+``failed``. The row is the source of truth for GET /api/jobs/{id}; the queue
+only carries work.
+
+An envelope stays in the worker's processing list until its job finishes, so
+a worker that dies mid-job doesn't lose it. Each worker refreshes a heartbeat
+key every JOB_WORKER_HEARTBEAT_SECONDS and reaps the processing lists of
+workers whose heartbeat expired, pushing their envelopes back onto the queue.
+A job re-queued more than JOB_MAX_REDELIVERIES times (e.g. one that keeps
+crashing workers) is marked failed instead of run again.
+"""
+
+import asyncio
+import contextlib
+import json
+import os
+import socket
+import time
+import uuid
+from dataclasses import dataclass
+
+import httpx
+import structlog
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.db.crud import create_request, update_request
+from app.db.redis import get_redis
+from app.models.database import RequestStatus, RequestType
+from app.models.schemas import DetectRequest, DetectResponse, HumanizeRequest
+from app.services.detectors.fanout import run_detectors, select_detectors
+from app.services.detectors.registry import DetectorRegistry
+from app.services.humanize_cache import HumanizeCache
+from app.services.humanize_runner import resolve_options, run_humanization, to_response
+from app.services.request_log import compact_attempts, compact_detector_results
+
+logger = structlog.get_logger()
+
+
+@dataclass
+class JobContext:
+    """Long-lived dependencies a worker needs to run jobs."""
+
+    session_factory: object
+    humanizer: object | None
+    registry: DetectorRegistry | None
+    http_client: httpx.AsyncClient
+    humanize_cache: HumanizeCache | None = None
+
+
+async def enqueue_job(
+    session: AsyncSession,
+    request_type: RequestType,
+    payload: dict,
+    *,
+    queue_name: str | None = None,
+    user_id: uuid.UUID | None = None,
+) -> uuid.UUID:
+    """Record a pending request and push it onto the job queue."""
+    record = await create_request(
+        session,
+        request_type=request_type,
+        input_text=payload["text"],
+        status=RequestStatus.pending,
+        user_id=user_id,
+        is_job=True,
+    )
+    envelope = {"id": str(record.id), "type": request_type.value, "payload": payload}
+    try:
+        await get_redis().lpush(queue_name or settings.JOB_QUEUE_NAME, json.dumps(envelope))
+    except Exception as exc:
+        await update_request(
+            session,
+            record.id,
+            status=RequestStatus.failed,
+            detector_results={"error": "Failed to enqueue job"},
+        )
+        raise RuntimeError("Failed to enqueue job") from exc
+    return record.id
+
+
+async def _run_humanize(ctx: JobContext, payload: dict) -> tuple[dict, BaseModel]:
+    if ctx.humanizer is None or not ctx.humanizer.is_loaded:
+        raise RuntimeError("Humanizer model is not available")
+
+    body = HumanizeRequest.model_validate(payload)
+    temperature, max_tokens, enable_gate, max_attempts = resolve_options(body)
+    start = time.perf_counter()
+    loop_result = await run_humanization(
+        humanizer=ctx.humanizer,
+        registry=ctx.registry,
+        http_client=ctx.http_client,
+        humanize_cache=ctx.humanize_cache,
+        text=body.text,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        enable_gate=enable_gate,
+        max_attempts=max_attempts if enable_gate else 1,
+    )
+    processing_time_ms = int((time.perf_counter() - start) * 1000)
+    fields = {
+        "output_text": loop_result.humanized_text,
+        "processing_time_ms": processing_time_ms,
+        "ai_score": loop_result.ai_score,
+        "attempts_count": len(loop_result.attempts),
+        "threshold_met": loop_result.threshold_met,
+        "detector_results": compact_attempts(loop_result.attempts),
+    }
+    return fields, to_response(body, loop_result, processing_time_ms)
+
+
+async def _run_detect(ctx: JobContext, payload: dict) -> tuple[dict, BaseModel]:
+    if ctx.registry is None:
+        raise RuntimeError("Detector registry not initialized")
+
+    body = DetectRequest.model_validate(payload)
+    detectors = select_detectors(ctx.registry, body.detectors)
+    start = time.perf_counter()
+    results = await run_detectors(detectors, ctx.http_client, body.text)
+    processing_time_ms = int((time.perf_counter() - start) * 1000)
+    fields = {
+        "processing_time_ms": processing_time_ms,
+        "detector_results": compact_detector_results(results),
+    }
+    return fields, DetectResponse(results=results, processing_time_ms=processing_time_ms)
+
+
+def _result_key(job_id: uuid.UUID) -> str:
+    return f"{settings.JOB_QUEUE_NAME}:result:{job_id}"
+
+
+async def _store_result(job_id: uuid.UUID, response: BaseModel) -> None:
+    """Keep the full response in Redis for JOB_RESULT_TTL_SECONDS.
+
+    The request row only holds the compact layout the synchronous endpoints
+    log; polling clients read the full payload from here until it expires.
+    """
+    try:
+        await get_redis().set(
+            _result_key(job_id),
+            response.model_dump_json(),
+            ex=settings.JOB_RESULT_TTL_SECONDS,
+        )
+    except Exception as exc:
+        logger.warning("Failed to store job result", job_id=str(job_id), error=str(exc))
+
+
+async def load_job_result(job_id: uuid.UUID) -> dict | None:
+    """The stored response of a completed job, or None once it has expired."""
+    try:
+        raw = await get_redis().get(_result_key(job_id))
+    except Exception as exc:
+        logger.warning("Failed to load job result", job_id=str(job_id), error=str(exc))
+        return None
+    return json.loads(raw) if raw is not None else None
+
+
+_JOB_RUNNERS = {
+    RequestType.humanize.value: _run_humanize,
+    RequestType.detect.value: _run_detect,
+}
+
+
+async def _run_job(ctx: JobContext, job: dict) -> None:
+    job_id = uuid.UUID(job["id"])
+    runner = _JOB_RUNNERS.get(job.get("type"))
+
+    async with ctx.session_factory() as session:
+        if runner is None:
+            await update_request(
+                session,
+                job_id,
+                status=RequestStatus.failed,
+                detector_results={"error": f"Unknown job type: {job.get('type')}"},
+            )
+            return
+
+        record = await update_request(session, job_id, status=RequestStatus.processing)
+        if record is None:
+            logger.warning("Dropping job with no request record", job_id=str(job_id))
+            return
+
+        try:
+            fields, response = await runner(ctx, job["payload"])
+        except Exception as exc:
+            logger.error("Job failed", job_id=str(job_id), error=str(exc))
+            await update_request(
+                session,
+                job_id,
+                status=RequestStatus.failed,
+                detector_results={"error": str(exc)},
+            )
+            return
+
+        # Result first, so a client that sees "completed" can fetch it
+        await _store_result(job_id, response)
+        await update_request(session, job_id, status=RequestStatus.completed, **fields)
+        logger.info("Job completed", job_id=str(job_id), type=job["type"])
+
+
+async def run_job(ctx: JobContext, job: dict) -> None:
+    """Run one dequeued job and persist its outcome.
+
+    Never raises: if the row can't be updated (database down, malformed
+    envelope) the error is logged and the job is dropped.
+    """
+    try:
+        await _run_job(ctx, job)
+    except Exception as exc:
+        logger.error("Failed to record job outcome", job_id=job.get("id"), error=str(exc))
+
+
+async def _fail_job(ctx: JobContext, job_id: str, error: str) -> None:
+    try:
+        async with ctx.session_factory() as session:
+            await update_request(
+                session,
+                uuid.UUID(job_id),
+                status=RequestStatus.failed,
+                detector_results={"error": error},
+            )
+    except Exception as exc:
+        logger.error("Failed to record job outcome", job_id=job_id, error=str(exc))
+
+
+def _processing_key(queue_name: str, worker_id: str) -> str:
+    return f"{queue_name}:processing:{worker_id}"
+
+
+def _heartbeat_key(queue_name: str, worker_id: str) -> str:
+    return f"{queue_name}:heartbeat:{worker_id}"
+
+
+def _workers_key(queue_name: str) -> str:
+    return f"{queue_name}:workers"
+
+
+def _redeliveries_key(queue_name: str) -> str:
+    return f"{queue_name}:redeliveries"
+
+
+def _envelope_id(raw: str) -> str | None:
+    try:
+        job = json.loads(raw)
+    except json.JSONDecodeError:
+        return None
+    return job.get("id") if isinstance(job, dict) else None
+
+
+async def reap_dead_workers(redis, queue_name: str) -> int:
+    """Re-queue envelopes held by workers whose heartbeat expired.
+
+    Envelopes are moved back one LMOVE at a time, so a reaper that dies
+    halfway (or two reapers racing) never loses or duplicates one. Returns
+    the number of envelopes re-queued.
+    """
+    requeued = 0
+    for worker_id in await redis.smembers(_workers_key(queue_name)):
+        if await redis.exists(_heartbeat_key(queue_name, worker_id)):
+            continue
+        processing = _processing_key(queue_name, worker_id)
+        count = 0
+        # Oldest envelopes go back to the consuming end of the queue first
+        while (raw := await redis.lmove(processing, queue_name, "RIGHT", "RIGHT")) is not None:
+            count += 1
+            job_id = _envelope_id(raw)
+            if job_id is not None:
+                await redis.hincrby(_redeliveries_key(queue_name), job_id, 1)
+        await redis.srem(_workers_key(queue_name), worker_id)
+        logger.warning("Reaped dead job worker", worker_id=worker_id, requeued=count)
+        requeued += count
+    return requeued
+
+
+async def run_worker(
+    ctx: JobContext,
+    *,
+    queue_name: str | None = None,
+    concurrency: int | None = None,
+    stop: asyncio.Event | None = None,
+    poll_timeout_seconds: int = 1,
+    worker_id: str | None = None,
+    heartbeat_seconds: float | None = None,
+) -> None:
+    """Consume the job queue until ``stop`` is set, running up to ``concurrency`` jobs.
+
+    A slot is reserved before popping, so a saturated worker leaves jobs on
+    the queue for other workers instead of hoarding them.
+    """
+    queue_name = queue_name or settings.JOB_QUEUE_NAME
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    heartbeat_seconds = heartbeat_seconds or settings.JOB_WORKER_HEARTBEAT_SECONDS
+    processing = _processing_key(queue_name, worker_id)
+    heartbeat = _heartbeat_key(queue_name, worker_id)
+    semaphore = asyncio.Semaphore(concurrency or settings.JOB_WORKER_CONCURRENCY)
+    stop = stop or asyncio.Event()
+    redis = get_redis()
+    running: set[asyncio.Task] = set()
+
+    async def beat() -> None:
+        await redis.set(heartbeat, "1", ex=max(1, int(heartbeat_seconds * 3)))
+
+    async def heartbeat_loop() -> None:
+        while True:
+            await asyncio.sleep(heartbeat_seconds)
+            try:
+                await beat()
+                await reap_dead_workers(redis, queue_name)
+            except Exception as exc:
+                logger.warning("Job worker heartbeat failed", error=str(exc))
+
+    async def run_and_release(job: dict | None, raw: str) -> None:
+        try:
+            if job is not None:
+                await run_job(ctx, job)
+            await redis.lrem(processing, 1, raw)
+            job_id = _envelope_id(raw)
+            if job_id is not None:
+                await redis.hdel(_redeliveries_key(queue_name), job_id)
+        except Exception as exc:
+            # The envelope stays in the processing list and is re-run once
+            # this worker's heartbeat expires
+            logger.error("Failed to acknowledge job", error=str(exc))
+        finally:
+            semaphore.release()
+
+    await beat()
+    await redis.sadd(_workers_key(queue_name), worker_id)
+    await reap_dead_workers(redis, queue_name)
+    heartbeat_task = asyncio.create_task(heartbeat_loop())
+
+    logger.info("Job worker started", queue=queue_name, worker_id=worker_id)
+    try:
+        while not stop.is_set():
+            await semaphore.acquire()
+            try:
+                raw = await redis.blmove(
+                    queue_name, processing, poll_timeout_seconds, "RIGHT", "LEFT"
+                )
+            except Exception:
+                semaphore.release()
+                raise
+            if raw is None:
+                semaphore.release()
+                continue
+
+            job = None
+            job_id = _envelope_id(raw)
+            if job_id is None:
+                logger.error("Discarding malformed job envelope", raw=raw[:200])
+            else:
+                redeliveries = int(
+                    await redis.hget(_redeliveries_key(queue_name), job_id) or 0
+                )
+                if redeliveries > settings.JOB_MAX_REDELIVERIES:
+                    logger.error("Giving up on job", job_id=job_id, redeliveries=redeliveries)
+                    await _fail_job(ctx, job_id, "Job was interrupted too many times")
+                else:
+                    job = json.loads(raw)
+
+            task = asyncio.create_task(run_and_release(job, raw))
+            running.add(task)
+            task.add_done_callback(running.discard)
+    finally:
+        # Let in-flight jobs finish so their rows don't stay "processing"
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+        heartbeat_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await heartbeat_task
+        with contextlib.suppress(Exception):
+            # Anything still in the processing list is reaped by another worker
+            await redis.delete(heartbeat)
+        logger.info("Job worker stopped", queue=queue_name, worker_id=worker_id)
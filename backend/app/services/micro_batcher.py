@@ -0,0 +1,87 @@
+"""Collect concurrent small calls into batches for a single upstream request.
+
+Callers ``submit`` an item under a grouping key; items sharing a key are
+held for up to ``window_seconds`` (or until ``max_batch_size`` is reached)
+and then handed to ``run_batch`` together. Each caller gets back the result
+at its own position in the batch, or the batch's exception.
+"""
+
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+import structlog
+
+logger = structlog.get_logger()
+
+BatchRunner = Callable[[Hashable, list[Any]], Awaitable[list[Any]]]
+
+
+class MicroBatcher:
+    def __init__(
+        self, run_batch: BatchRunner, *, window_seconds: float, max_batch_size: int
+    ) -> None:
+        self._run_batch = run_batch
+        self.window_seconds = window_seconds
+        self.max_batch_size = max_batch_size
+        self._pending: dict[Hashable, list[tuple[Any, asyncio.Future]]] = {}
+        self._timers: dict[Hashable, asyncio.TimerHandle] = {}
+        self._running: set[asyncio.Task] = set()
+        self.batches = 0
+        self.items = 0
+
+    async def submit(self, key: Hashable, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        group = self._pending.setdefault(key, [])
+        group.append((item, future))
+
+        if len(group) >= self.max_batch_size:
+            self._flush(key)
+        elif len(group) == 1:
+            self._timers[key] = loop.call_later(self.window_seconds, self._flush, key)
+        return await future
+
+    def _flush(self, key: Hashable) -> None:
+        timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        group = self._pending.pop(key, None)
+        if not group:
+            return
+        task = asyncio.get_running_loop().create_task(self._dispatch(key, group))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _dispatch(self, key: Hashable, group: list[tuple[Any, asyncio.Future]]) -> None:
+        # Callers that gave up while waiting don't need a slot in the batch
+        live = [(item, future) for item, future in group if not future.done()]
+        if not live:
+            return
+
+        self.batches += 1
+        self.items += len(live)
+        try:
+            results = await self._run_batch(key, [item for item, _ in live])
+            if len(results) != len(live):
+                raise RuntimeError(
+                    f"Batch returned {len(results)} results for {len(live)} items"
+                )
+        except Exception as exc:
+            logger.warning("Micro-batch failed", size=len(live), error=str(exc))
+            for _, future in live:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        for (_, future), result in zip(live, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+            "pending": sum(len(g) for g in self._pending.values()),
+        }
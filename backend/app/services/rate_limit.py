@@ -0,0 +1,133 @@
+"""Token-bucket rate limiter that paces callers instead of failing them.
+
+Each ``acquire`` reserves one token and sleeps until that token is due. The
+bucket may go negative: later callers queue behind earlier reservations, so
+a burst is smoothed out to ``rate_per_second`` instead of being rejected.
+The queue is bounded by ``max_wait_seconds``: a caller whose token would be
+due later than that is not queued (its token is never taken, so the bucket
+is left as if it hadn't asked) and gets ``RateLimitExceeded`` instead.
+
+With ``use_redis`` the bucket lives in Redis and is updated by a Lua script
+(atomic, using the Redis server clock), so every uvicorn worker and job
+worker shares one budget. If Redis is unavailable the limiter falls back to
+an in-process bucket, which only bounds this process.
+"""
+
+import asyncio
+import math
+import time
+
+import structlog
+
+from app.db.redis import get_redis
+
+logger = structlog.get_logger()
+
+# KEYS[1] bucket hash; ARGV rate, burst, max wait (< 0: unbounded).
+# Returns {seconds to wait (string), 1 if reserved / 0 if over max wait}.
+_TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local max_wait = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens < 1 then
+  wait = (1 - tokens) / rate
+end
+local reserved = 1
+if max_wait >= 0 and wait > max_wait then
+  reserved = 0
+else
+  tokens = tokens - 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil((burst - tokens) / rate) + 60)
+return {tostring(wait), reserved}
+"""
+
+
+class RateLimitExceeded(RuntimeError):
+    """The caller would wait longer than the limiter's ``max_wait_seconds``."""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} rate limit exceeded; retry in {math.ceil(retry_after)}s")
+        self.name = name
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class TokenBucketLimiter:
+    def __init__(
+        self,
+        name: str,
+        *,
+        rate_per_second: float,
+        burst: float,
+        use_redis: bool = True,
+        max_wait_seconds: float | None = None,
+    ) -> None:
+        self.name = name
+        self.rate_per_second = rate_per_second
+        self.burst = max(1.0, burst)
+        self.use_redis = use_redis
+        self.max_wait_seconds = max_wait_seconds
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self.waited_seconds = 0.0
+        self.rejected = 0
+
+    def _over_max_wait(self, wait: float) -> bool:
+        return self.max_wait_seconds is not None and wait > self.max_wait_seconds
+
+    def _reserve_local(self) -> tuple[float, bool]:
+        now = time.monotonic()
+        self._tokens = min(
+            self.burst, self._tokens + (now - self._updated) * self.rate_per_second
+        )
+        self._updated = now
+        wait = (1 - self._tokens) / self.rate_per_second if self._tokens < 1 else 0.0
+        if self._over_max_wait(wait):
+            return wait, False
+        self._tokens -= 1
+        return wait, True
+
+    async def _reserve(self) -> tuple[float, bool]:
+        if self.use_redis:
+            max_wait = -1 if self.max_wait_seconds is None else self.max_wait_seconds
+            try:
+                wait, reserved = await get_redis().eval(
+                    _TOKEN_BUCKET_LUA,
+                    1,
+                    f"ratelimit:{self.name}",
+                    self.rate_per_second,
+                    self.burst,
+                    max_wait,
+                )
+                return float(wait), bool(int(reserved))
+            except Exception as exc:
+                logger.debug("Rate limiter Redis call failed", limiter=self.name, error=str(exc))
+        return self._reserve_local()
+
+    async def reserve(self) -> float:
+        """Reserve a token; returns the seconds until it is due (caller waits).
+
+        Raises RateLimitExceeded, without taking a token, if that is more
+        than ``max_wait_seconds``.
+        """
+        wait, reserved = await self._reserve()
+        if not reserved:
+            self.rejected += 1
+            raise RateLimitExceeded(self.name, wait)
+        if wait > 0:
+            self.waited_seconds += wait
+        return wait
+
+    async def acquire(self) -> None:
+        """Wait until this caller's token is due."""
+        wait = await self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
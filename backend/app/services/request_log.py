@@ -0,0 +1,217 @@
+"""Write-behind logging of request records.
+
+Handlers ``submit`` a row and return immediately; a background task batches
+queued rows and writes each batch with one multi-row INSERT. The queue is
+bounded: when the database falls behind, new rows are dropped (and counted)
+rather than slowing down requests or growing memory without limit.
+When the database rejects a batch because of a bad row (e.g. the user_id
+of a deleted user), the batch is bisected so only the bad rows are dropped.
+``stop`` flushes whatever is still queued, so a clean shutdown loses
+nothing.
+
+``compact_detector_results`` and ``compact_attempts`` build the
+``detector_results`` JSON for detect and humanize rows. The input text is
+stored once, in ``texts``: per-sentence detector details keep only
+their scores (sentence order follows the input) and humanize attempts
+keep their scores and settings, not their text.
+"""
+
+import asyncio
+import contextlib
+import enum
+from typing import Any
+
+import structlog
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, IntegrityError
+
+from app.db.crud import store_texts
+from app.models.database import RequestRecord, text_hash
+from app.models.schemas import DetectorResult, HumanizeAttempt
+
+logger = structlog.get_logger()
+
+
+def _compact_details(details: dict | None) -> dict | None:
+    if not details:
+        return None
+    compact = dict(details)
+    sentences = compact.get("sentences")
+    if isinstance(sentences, list):
+        compact["sentences"] = [
+            {k: v for k, v in s.items() if k != "sentence"} if isinstance(s, dict) else s
+            for s in sentences
+        ]
+    return compact
+
+
+def compact_detector_results(results: list[DetectorResult]) -> dict[str, Any]:
+    """``{"detectors": {name: {score, label, details?, error?}}}`` for one text."""
+    detectors: dict[str, Any] = {}
+    for result in results:
+        entry: dict[str, Any] = {"score": result.score, "label": result.label}
+        details = _compact_details(result.details)
+        if details is not None:
+            entry["details"] = details
+        if result.error is not None:
+            entry["error"] = result.error
+        detectors[result.detector] = entry
+    return {"detectors": detectors}
+
+
+def compact_attempts(attempts: list[HumanizeAttempt]) -> dict[str, Any]:
+    """``{"attempts": [...]}`` with one small entry per humanize attempt."""
+    entries = []
+    for attempt in attempts:
+        entry: dict[str, Any] = {
+            "attempt": attempt.attempt,
+            "score": attempt.ai_score,
+            "detector": attempt.detector,
+            "temperature": attempt.temperature_used,
+            "output_length": len(attempt.humanized_text),
+        }
+        if attempt.detector_error is not None:
+            entry["error"] = attempt.detector_error
+        entries.append(entry)
+    return {"attempts": entries}
+
+
+class RequestLogWriter:
+    def __init__(
+        self,
+        session_factory,
+        *,
+        max_queue: int = 10_000,
+        batch_size: int = 500,
+        flush_interval_seconds: float = 1.0,
+    ) -> None:
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        # Items are (requests row, texts it references)
+        self._queue: asyncio.Queue[tuple[dict[str, Any], list[str]]] = asyncio.Queue(
+            maxsize=max_queue
+        )
+        self._task: asyncio.Task | None = None
+        self._in_flight: asyncio.Future | None = None
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+
+    def submit(self, **fields: Any) -> bool:
+        """Queue one ``requests`` row; returns False if it had to be dropped.
+
+        Takes ``input_text`` / ``output_text`` like ``create_request``; the
+        texts are stored (compressed, deduplicated) when the batch is
+        flushed. The row is built through the model so every column
+        (including ``id`` and ``created_at``) has a value; multi-row INSERTs
+        need uniform rows.
+        """
+        texts = [fields.pop("input_text")]
+        output_text = fields.pop("output_text", None)
+        if output_text is not None:
+            texts.append(output_text)
+        row = RequestRecord(
+            input_hash=text_hash(texts[0]),
+            output_hash=text_hash(output_text) if output_text is not None else None,
+            **{
+                key: value.value if isinstance(value, enum.Enum) else value
+                for key, value in fields.items()
+            },
+        ).model_dump()
+        try:
+            self._queue.put_nowait((row, texts))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                logger.warning("Request log queue full; dropping records", dropped=self.dropped)
+            return False
+        return True
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background task and flush everything still queued."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        if self._in_flight is not None:
+            await self._in_flight
+        while not self._queue.empty():
+            await self._flush(self._take_batch())
+
+    def _take_batch(self) -> list[tuple[dict[str, Any], list[str]]]:
+        items = []
+        while len(items) < self.batch_size and not self._queue.empty():
+            items.append(self._queue.get_nowait())
+        return items
+
+    async def _collect(self) -> list[tuple[dict[str, Any], list[str]]]:
+        loop = asyncio.get_running_loop()
+        items = [await self._queue.get()]
+        # Wait up to the flush interval for the batch to fill up
+        deadline = loop.time() + self.flush_interval_seconds
+        try:
+            async with asyncio.timeout_at(deadline):
+                while len(items) < self.batch_size:
+                    items.append(await self._queue.get())
+        except TimeoutError:
+            pass
+        except asyncio.CancelledError:
+            # Stopping: hand the partial batch back for the final drain
+            for item in items:
+                try:
+                    self._queue.put_nowait(item)
+                except asyncio.QueueFull:
+                    self.dropped += 1
+            raise
+        return items
+
+    async def _run(self) -> None:
+        while True:
+            items = await self._collect()
+            # A flush that has started runs to completion even if we're stopped
+            self._in_flight = asyncio.ensure_future(self._flush(items))
+            try:
+                await asyncio.shield(self._in_flight)
+            finally:
+                if self._in_flight.done():
+                    self._in_flight = None
+
+    async def _flush(self, items: list[tuple[dict[str, Any], list[str]]]) -> None:
+        if not items:
+            return
+        rows = [row for row, _ in items]
+        try:
+            async with self.session_factory() as session:
+                await store_texts(session, {text for _, texts in items for text in texts})
+                await session.execute(insert(RequestRecord), rows)
+                await session.commit()
+        except (IntegrityError, DataError) as exc:
+            if len(items) == 1:
+                self.dropped += 1
+                logger.warning("Request log row rejected", error=str(exc.orig))
+                return
+            # Retry each half so one bad row doesn't take the batch with it
+            middle = len(items) // 2
+            await self._flush(items[:middle])
+            await self._flush(items[middle:])
+            return
+        except Exception as exc:
+            self.dropped += len(rows)
+            logger.warning("Request log flush failed", rows=len(rows), error=str(exc))
+            return
+        self.written += len(rows)
+        self.batches += 1
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "batches": self.batches,
+        }
@@ -0,0 +1,52 @@
+"""Request coalescing ("single-flight") for concurrent identical calls.
+
+The first caller for a key starts the work in its own task; concurrent
+callers with the same key await that task instead of starting their own.
+Each waiter awaits through ``asyncio.shield``, so one waiter being
+cancelled (e.g. a client disconnect) never cancels the shared work for the
+others. The work is only cancelled once every waiter has gone away.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+
+@dataclass
+class _Flight:
+    task: asyncio.Task
+    waiters: int = 0
+
+
+class SingleFlight:
+    def __init__(self) -> None:
+        self._flights: dict[str, _Flight] = {}
+        self.coalesced = 0
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        flight = self._flights.get(key)
+        if flight is not None and flight.task is task:
+            del self._flights[key]
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``fn()`` once per key among concurrent callers and share the result."""
+        flight = self._flights.get(key)
+        if flight is None:
+            task = asyncio.create_task(fn())
+            flight = _Flight(task=task)
+            self._flights[key] = flight
+            task.add_done_callback(lambda t: self._forget(key, t))
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                self._forget(key, flight.task)
+                flight.task.cancel()
+
+    def in_flight(self) -> int:
+        return len(self._flights)
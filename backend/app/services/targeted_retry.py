@@ -0,0 +1,93 @@
+"""Sentence-targeted re-humanization driven by detector feedback.
+
+When a detector reports which sentences look AI-generated, a retry only
+needs to rewrite those sentences and splice them back into the previous
+output, instead of regenerating the whole text.
+
+Supported detector details:
+- GPTZero: ``sentences`` — list of {"sentence", "generated_prob"}.
+- ZeroGPT: ``h`` — list of highlighted (AI-flagged) sentences.
+"""
+
+import asyncio
+from contextvars import ContextVar
+
+from app.models.schemas import DetectorResult
+
+# GPTZero sentences at or above this probability are treated as flagged
+SENTENCE_FLAG_PROBABILITY = 0.5
+
+_rewriting_segment: ContextVar[bool] = ContextVar("targeted_rewriting_segment", default=False)
+
+
+def rewriting_segment() -> bool:
+    """True inside the humanizer calls that rewrite one flagged segment.
+
+    Those calls run concurrently and each returns a fragment of the attempt,
+    so a streaming humanizer adapter should not stream them.
+    """
+    return _rewriting_segment.get()
+
+
+def flagged_segments(result: DetectorResult | None) -> list[str] | None:
+    """Return the sentences the detector flagged as AI.
+
+    Returns None when the result carries no sentence-level detail, which
+    tells the caller to fall back to full regeneration.
+    """
+    if result is None or not result.details:
+        return None
+    details = result.details
+
+    sentences = details.get("sentences")
+    if isinstance(sentences, list):
+        return [
+            s["sentence"]
+            for s in sentences
+            if isinstance(s, dict)
+            and s.get("sentence")
+            and (s.get("generated_prob") or 0.0) >= SENTENCE_FLAG_PROBABILITY
+        ]
+
+    highlighted = details.get("h")
+    if isinstance(highlighted, list):
+        return [h for h in highlighted if isinstance(h, str) and h.strip()]
+
+    return None
+
+
+async def rewrite_flagged_segments(
+    humanizer,
+    *,
+    text: str,
+    segments: list[str],
+    temperature: float,
+    max_tokens: int,
+) -> str | None:
+    """Rewrite only ``segments`` inside ``text`` and splice them back.
+
+    Returns None if none of the segments can be located in ``text``.
+    """
+    located: list[str] = []
+    for segment in segments:
+        segment = segment.strip()
+        if segment and segment in text and segment not in located:
+            located.append(segment)
+    if not located:
+        return None
+
+    token = _rewriting_segment.set(True)
+    try:
+        rewrites = await asyncio.gather(
+            *(
+                humanizer.humanize(text=s, temperature=temperature, max_tokens=max_tokens)
+                for s in located
+            )
+        )
+    finally:
+        _rewriting_segment.reset(token)
+
+    spliced = text
+    for original, rewritten in zip(located, rewrites):
+        spliced = spliced.replace(original, rewritten.strip(), 1)
+    return spliced
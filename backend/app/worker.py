@@ -0,0 +1,78 @@
+"""Background job worker: ``python -m app.worker``.
+
+Runs separately from the API so humanize/detect capacity can be scaled
+independently of HTTP ingress. Builds its own humanizer client, detector
+registry and pooled HTTP client from the same settings (and the same
+``app.services.builders``) as the API.
+"""
+
+import asyncio
+import signal
+
+import structlog
+
+from app.config import settings
+from app.logging_config import setup_logging
+
+logger = structlog.get_logger()
+
+
+async def _build_humanizer(humanize_cache):
+    from app.services.humanizer_pool import create_humanizer
+
+    humanizer = create_humanizer(cache=humanize_cache)
+    if humanizer is None:
+        logger.warning("HUMANIZER_API_URL not set — humanize jobs will fail")
+        return None
+
+    try:
+        await humanizer.connect()
+    except Exception as exc:
+        logger.warning("Failed to connect to humanizer service", error=str(exc))
+    return humanizer
+
+
+async def main() -> None:
+    setup_logging(debug=settings.DEBUG)
+
+    from app.db.redis import close_redis, init_redis
+    from app.db.session import async_session, close_db, init_db
+    from app.services import builders
+    from app.services.http_client import create_detector_http_client
+    from app.services.jobs import JobContext, run_worker
+
+    await init_db()
+    await init_redis()
+
+    humanize_cache = builders.build_humanize_cache()
+    humanizer = await _build_humanizer(humanize_cache)
+    http_client = create_detector_http_client()
+    registry = builders.build_detector_registry(
+        result_cache=builders.build_detector_cache(),
+        quota=builders.build_detector_quota(),
+    )
+    ctx = JobContext(
+        session_factory=async_session,
+        humanizer=humanizer,
+        registry=registry,
+        http_client=http_client,
+        humanize_cache=humanize_cache,
+    )
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    try:
+        await run_worker(ctx, stop=stop)
+    finally:
+        if humanizer is not None:
+            await humanizer.disconnect()
+        await http_client.aclose()
+        await close_redis()
+        await close_db()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
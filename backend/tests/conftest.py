@@ -0,0 +1,11 @@
+import pytest
+
+from app.services.circuit_breaker import reset_breakers
+
+
+@pytest.fixture(autouse=True)
+def _fresh_circuit_breakers():
+    """Circuit breakers are process-wide; don't let state leak between tests."""
+    reset_breakers()
+    yield
+    reset_breakers()
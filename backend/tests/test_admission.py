@@ -0,0 +1,258 @@
+"""Unit tests for humanizer admission control."""
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.admission import (
+    AdmissionController,
+    AdmissionRejected,
+    Priority,
+    admission_request,
+    priority,
+)
+from app.services.humanizer import HumanizerService
+
+
+def _controller(**kwargs) -> AdmissionController:
+    options = {
+        "max_in_flight": 1,
+        "max_queue": 4,
+        "queue_timeout_seconds": {Priority.interactive: 5.0, Priority.batch: 5.0},
+        "initial_service_seconds": 0.01,
+    }
+    options.update(kwargs)
+    return AdmissionController(**options)
+
+
+async def _hold(controller: AdmissionController, release: asyncio.Event, order: list, tag):
+    async with controller.slot():
+        order.append(tag)
+        await release.wait()
+
+
+@pytest.mark.asyncio
+async def test_interactive_waiters_run_before_batch():
+    controller = _controller()
+    release = asyncio.Event()
+    order: list = []
+
+    holder = asyncio.create_task(_hold(controller, release, order, "holder"))
+    await asyncio.sleep(0)
+
+    async def batch_call():
+        with priority(Priority.batch):
+            async with controller.slot():
+                order.append("batch")
+
+    async def interactive_call():
+        async with controller.slot():
+            order.append("interactive")
+
+    waiters = [asyncio.create_task(batch_call()), asyncio.create_task(interactive_call())]
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(holder, *waiters)
+
+    assert order == ["holder", "interactive", "batch"]
+    assert controller.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_full_queue_rejects_with_retry_after():
+    controller = _controller(max_queue=1)
+    release = asyncio.Event()
+    holder = asyncio.create_task(_hold(controller, release, [], "holder"))
+    await asyncio.sleep(0)
+    queued = asyncio.create_task(controller.acquire())
+    await asyncio.sleep(0)
+
+    with pytest.raises(AdmissionRejected) as info:
+        await controller.acquire()
+    assert info.value.queue_full
+    assert info.value.retry_after >= 1
+
+    release.set()
+    await holder
+    await queued
+    controller.release()
+
+
+@pytest.mark.asyncio
+async def test_interactive_evicts_batch_waiter_when_full():
+    controller = _controller(max_queue=1)
+    release = asyncio.Event()
+    holder = asyncio.create_task(_hold(controller, release, [], "holder"))
+    await asyncio.sleep(0)
+
+    with priority(Priority.batch):
+        batch_waiter = asyncio.create_task(controller.acquire())
+    await asyncio.sleep(0)
+    interactive_waiter = asyncio.create_task(controller.acquire())
+    await asyncio.sleep(0)
+
+    with pytest.raises(AdmissionRejected):
+        await batch_waiter
+    release.set()
+    await holder
+    await interactive_waiter
+    controller.release()
+
+
+@pytest.mark.asyncio
+async def test_estimated_wait_past_deadline_is_shed_immediately():
+    controller = _controller(
+        queue_timeout_seconds={Priority.interactive: 1.0, Priority.batch: 1.0},
+        initial_service_seconds=30.0,
+    )
+    release = asyncio.Event()
+    holder = asyncio.create_task(_hold(controller, release, [], "holder"))
+    await asyncio.sleep(0)
+
+    with pytest.raises(AdmissionRejected) as info:
+        await controller.acquire()
+    assert not info.value.queue_full
+    assert info.value.retry_after == 30
+
+    release.set()
+    await holder
+
+
+@pytest.mark.asyncio
+async def test_queue_timeout_rejects_waiter():
+    controller = _controller(
+        queue_timeout_seconds={Priority.interactive: 0.05, Priority.batch: 0.05}
+    )
+    release = asyncio.Event()
+    holder = asyncio.create_task(_hold(controller, release, [], "holder"))
+    await asyncio.sleep(0)
+
+    with pytest.raises(AdmissionRejected):
+        await controller.acquire()
+    assert controller.stats()["queued"] == 0
+
+    release.set()
+    await holder
+    assert controller.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_admitted_request_is_not_shed_between_generations():
+    controller = _controller(
+        max_queue=1,
+        queue_timeout_seconds={Priority.interactive: 0.05, Priority.batch: 0.05},
+    )
+    release = asyncio.Event()
+    first_done, go_retry = asyncio.Event(), asyncio.Event()
+    order: list = []
+
+    async def gated_request():
+        with admission_request():
+            async with controller.slot():
+                order.append("attempt 1")
+            first_done.set()
+            await go_retry.wait()
+            async with controller.slot():
+                order.append("attempt 2")
+
+    request = asyncio.create_task(gated_request())
+    await first_done.wait()
+    holder = asyncio.create_task(_hold(controller, release, order, "holder"))
+    await asyncio.sleep(0)
+    queued = asyncio.create_task(controller.acquire())  # fills the queue
+    await asyncio.sleep(0)
+
+    # The retry finds the queue full and waits past the deadline, unshed
+    go_retry.set()
+    await asyncio.sleep(0.1)
+    assert not request.done()
+
+    release.set()
+    await asyncio.gather(holder, request)
+    with pytest.raises(AdmissionRejected):
+        await queued
+    assert order == ["attempt 1", "holder", "attempt 2"]
+    assert controller.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_request_deadline_is_shared_across_generations():
+    controller = _controller(
+        max_in_flight=1,
+        queue_timeout_seconds={Priority.interactive: 0.1, Priority.batch: 0.1},
+    )
+    release = asyncio.Event()
+    holder = asyncio.create_task(_hold(controller, release, [], "holder"))
+    await asyncio.sleep(0)
+
+    with admission_request():
+        # Two concurrent generations of one request, neither admitted in time
+        results = await asyncio.gather(
+            controller.acquire(), controller.acquire(), return_exceptions=True
+        )
+    assert all(isinstance(r, AdmissionRejected) for r in results)
+
+    # The deadline started with the first generation; a late one fails fast
+    with admission_request():
+        first = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0.15)
+        with pytest.raises(AdmissionRejected):
+            await first
+        with pytest.raises(AdmissionRejected, match="Timed out"):
+            await controller.acquire()
+
+    release.set()
+    await holder
+
+
+class _CountingController(AdmissionController):
+    def __init__(self):
+        super().__init__(
+            max_in_flight=1,
+            max_queue=1,
+            queue_timeout_seconds={Priority.interactive: 1.0, Priority.batch: 1.0},
+        )
+        self.slots = 0
+
+    async def acquire(self):
+        self.slots += 1
+        await super().acquire()
+
+
+class _HitCache:
+    async def get_output(self, text, temperature, max_tokens):
+        return "cached"
+
+
+@pytest.mark.asyncio
+async def test_cache_hits_do_not_take_a_slot():
+    controller = _CountingController()
+    service = HumanizerService(
+        base_url="http://vllm", model_name="humanizer", cache=_HitCache(),
+        admission=controller,
+    )
+
+    assert await service.humanize("text", temperature=0.1, max_tokens=16) == "cached"
+    assert controller.slots == 0
+
+
+class _RejectingHumanizer:
+    is_loaded = True
+
+    async def humanize(self, *, text, temperature, max_tokens):
+        raise AdmissionRejected("Humanize queue is full", 7, queue_full=True)
+
+
+def test_humanize_endpoint_returns_429_with_retry_after():
+    app.state.humanizer = _RejectingHumanizer()
+    client = TestClient(app, raise_server_exceptions=False)
+
+    response = client.post(
+        "/api/humanize",
+        json={"text": "Overloaded.", "options": {"enable_detector_gate": False}},
+    )
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "7"
@@ -0,0 +1,152 @@
+"""Unit tests for the two-tier (LRU + Redis) cache and its users."""
+
+import pytest
+
+from app.models.schemas import HumanizeAttempt
+from app.services import humanize_runner
+from app.services.cache import TieredCache
+from app.services.detectors.registry import DetectorRegistry
+from app.services.humanize_cache import HumanizeCache
+from app.services.humanize_loop import HumanizeLoopResult
+
+
+@pytest.mark.asyncio
+async def test_get_set_and_stats():
+    cache = TieredCache(namespace="t", max_entries=10, ttl_seconds=60)
+
+    assert await cache.get("k") is None
+    await cache.set("k", {"v": 1})
+    assert await cache.get("k") == {"v": 1}
+
+    stats = cache.stats()
+    assert stats["hits_local"] == 1
+    assert stats["misses"] == 1
+    assert stats["size"] == 1
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction():
+    cache = TieredCache(namespace="t", max_entries=2, ttl_seconds=60)
+    await cache.set("a", 1)
+    await cache.set("b", 2)
+    await cache.get("a")  # a becomes most recently used
+    await cache.set("c", 3)
+
+    assert await cache.get("b") is None
+    assert await cache.get("a") == 1
+    assert await cache.get("c") == 3
+
+
+@pytest.mark.asyncio
+async def test_expired_entries_are_misses():
+    cache = TieredCache(namespace="t", max_entries=2, ttl_seconds=0)
+    await cache.set("a", 1)
+    assert await cache.get("a") is None
+
+
+@pytest.mark.asyncio
+async def test_redis_tier_is_best_effort_when_uninitialized():
+    cache = TieredCache(namespace="t", max_entries=2, ttl_seconds=60, use_redis=True)
+    await cache.set("a", 1)
+    assert await cache.get("a") == 1
+    assert await cache.get("missing") is None
+
+
+# ---------------------------------------------------------------------------
+# Humanization cache
+# ---------------------------------------------------------------------------
+
+def _humanize_cache() -> HumanizeCache:
+    return HumanizeCache(
+        TieredCache(namespace="h", max_entries=8, ttl_seconds=60),
+        model_name="humanizer",
+        prompt_version="v1",
+    )
+
+
+@pytest.mark.asyncio
+async def test_humanize_output_keyed_by_parameters():
+    cache = _humanize_cache()
+    await cache.set_output("text", 0.7, 512, "rewritten")
+
+    assert await cache.get_output("text", 0.7, 512) == "rewritten"
+    assert await cache.get_output("text", 0.8, 512) is None
+    assert await cache.get_output("text", 0.7, 1024) is None
+    assert await cache.get_output("other", 0.7, 512) is None
+
+
+@pytest.mark.asyncio
+async def test_loop_result_round_trip():
+    cache = _humanize_cache()
+    attempt = HumanizeAttempt(
+        attempt=1,
+        humanized_text="out",
+        ai_score=0.2,
+        detector="zerogpt",
+        temperature_used=0.7,
+    )
+    result = HumanizeLoopResult(
+        humanized_text="out",
+        ai_score=0.2,
+        threshold_met=True,
+        attempts=[attempt],
+        threshold=0.35,
+        warning=None,
+    )
+    key = cache.loop_key("text", 0.7, 512, detector="zerogpt", threshold=0.35)
+    await cache.set_loop_result(key, result)
+
+    restored = await cache.get_loop_result(key)
+    assert restored == result
+    assert await cache.get_loop_result(
+        cache.loop_key("text", 0.7, 512, detector="gptzero", threshold=0.35)
+    ) is None
+
+
+@pytest.mark.asyncio
+async def test_sampled_outputs_are_not_cached():
+    cache = HumanizeCache(
+        TieredCache(namespace="h", max_entries=8, ttl_seconds=60),
+        model_name="humanizer",
+        prompt_version="v1",
+        max_output_temperature=0.3,
+    )
+    await cache.set_output("text", 0.95, 512, "sampled")
+    await cache.set_output("text", 0.0, 512, "greedy")
+
+    assert await cache.get_output("text", 0.95, 512) is None
+    assert await cache.get_output("text", 0.0, 512) == "greedy"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("threshold_met, runs", [(True, 1), (False, 2)])
+async def test_gated_run_cached_only_when_threshold_met(monkeypatch, threshold_met, runs):
+    calls = []
+
+    async def fake_loop(**kwargs):
+        calls.append(kwargs["text"])
+        return HumanizeLoopResult(
+            humanized_text="out",
+            ai_score=0.2 if threshold_met else 0.9,
+            threshold_met=threshold_met,
+            attempts=[],
+            threshold=0.35,
+            warning=None,
+        )
+
+    monkeypatch.setattr(humanize_runner, "humanize_with_detector_gate", fake_loop)
+    cache = _humanize_cache()
+    for _ in range(2):
+        await humanize_runner.run_humanization(
+            humanizer=None,
+            registry=DetectorRegistry(),
+            http_client=None,
+            humanize_cache=cache,
+            text="text",
+            temperature=0.7,
+            max_tokens=512,
+            enable_gate=True,
+            max_attempts=3,
+        )
+
+    assert len(calls) == runs
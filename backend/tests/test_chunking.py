@@ -0,0 +1,96 @@
+"""Unit tests for long-input chunking and parallel chunk humanization."""
+
+import asyncio
+
+import pytest
+
+from app.services.chunking import (
+    ChunkedHumanizer,
+    estimate_tokens,
+    reassemble,
+    split_into_chunks,
+)
+
+LONG_TEXT = (
+    "First paragraph sentence one. Sentence two is here.\n\n"
+    "- item one is a list entry\n"
+    "- item two is another entry\n\n"
+    "Final paragraph. It has two sentences.\n"
+)
+
+
+def test_short_text_is_one_chunk():
+    chunks = split_into_chunks("Just a short sentence.", max_chunk_tokens=100)
+    assert len(chunks) == 1
+    assert chunks[0].text == "Just a short sentence."
+
+
+def test_chunks_are_token_bounded_and_round_trip():
+    chunks = split_into_chunks(LONG_TEXT, max_chunk_tokens=10)
+
+    assert len(chunks) > 1
+    assert all(estimate_tokens(c.text) <= 10 for c in chunks)
+    assert reassemble(chunks, [c.text for c in chunks]) == LONG_TEXT
+
+
+def test_list_markers_and_separators_preserved():
+    chunks = split_into_chunks(LONG_TEXT, max_chunk_tokens=8)
+    result = reassemble(chunks, [c.text.upper() for c in chunks])
+
+    assert "\n- ITEM ONE IS A LIST ENTRY\n- ITEM TWO" in result
+    assert result.count("\n\n") == LONG_TEXT.count("\n\n")
+    assert result.endswith(".\n")
+
+
+class _UpperHumanizer:
+    def __init__(self):
+        self.calls: list[str] = []
+        self.max_active = 0
+        self._active = 0
+
+    async def humanize(self, *, text, temperature, max_tokens):
+        self.calls.append(text)
+        self._active += 1
+        self.max_active = max(self.max_active, self._active)
+        await asyncio.sleep(0.01)
+        self._active -= 1
+        return f" {text.upper()} "
+
+    async def humanize_many(self, *, text, n, temperature, max_tokens):
+        return [f"{text.upper()}#{i}" for i in range(n)]
+
+
+@pytest.mark.asyncio
+async def test_chunked_humanizer_runs_chunks_concurrently_in_order():
+    inner = _UpperHumanizer()
+    humanizer = ChunkedHumanizer(inner, max_chunk_tokens=10, max_concurrency=4)
+
+    result = await humanizer.humanize(text=LONG_TEXT, temperature=0.7, max_tokens=64)
+
+    assert result == LONG_TEXT.upper()
+    assert len(inner.calls) > 1
+    assert 1 < inner.max_active <= 4
+
+
+@pytest.mark.asyncio
+async def test_chunked_humanizer_short_input_passes_through():
+    inner = _UpperHumanizer()
+    humanizer = ChunkedHumanizer(inner, max_chunk_tokens=100, max_concurrency=4)
+
+    result = await humanizer.humanize(text="short", temperature=0.7, max_tokens=64)
+
+    assert result == " SHORT "
+    assert inner.calls == ["short"]
+
+
+@pytest.mark.asyncio
+async def test_chunked_humanize_many_zips_candidates():
+    humanizer = ChunkedHumanizer(_UpperHumanizer(), max_chunk_tokens=10, max_concurrency=4)
+
+    candidates = await humanizer.humanize_many(
+        text=LONG_TEXT, n=2, temperature=0.7, max_tokens=64
+    )
+
+    assert len(candidates) == 2
+    assert "#0" in candidates[0] and "#1" not in candidates[0]
+    assert "#1" in candidates[1]
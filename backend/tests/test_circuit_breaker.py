@@ -0,0 +1,192 @@
+"""Unit tests for circuit breakers and their detector/loop integration."""
+
+import httpx
+import pytest
+
+from app.models.schemas import DetectorResult
+from app.services.circuit_breaker import (
+    CircuitBreaker,
+    CircuitOpenError,
+    CircuitState,
+    get_breaker,
+)
+from app.services.detectors.base import BaseDetector
+from app.services.detectors.circuit import CircuitBreakerDetector
+from app.services.detectors.registry import DetectorRegistry
+from app.services.humanize_loop import humanize_with_detector_gate
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _breaker(clock: _Clock, **kwargs) -> CircuitBreaker:
+    options = {
+        "window_seconds": 60,
+        "min_calls": 4,
+        "error_rate_threshold": 0.5,
+        "slow_call_seconds": 10,
+        "slow_call_rate_threshold": 0.8,
+        "open_seconds": 30,
+        "clock": clock,
+    }
+    options.update(kwargs)
+    return CircuitBreaker("test", **options)
+
+
+def _call(breaker: CircuitBreaker, *, ok: bool, duration: float = 0.1) -> None:
+    breaker.allow()
+    breaker.record(ok=ok, duration=duration)
+
+
+def test_opens_on_error_rate_and_fails_fast():
+    clock = _Clock()
+    breaker = _breaker(clock)
+    for ok in (True, False, True, False):
+        _call(breaker, ok=ok)
+
+    assert breaker.state == CircuitState.open
+    with pytest.raises(CircuitOpenError) as info:
+        breaker.allow()
+    assert info.value.retry_after == 30
+
+
+def test_stays_closed_below_min_calls():
+    breaker = _breaker(_Clock())
+    for _ in range(3):
+        _call(breaker, ok=False)
+    assert breaker.state == CircuitState.closed
+
+
+def test_opens_on_slow_call_rate():
+    breaker = _breaker(_Clock())
+    for _ in range(4):
+        _call(breaker, ok=True, duration=15)
+    assert breaker.state == CircuitState.open
+
+
+def test_old_calls_leave_the_window():
+    clock = _Clock()
+    breaker = _breaker(clock)
+    for _ in range(3):
+        _call(breaker, ok=False)
+    clock.now = 120
+    _call(breaker, ok=False)
+    assert breaker.state == CircuitState.closed
+
+
+def test_half_open_trial_closes_or_reopens():
+    clock = _Clock()
+    breaker = _breaker(clock)
+    for _ in range(4):
+        _call(breaker, ok=False)
+
+    clock.now = 31
+    assert breaker.state == CircuitState.half_open
+    breaker.allow()
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()  # only one trial call at a time
+    breaker.record(ok=False, duration=0.1)
+    assert breaker.state == CircuitState.open
+
+    clock.now = 62
+    _call(breaker, ok=True)
+    assert breaker.state == CircuitState.closed
+
+
+class _ErroringDetector(BaseDetector):
+    name = "flaky"
+    display_name = "Flaky"
+    description = "Returns error results"
+
+    def __init__(self, status_code: int | None = None):
+        self.status_code = status_code
+        self.calls = 0
+
+    def is_available(self):
+        return True
+
+    async def detect(self, client, text):
+        self.calls += 1
+        details = None if self.status_code is None else {"status_code": self.status_code}
+        return DetectorResult(
+            detector=self.name, score=None, label=None, details=details, error="failed"
+        )
+
+
+@pytest.mark.asyncio
+async def test_detector_error_results_trip_breaker():
+    inner = _ErroringDetector()
+    detector = CircuitBreakerDetector(inner, _breaker(_Clock()))
+
+    for _ in range(4):
+        await detector.detect(None, "text")
+    with pytest.raises(CircuitOpenError):
+        await detector.detect(None, "text")
+    assert inner.calls == 4
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("status_code", [429, 502])
+async def test_detector_throttling_and_server_errors_trip_breaker(status_code):
+    detector = CircuitBreakerDetector(_ErroringDetector(status_code), _breaker(_Clock()))
+
+    for _ in range(4):
+        await detector.detect(None, "text")
+    with pytest.raises(CircuitOpenError):
+        await detector.detect(None, "text")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("status_code", [400, 413, 422])
+async def test_detector_input_errors_do_not_trip_breaker(status_code):
+    breaker = _breaker(_Clock())
+    detector = CircuitBreakerDetector(_ErroringDetector(status_code), breaker)
+
+    for _ in range(10):
+        await detector.detect(None, "text")
+
+    assert breaker.state == CircuitState.closed
+    assert breaker.stats()["error_rate"] == 0.0
+
+
+class _Humanizer:
+    def __init__(self):
+        self.calls = 0
+
+    async def humanize(self, *, text, temperature, max_tokens):
+        self.calls += 1
+        return "rewritten"
+
+
+@pytest.mark.asyncio
+async def test_loop_skips_detector_with_open_circuit():
+    inner = _ErroringDetector()
+    breaker = get_breaker("detector:flaky")
+    for _ in range(breaker.min_calls):
+        _call(breaker, ok=False)
+
+    registry = DetectorRegistry()
+    registry.register(CircuitBreakerDetector(inner, breaker))
+    humanizer = _Humanizer()
+
+    result = await humanize_with_detector_gate(
+        humanizer=humanizer,
+        registry=registry,
+        http_client=httpx.AsyncClient(),
+        text="input",
+        base_temperature=0.7,
+        max_tokens=64,
+        max_attempts=3,
+        threshold=0.35,
+        detector_name="flaky",
+    )
+
+    assert humanizer.calls == 1
+    assert inner.calls == 0
+    assert result.ai_score is None
+    assert result.warning is not None
@@ -8,8 +8,12 @@ from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlmodel import SQLModel
 
-from app.db.crud import create_request, get_request, list_requests
-from app.models.database import RequestRecord, RequestStatus, RequestType
+from sqlalchemy import func, text
+from sqlmodel import select
+
+from app.db.crud import create_request, get_request, list_requests, update_request
+from app.db.migrations import migrate_request_history, migrate_request_jobs, migrate_texts
+from app.models.database import RequestRecord, RequestStatus, RequestType, TextBlob, text_hash
 
 
 @pytest_asyncio.fixture()
@@ -84,6 +88,30 @@ async def test_get_not_found(session: AsyncSession):
     assert result is None
 
 
+@pytest.mark.asyncio
+async def test_update_request(session: AsyncSession):
+    record = await create_request(
+        session,
+        request_type=RequestType.humanize,
+        input_text="Some input",
+    )
+    updated = await update_request(
+        session,
+        record.id,
+        status=RequestStatus.completed,
+        output_text="Some output",
+        ai_score=0.1,
+    )
+    assert updated.status == "completed"
+    assert updated.output_text == "Some output"
+    assert updated.ai_score == 0.1
+
+
+@pytest.mark.asyncio
+async def test_update_not_found(session: AsyncSession):
+    assert await update_request(session, uuid.uuid4(), status=RequestStatus.failed) is None
+
+
 @pytest.mark.asyncio
 async def test_list_requests(session: AsyncSession):
     for i in range(3):
@@ -116,19 +144,109 @@ async def test_list_filter_by_type(session: AsyncSession):
 
 
 @pytest.mark.asyncio
-async def test_list_pagination(session: AsyncSession):
-    for i in range(5):
+async def test_list_keyset_pagination(session: AsyncSession):
+    created = [
         await create_request(
             session,
             request_type=RequestType.humanize,
             input_text=f"Text {i}",
         )
+        for i in range(5)
+    ]
+
+    seen = []
+    before = None
+    while page := await list_requests(session, limit=2, before=before):
+        seen.extend(page)
+        before = (page[-1].created_at, page[-1].id)
 
-    page1 = await list_requests(session, limit=2, offset=0)
-    assert len(page1) == 2
+    assert [len(seen), len({r.id for r in seen})] == [5, 5]
+    assert {r.id for r in seen} == {r.id for r in created}
+    assert [r.created_at for r in seen] == sorted((r.created_at for r in seen), reverse=True)
+
+
+@pytest.mark.asyncio
+async def test_list_filter_by_user(session: AsyncSession):
+    user_id = uuid.uuid4()
+    await create_request(
+        session, request_type=RequestType.humanize, input_text="mine", user_id=user_id
+    )
+    await create_request(session, request_type=RequestType.humanize, input_text="anon")
 
-    page2 = await list_requests(session, limit=2, offset=2)
-    assert len(page2) == 2
+    records = await list_requests(session, user_id=user_id)
+    assert [r.input_text for r in records] == ["mine"]
 
-    page3 = await list_requests(session, limit=2, offset=4)
-    assert len(page3) == 1
+
+def test_history_cursor_round_trip():
+    from app.api.history import decode_cursor, encode_cursor
+
+    record = RequestRecord(request_type="humanize", input_hash="x")
+    assert decode_cursor(encode_cursor(record)) == (record.created_at, record.id)
+
+
+@pytest.mark.asyncio
+async def test_repeated_texts_are_stored_once(session: AsyncSession):
+    document = "The same long document. " * 200
+    for _ in range(3):
+        await create_request(
+            session,
+            request_type=RequestType.humanize,
+            input_text=document,
+            output_text="Rewritten",
+        )
+
+    blobs = (await session.execute(select(TextBlob))).scalars().all()
+    assert len(blobs) == 2
+    stored = next(b for b in blobs if b.hash == text_hash(document))
+    assert stored.length == len(document)
+    assert len(stored.body) < len(document)  # compressed
+    assert {r.input_text for r in await list_requests(session)} == {document}
+
+
+@pytest.mark.asyncio
+async def test_migrate_legacy_requests_table():
+    engine = create_async_engine("sqlite+aiosqlite://", echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(TextBlob.__table__.create)
+        # The requests table as it was before texts were deduplicated
+        await conn.execute(text(
+            "CREATE TABLE requests ("
+            "id CHAR(32) PRIMARY KEY, request_type VARCHAR(20) NOT NULL, "
+            "input_text TEXT NOT NULL, output_text TEXT, detector_results JSON, "
+            "status VARCHAR(20) NOT NULL, created_at DATETIME NOT NULL, "
+            "processing_time_ms INTEGER, ai_score FLOAT, attempts_count INTEGER, "
+            "threshold_met BOOLEAN)"
+        ))
+        for i, (input_text, output_text) in enumerate(
+            [("shared input", "out 1"), ("shared input", None), ("other input", "out 1")]
+        ):
+            await conn.execute(
+                text(
+                    "INSERT INTO requests (id, request_type, input_text, output_text, "
+                    "status, created_at) VALUES (:id, 'humanize', :input, :output, "
+                    "'completed', '2026-01-01 00:00:00')"
+                ),
+                {"id": uuid.UUID(int=i + 1).hex, "input": input_text, "output": output_text},
+            )
+
+    async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    assert await migrate_texts(async_session, batch_size=2) == 3
+    assert await migrate_texts(async_session) == 0
+    await migrate_request_history(async_session)
+    await migrate_request_history(async_session)
+    await migrate_request_jobs(async_session)
+    await migrate_request_jobs(async_session)
+
+    async with async_session() as s:
+        assert (await s.execute(select(func.count()).select_from(TextBlob))).scalar() == 3
+        record = await get_request(s, uuid.UUID(int=1))
+        assert record.input_text == "shared input"
+        assert record.output_text == "out 1"
+        assert (await get_request(s, uuid.UUID(int=2))).output_text is None
+        assert record.is_job is False
+        indexes = (await s.execute(text(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'requests'"
+        ))).scalars().all()
+        assert "ix_requests_user_created_at_id" in indexes
+
+    await engine.dispose()
@@ -164,6 +164,7 @@ class TestGPTZeroDetector:
         assert result.score is None
         assert result.error is not None
         assert "429" in result.error
+        assert result.details == {"status_code": 429}
 
 
 # ---------------------------------------------------------------------------
@@ -238,6 +239,120 @@ class TestCopyleaksDetector:
         assert result.label == "ai"
         assert result.error is None
 
+    @pytest.mark.asyncio
+    @patch("app.services.detectors.copyleaks.settings")
+    async def test_access_token_reused_across_detects(self, mock_settings):
+        mock_settings.COPYLEAKS_API_KEY = "user@email.com:apikey123"
+        mock_settings.COPYLEAKS_TOKEN_REFRESH_MARGIN_SECONDS = 600.0
+        mock_settings.COPYLEAKS_TOKEN_SHARE_VIA_REDIS = False
+        d = CopyleaksDetector()
+
+        auth_response = MagicMock()
+        auth_response.raise_for_status = MagicMock()
+        auth_response.json.return_value = {"access_token": "fake-token"}
+
+        scan_response = MagicMock()
+        scan_response.raise_for_status = MagicMock()
+        scan_response.json.return_value = {"summary": {"ai": 0.4}}
+
+        client = AsyncMock(spec=httpx.AsyncClient)
+        client.post.side_effect = [auth_response, scan_response, scan_response]
+
+        first = await d.detect(client, "text one")
+        second = await d.detect(client, "text two")
+
+        assert first.score == 0.4
+        assert second.score == 0.4
+        login_calls = [
+            c for c in client.post.call_args_list if "login" in c.args[0]
+        ]
+        assert len(login_calls) == 1
+
+    @pytest.mark.asyncio
+    @patch("app.services.detectors.copyleaks.settings")
+    async def test_concurrent_detects_share_one_login(self, mock_settings):
+        mock_settings.COPYLEAKS_API_KEY = "user@email.com:apikey123"
+        mock_settings.COPYLEAKS_TOKEN_REFRESH_MARGIN_SECONDS = 600.0
+        mock_settings.COPYLEAKS_TOKEN_SHARE_VIA_REDIS = False
+        d = CopyleaksDetector()
+
+        logins = 0
+
+        async def fake_post(url, **kwargs):
+            nonlocal logins
+            response = MagicMock()
+            response.raise_for_status = MagicMock()
+            if "login" in url:
+                logins += 1
+                await asyncio.sleep(0.01)
+                response.json.return_value = {"access_token": "fake-token"}
+            else:
+                response.json.return_value = {"summary": {"ai": 0.1}}
+            return response
+
+        client = AsyncMock(spec=httpx.AsyncClient)
+        client.post.side_effect = fake_post
+
+        results = await asyncio.gather(*(d.detect(client, f"t{i}") for i in range(5)))
+
+        assert all(r.score == 0.1 for r in results)
+        assert logins == 1
+
+    @pytest.mark.asyncio
+    @patch("app.services.detectors.copyleaks.settings")
+    async def test_401_forces_relogin_past_shared_token(self, mock_settings):
+        import json
+        import time
+
+        mock_settings.COPYLEAKS_API_KEY = "user@email.com:apikey123"
+        mock_settings.COPYLEAKS_TOKEN_REFRESH_MARGIN_SECONDS = 600.0
+        mock_settings.COPYLEAKS_TOKEN_SHARE_VIA_REDIS = True
+        d = CopyleaksDetector()
+
+        # Redis still holds a token that Copyleaks has since revoked
+        store = {
+            "copyleaks:access_token": json.dumps(
+                {"access_token": "revoked-token", "expires_at": time.time() + 3600}
+            )
+        }
+        redis = MagicMock()
+        redis.get = AsyncMock(side_effect=lambda key: store.get(key))
+
+        async def fake_set(key, value, ex=None):
+            store[key] = value
+
+        redis.set = AsyncMock(side_effect=fake_set)
+
+        async def fake_post(url, headers=None, **kwargs):
+            response = MagicMock()
+            if "login" in url:
+                response.raise_for_status = MagicMock()
+                response.json.return_value = {"access_token": "new-token"}
+            elif headers["Authorization"] == "Bearer revoked-token":
+                response.status_code = 401
+                response.raise_for_status = MagicMock(
+                    side_effect=httpx.HTTPStatusError(
+                        "unauthorized", request=MagicMock(), response=response
+                    )
+                )
+            else:
+                response.raise_for_status = MagicMock()
+                response.json.return_value = {"summary": {"ai": 0.3}}
+            return response
+
+        client = AsyncMock(spec=httpx.AsyncClient)
+        client.post.side_effect = fake_post
+
+        with patch("app.db.redis.get_redis", return_value=redis):
+            first = await d.detect(client, "text")
+            second = await d.detect(client, "text")
+
+        assert first.error == "Copyleaks API returned 401"
+        assert second.error is None and second.score == 0.3
+        login_calls = [c for c in client.post.call_args_list if "login" in c.args[0]]
+        assert len(login_calls) == 1
+        assert json.loads(store["copyleaks:access_token"])["access_token"] == "new-token"
+
     @pytest.mark.asyncio
     @patch("app.services.detectors.copyleaks.settings")
     async def test_detect_bad_key_format(self, mock_settings):
@@ -303,3 +418,301 @@ class TestFanOut:
         assert results[0].error is None
         assert results[1].score is None
         assert results[1].error == "API down"
+
+    @pytest.mark.asyncio
+    async def test_detect_matrix_caps_concurrency_per_detector(self):
+        from app.services.detectors.fanout import detect_matrix
+
+        class SlowDetector(BaseDetector):
+            name = "slow"
+            display_name = "Slow"
+            description = "Tracks peak concurrency"
+
+            def __init__(self):
+                self.active = 0
+                self.peak = 0
+
+            async def detect(self, client, text):
+                self.active += 1
+                self.peak = max(self.peak, self.active)
+                await asyncio.sleep(0.01)
+                self.active -= 1
+                if text == "bad":
+                    raise RuntimeError("API down")
+                return DetectorResult(
+                    detector=self.name, score=0.1, label="human", details=None, error=None
+                )
+
+            def is_available(self):
+                return True
+
+        detector = SlowDetector()
+        texts = ["a", "b", "bad", "c", "d"]
+        results = [
+            item
+            async for item in detect_matrix(
+                [detector], AsyncMock(spec=httpx.AsyncClient), texts,
+                per_detector_concurrency=2,
+            )
+        ]
+
+        assert sorted(i for i, _ in results) == [0, 1, 2, 3, 4]
+        assert detector.peak == 2
+        failed = [(i, r) for i, r in results if r.error]
+        assert [i for i, _ in failed] == [2]
+        assert failed[0][1].error == "Unexpected error: API down"
+
+    def test_detect_batch_endpoint_streams_ndjson(self):
+        import json
+
+        from fastapi.testclient import TestClient
+
+        from app.main import app
+
+        registry = DetectorRegistry()
+        registry.register(_CountingDetector([
+            DetectorResult(detector="counting", score=0.2, label="human", details=None, error=None),
+            DetectorResult(detector="counting", score=0.9, label="ai", details=None, error=None),
+        ]))
+        previous = getattr(app.state, "detector_registry", None)
+        previous_log = getattr(app.state, "request_log", None)
+        app.state.detector_registry = registry
+        app.state.request_log = MagicMock()
+        request_log = app.state.request_log
+        client = TestClient(app, raise_server_exceptions=False)
+        try:
+            with client.stream(
+                "POST", "/api/detect/batch", json={"texts": ["one", "two"]}
+            ) as response:
+                assert response.status_code == 200
+                lines = [json.loads(line) for line in response.iter_lines() if line]
+        finally:
+            app.state.detector_registry = previous
+            app.state.request_log = previous_log
+
+        assert sorted(line["index"] for line in lines) == [0, 1]
+        assert {line["result"]["detector"] for line in lines} == {"counting"}
+        # One request record per text, carrying its detector results
+        logged = [call.kwargs for call in request_log.submit.call_args_list]
+        assert sorted(row["input_text"] for row in logged) == ["one", "two"]
+        assert all("counting" in row["detector_results"]["detectors"] for row in logged)
+
+
+# ---------------------------------------------------------------------------
+# Shared detector HTTP client
+# ---------------------------------------------------------------------------
+
+class TestDetectorHttpClient:
+    @pytest.mark.asyncio
+    async def test_pool_stats_on_fresh_client(self):
+        from app.services.http_client import create_detector_http_client, pool_stats
+
+        client = create_detector_http_client()
+        try:
+            stats = pool_stats(client)
+            assert stats["connections"] == 0
+            assert stats["active"] == 0
+            assert stats["max_connections"] > 0
+        finally:
+            await client.aclose()
+
+    def test_pool_stats_without_client(self):
+        from app.services.http_client import pool_stats
+
+        assert pool_stats(None) is None
+
+    @pytest.mark.asyncio
+    async def test_borrow_prefers_shared_client(self):
+        from app.services.http_client import borrow_detector_client
+
+        shared = AsyncMock(spec=httpx.AsyncClient)
+        async with borrow_detector_client(shared) as client:
+            assert client is shared
+        shared.aclose.assert_not_called()
+
+
+# ---------------------------------------------------------------------------
+# Detector result cache
+# ---------------------------------------------------------------------------
+
+class _CountingDetector(BaseDetector):
+    name = "counting"
+    display_name = "Counting"
+    description = "Counts calls"
+
+    def __init__(self, results):
+        self.results = list(results)
+        self.calls = 0
+
+    def is_available(self):
+        return True
+
+    async def detect(self, client, text):
+        self.calls += 1
+        return self.results.pop(0)
+
+
+class TestCachedDetector:
+    @pytest.mark.asyncio
+    async def test_repeated_text_served_from_cache(self):
+        from app.services.cache import TieredCache
+        from app.services.detectors.cache import CachedDetector
+
+        inner = _CountingDetector([
+            DetectorResult(detector="counting", score=0.4, label="human", details=None, error=None),
+        ])
+        detector = CachedDetector(inner, TieredCache(namespace="t", max_entries=8, ttl_seconds=60))
+
+        first = await detector.detect(None, "same text")
+        second = await detector.detect(None, "  same text\n")
+
+        assert first == second
+        assert inner.calls == 1
+        assert detector.name == "counting"
+        assert detector.cache.stats()["hits_local"] == 1
+
+    @pytest.mark.asyncio
+    async def test_errors_are_not_cached(self):
+        from app.services.cache import TieredCache
+        from app.services.detectors.cache import CachedDetector
+
+        inner = _CountingDetector([
+            DetectorResult(detector="counting", score=None, label=None, details=None, error="500"),
+            DetectorResult(detector="counting", score=0.2, label="human", details=None, error=None),
+        ])
+        detector = CachedDetector(inner, TieredCache(namespace="t", max_entries=8, ttl_seconds=60))
+
+        first = await detector.detect(None, "text")
+        second = await detector.detect(None, "text")
+
+        assert first.error == "500"
+        assert second.score == 0.2
+        assert inner.calls == 2
+
+    def test_register_defaults_with_cache(self):
+        from app.services.cache import TieredCache
+        from app.services.detectors.cache import CachedDetector
+
+        registry = DetectorRegistry.register_defaults(
+            result_cache=TieredCache(namespace="t", max_entries=8, ttl_seconds=60)
+        )
+        assert all(isinstance(d, CachedDetector) for d in registry.get_all())
+        assert registry.get("zerogpt") is not None
+
+
+# ---------------------------------------------------------------------------
+# Hedged detector calls
+# ---------------------------------------------------------------------------
+
+class _DelayedDetector(BaseDetector):
+    display_name = "Delayed"
+    description = "Sleeps before answering"
+
+    def __init__(self, name, delays, score=0.2):
+        self.name = name
+        self.delays = list(delays)
+        self.score = score
+        self.calls = 0
+
+    def is_available(self):
+        return True
+
+    async def detect(self, client, text):
+        self.calls += 1
+        await asyncio.sleep(self.delays.pop(0))
+        return DetectorResult(
+            detector=self.name, score=self.score, label="human", details=None, error=None
+        )
+
+
+class TestHedgedDetector:
+    @pytest.mark.asyncio
+    async def test_fast_primary_is_not_hedged(self):
+        from app.services.detectors.hedged import HedgedDetector
+
+        inner = _DelayedDetector("primary", [0])
+        detector = HedgedDetector(inner, initial_delay_seconds=0.5, budget_ratio=1.0)
+
+        result = await detector.detect(None, "text")
+
+        assert result.detector == "primary"
+        assert inner.calls == 1
+        assert detector.hedges == 0
+
+    @pytest.mark.asyncio
+    async def test_slow_primary_hedged_with_duplicate(self):
+        from app.services.detectors.hedged import HedgedDetector
+
+        inner = _DelayedDetector("primary", [5, 0])
+        detector = HedgedDetector(inner, initial_delay_seconds=0.01, budget_ratio=1.0)
+
+        result = await asyncio.wait_for(detector.detect(None, "text"), timeout=1)
+
+        assert result.detector == "primary"
+        assert inner.calls == 2
+        assert detector.hedge_wins == 1
+
+    @pytest.mark.asyncio
+    async def test_cached_hedged_result_stays_under_its_detector(self):
+        from app.services.cache import TieredCache
+        from app.services.detectors.cache import CachedDetector, detector_cache_key
+        from app.services.detectors.fanout import run_detectors
+        from app.services.detectors.hedged import HedgedDetector
+
+        cache = TieredCache(namespace="t", max_entries=8, ttl_seconds=60, use_redis=False)
+        primary = CachedDetector(
+            HedgedDetector(
+                _DelayedDetector("zerogpt", [5, 0]),
+                initial_delay_seconds=0.01,
+                budget_ratio=1.0,
+            ),
+            cache,
+        )
+        other = CachedDetector(_DelayedDetector("gptzero", [0], score=0.3), cache)
+
+        results = await asyncio.wait_for(
+            run_detectors([primary, other], None, "text"), timeout=1
+        )
+
+        assert [r.detector for r in results] == ["zerogpt", "gptzero"]
+        cached = await cache.get(detector_cache_key("zerogpt", "text"))
+        assert cached["detector"] == "zerogpt"
+
+    @pytest.mark.asyncio
+    async def test_cache_skips_results_from_another_detector(self):
+        from app.services.cache import TieredCache
+        from app.services.detectors.cache import CachedDetector, detector_cache_key
+
+        class _Impostor(_DelayedDetector):
+            async def detect(self, client, text):
+                result = await super().detect(client, text)
+                return result.model_copy(update={"detector": "gptzero"})
+
+        cache = TieredCache(namespace="t", max_entries=8, ttl_seconds=60, use_redis=False)
+        detector = CachedDetector(_Impostor("zerogpt", [0]), cache)
+
+        await detector.detect(None, "text")
+
+        assert await cache.get(detector_cache_key("zerogpt", "text")) is None
+
+    @pytest.mark.asyncio
+    async def test_budget_caps_hedges(self):
+        from app.services.detectors.hedged import HedgedDetector
+
+        inner = _DelayedDetector("primary", [0.02] * 10)
+        detector = HedgedDetector(inner, initial_delay_seconds=0.001, budget_ratio=0.25)
+
+        for _ in range(4):
+            await detector.detect(None, "text")
+
+        assert detector.hedges == 1
+
+    def test_hedge_delay_tracks_quantile(self):
+        from app.services.detectors.hedged import HedgedDetector
+
+        detector = HedgedDetector(
+            _DelayedDetector("primary", []), min_samples=10, initial_delay_seconds=9.0
+        )
+        assert detector.hedge_delay() == 9.0
+        detector._latencies.extend(i / 10 for i in range(1, 11))
+        assert detector.hedge_delay() == pytest.approx(0.9)
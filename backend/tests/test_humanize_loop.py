@@ -28,6 +28,15 @@ class _FakeHumanizer:
             raise AssertionError("Humanizer called more times than expected")
         return self.outputs.pop(0)
 
+    async def humanize_many(
+        self, *, text: str, n: int, temperature: float, max_tokens: int
+    ) -> list[str]:
+        self.calls.append(
+            {"text": text, "temperature": temperature, "max_tokens": max_tokens, "n": n}
+        )
+        batch, self.outputs = self.outputs[:n], self.outputs[n:]
+        return batch
+
 
 class _ScriptedDetector(BaseDetector):
     """Detector that returns a scripted sequence of (score, error) tuples.
@@ -425,3 +434,382 @@ async def test_temperature_clamped_at_2(http_client):
     assert humanizer.calls[0]["temperature"] == pytest.approx(1.95)
     assert humanizer.calls[1]["temperature"] == pytest.approx(2.00)
     assert humanizer.calls[2]["temperature"] == pytest.approx(2.00)
+
+
+# ---------------------------------------------------------------------------
+# Parallel mode helpers
+# ---------------------------------------------------------------------------
+class _DelayedHumanizer:
+    """Humanizer whose N-th call returns outputs[N] after delays[N] seconds."""
+
+    def __init__(self, outputs: list[str], delays: list[float]):
+        self.outputs = list(outputs)
+        self.delays = list(delays)
+        self.calls: list[dict] = []
+        self.cancelled = 0
+
+    async def humanize(self, *, text: str, temperature: float, max_tokens: int) -> str:
+        index = len(self.calls)
+        self.calls.append(
+            {"text": text, "temperature": temperature, "max_tokens": max_tokens}
+        )
+        try:
+            await asyncio.sleep(self.delays[index])
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return self.outputs[index]
+
+
+class _MappedDetector(BaseDetector):
+    """Detector that scores by looking the text up in a dict."""
+
+    name = "mapped"
+    display_name = "Mapped"
+    description = "Test detector keyed by text"
+
+    def __init__(self, scores: dict):
+        self.scores = scores
+        self.calls: list[str] = []
+
+    def is_available(self) -> bool:
+        return True
+
+    async def detect(self, client, text: str) -> DetectorResult:
+        self.calls.append(text)
+        entry = self.scores[text]
+        if isinstance(entry, BaseException):
+            raise entry
+        return DetectorResult(
+            detector=self.name, score=entry, label=None, details=None, error=None
+        )
+
+
+# ---------------------------------------------------------------------------
+# Case 10: parallel mode returns the first passing attempt and cancels rest
+# ---------------------------------------------------------------------------
+@pytest.mark.asyncio
+async def test_parallel_returns_first_pass_and_cancels(http_client):
+    humanizer = _DelayedHumanizer(
+        outputs=["slow1", "fast2", "slow3"], delays=[0.5, 0.01, 0.5]
+    )
+    detector = _MappedDetector({"slow1": 0.10, "fast2": 0.20, "slow3": 0.10})
+    registry = _registry_with(detector)
+
+    result = await humanize_with_detector_gate(
+        humanizer=humanizer,
+        registry=registry,
+        http_client=http_client,
+        text="input",
+        base_temperature=0.95,
+        max_tokens=1024,
+        max_attempts=3,
+        threshold=0.35,
+        detector_name="mapped",
+        mode="parallel",
+    )
+
+    assert result.threshold_met is True
+    assert result.humanized_text == "fast2"
+    assert [a.attempt for a in result.attempts] == [2]
+    assert result.attempts[0].temperature_used == pytest.approx(1.00)
+    assert len(humanizer.calls) == 3
+    assert humanizer.cancelled == 2
+    assert detector.calls == ["fast2"]
+
+
+# ---------------------------------------------------------------------------
+# Case 11: parallel mode with no passing attempt → best, ladder order
+# ---------------------------------------------------------------------------
+@pytest.mark.asyncio
+async def test_parallel_all_fail_returns_best_in_order(http_client):
+    humanizer = _DelayedHumanizer(
+        outputs=["a1", "a2", "a3"], delays=[0.03, 0.02, 0.01]
+    )
+    detector = _MappedDetector({"a1": 0.80, "a2": 0.45, "a3": 0.60})
+    registry = _registry_with(detector)
+
+    result = await humanize_with_detector_gate(
+        humanizer=humanizer,
+        registry=registry,
+        http_client=http_client,
+        text="input",
+        base_temperature=0.95,
+        max_tokens=1024,
+        max_attempts=3,
+        threshold=0.35,
+        detector_name="mapped",
+        mode="parallel",
+    )
+
+    assert result.threshold_met is False
+    assert result.humanized_text == "a2"
+    assert [a.attempt for a in result.attempts] == [1, 2, 3]
+    assert result.warning is not None
+
+
+# ---------------------------------------------------------------------------
+# Case 12: parallel mode fails fast on detector transport error
+# ---------------------------------------------------------------------------
+@pytest.mark.asyncio
+async def test_parallel_detector_timeout_fails_fast(http_client):
+    humanizer = _DelayedHumanizer(
+        outputs=["a1", "a2", "a3"], delays=[0.01, 0.5, 0.5]
+    )
+    detector = _MappedDetector({"a1": httpx.ConnectError("refused")})
+    registry = _registry_with(detector)
+
+    result = await humanize_with_detector_gate(
+        humanizer=humanizer,
+        registry=registry,
+        http_client=http_client,
+        text="input",
+        base_temperature=0.95,
+        max_tokens=1024,
+        max_attempts=3,
+        threshold=0.35,
+        detector_name="mapped",
+        mode="parallel",
+    )
+
+    assert result.threshold_met is False
+    assert len(result.attempts) == 1
+    assert result.attempts[0].detector_error is not None
+    assert "unavailable" in result.warning.lower()
+    assert humanizer.cancelled == 2
+
+
+@pytest.mark.asyncio
+async def test_unknown_loop_mode_rejected(http_client):
+    with pytest.raises(ValueError):
+        await humanize_with_detector_gate(
+            humanizer=_FakeHumanizer(outputs=[]),
+            registry=DetectorRegistry(),
+            http_client=http_client,
+            text="input",
+            base_temperature=0.95,
+            max_tokens=1024,
+            max_attempts=3,
+            threshold=0.35,
+            detector_name="scripted",
+            mode="bogus",
+        )
+
+
+# ---------------------------------------------------------------------------
+# Case 13: batched mode generates all candidates in one call
+# ---------------------------------------------------------------------------
+@pytest.mark.asyncio
+async def test_batched_single_generation_call(http_client):
+    humanizer = _FakeHumanizer(outputs=["c1", "c2", "c3"])
+    detector = _ScriptedDetector(script=[(0.80, None), (0.30, None)])
+    registry = _registry_with(detector)
+
+    result = await humanize_with_detector_gate(
+        humanizer=humanizer,
+        registry=registry,
+        http_client=http_client,
+        text="input",
+        base_temperature=0.95,
+        max_tokens=1024,
+        max_attempts=3,
+        threshold=0.35,
+        detector_name="scripted",
+        mode="batched",
+    )
+
+    assert result.threshold_met is True
+    assert result.humanized_text == "c2"
+    assert len(result.attempts) == 2
+    assert all(a.temperature_used == pytest.approx(0.95) for a in result.attempts)
+    assert humanizer.calls == [
+        {"text": "input", "temperature": 0.95, "max_tokens": 1024, "n": 3}
+    ]
+    # Scoring stops at the first passing candidate
+    assert detector.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_batched_no_candidates_raises_model_error(http_client):
+    humanizer = _FakeHumanizer(outputs=[])
+    detector = _ScriptedDetector(script=[])
+
+    with pytest.raises(RuntimeError, match="no candidates"):
+        await humanize_with_detector_gate(
+            humanizer=humanizer,
+            registry=_registry_with(detector),
+            http_client=http_client,
+            text="input",
+            base_temperature=0.95,
+            max_tokens=1024,
+            max_attempts=3,
+            threshold=0.35,
+            detector_name="scripted",
+            mode="batched",
+        )
+    assert detector.calls == 0
+
+
+# ---------------------------------------------------------------------------
+# Case 14: pipelined mode overlaps generation and cancels it on a pass
+# ---------------------------------------------------------------------------
+@pytest.mark.asyncio
+async def test_pipelined_cancels_next_generation_on_pass(http_client):
+    humanizer = _DelayedHumanizer(outputs=["a1", "a2"], delays=[0.01, 0.5])
+    detector = _MappedDetector({"a1": 0.20})
+    registry = _registry_with(detector)
+
+    result = await humanize_with_detector_gate(
+        humanizer=humanizer,
+        registry=registry,
+        http_client=http_client,
+        text="input",
+        base_temperature=0.95,
+        max_tokens=1024,
+        max_attempts=2,
+        threshold=0.35,
+        detector_name="mapped",
+        mode="pipelined",
+    )
+
+    assert result.threshold_met is True
+    assert result.humanized_text == "a1"
+    assert len(result.attempts) == 1
+    # Attempt 2 was started speculatively, then cancelled
+    assert len(humanizer.calls) == 2
+    assert humanizer.cancelled == 1
+
+
+# ---------------------------------------------------------------------------
+# Case 15: pipelined mode keeps sequential attempt semantics on misses
+# ---------------------------------------------------------------------------
+@pytest.mark.asyncio
+async def test_pipelined_all_attempts_scored_in_order(http_client):
+    humanizer = _DelayedHumanizer(
+        outputs=["a1", "a2", "a3"], delays=[0.01, 0.01, 0.01]
+    )
+    detector = _MappedDetector({"a1": 0.80, "a2": 0.50, "a3": 0.30})
+    registry = _registry_with(detector)
+
+    result = await humanize_with_detector_gate(
+        humanizer=humanizer,
+        registry=registry,
+        http_client=http_client,
+        text="input",
+        base_temperature=0.95,
+        max_tokens=1024,
+        max_attempts=3,
+        threshold=0.35,
+        detector_name="mapped",
+        mode="pipelined",
+    )
+
+    assert result.threshold_met is True
+    assert result.humanized_text == "a3"
+    assert [a.attempt for a in result.attempts] == [1, 2, 3]
+    assert [a.temperature_used for a in result.attempts] == pytest.approx(
+        [0.95, 1.00, 1.05]
+    )
+    assert detector.calls == ["a1", "a2", "a3"]
+    assert humanizer.cancelled == 0
+
+
+# ---------------------------------------------------------------------------
+# Case 16: targeted mode rewrites only flagged sentences on retry
+# ---------------------------------------------------------------------------
+class _SentenceDetector(BaseDetector):
+    """Flags any sentence containing 'robotic' (ZeroGPT-style ``h`` detail)."""
+
+    name = "sentences"
+    display_name = "Sentences"
+    description = "Test detector with sentence-level feedback"
+
+    def __init__(self):
+        self.calls: list[str] = []
+
+    def is_available(self) -> bool:
+        return True
+
+    async def detect(self, client, text: str) -> DetectorResult:
+        self.calls.append(text)
+        flagged = [s for s in text.split(". ") if "robotic" in s]
+        return DetectorResult(
+            detector=self.name,
+            score=0.9 if flagged else 0.1,
+            label=None,
+            details={"h": flagged},
+            error=None,
+        )
+
+
+@pytest.mark.asyncio
+async def test_targeted_retry_rewrites_flagged_sentences(http_client):
+    humanizer = _FakeHumanizer(
+        outputs=["Fine sentence. A robotic sentence", "A natural sentence"]
+    )
+    detector = _SentenceDetector()
+    registry = _registry_with(detector)
+
+    result = await humanize_with_detector_gate(
+        humanizer=humanizer,
+        registry=registry,
+        http_client=http_client,
+        text="input",
+        base_temperature=0.95,
+        max_tokens=1024,
+        max_attempts=3,
+        threshold=0.35,
+        detector_name="sentences",
+        mode="targeted",
+    )
+
+    assert result.threshold_met is True
+    assert result.humanized_text == "Fine sentence. A natural sentence"
+    assert len(result.attempts) == 2
+    # Second call only rewrote the flagged sentence
+    assert humanizer.calls[1]["text"] == "A robotic sentence"
+    assert humanizer.calls[1]["temperature"] == pytest.approx(1.00)
+
+
+@pytest.mark.asyncio
+async def test_targeted_retry_falls_back_without_detail(http_client):
+    humanizer = _FakeHumanizer(outputs=["a1", "a2"])
+    detector = _ScriptedDetector(script=[(0.80, None), (0.20, None)])
+    registry = _registry_with(detector)
+
+    result = await humanize_with_detector_gate(
+        humanizer=humanizer,
+        registry=registry,
+        http_client=http_client,
+        text="input",
+        base_temperature=0.95,
+        max_tokens=1024,
+        max_attempts=2,
+        threshold=0.35,
+        detector_name="scripted",
+        mode="targeted",
+    )
+
+    assert result.humanized_text == "a2"
+    assert all(c["text"] == "input" for c in humanizer.calls)
+
+
+def test_flagged_segments_from_gptzero_sentences():
+    from app.services.targeted_retry import flagged_segments
+
+    result = DetectorResult(
+        detector="gptzero",
+        score=0.8,
+        label="ai",
+        details={
+            "sentences": [
+                {"sentence": "Human one.", "generated_prob": 0.1},
+                {"sentence": "Machine one.", "generated_prob": 0.9},
+            ]
+        },
+        error=None,
+    )
+    assert flagged_segments(result) == ["Machine one."]
+    assert flagged_segments(
+        DetectorResult(detector="x", score=0.8, label=None, details=None, error=None)
+    ) is None
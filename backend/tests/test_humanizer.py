@@ -1,9 +1,17 @@
-from unittest.mock import MagicMock, patch
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
 
+import httpx
 import pytest
 from fastapi.testclient import TestClient
 
 from app.main import app
+from app.models.schemas import DetectorResult
+from app.services.detectors.base import BaseDetector
+from app.services.detectors.registry import DetectorRegistry
+from app.services.humanize_loop import humanize_with_detector_gate
+from app.services.humanizer import HumanizerService
 
 
 @pytest.fixture
@@ -102,3 +110,338 @@ class TestHumanizeEndpoint:
             json={"text": "Test.", "options": {"max_tokens": 0}},
         )
         assert response.status_code == 422
+
+
+class TestHumanizerService:
+    @pytest.mark.asyncio
+    async def test_humanize_many_uses_n_sampling(self):
+        service = HumanizerService(base_url="http://vllm", model_name="humanizer")
+        service._available = True
+        service.client = AsyncMock(spec=httpx.AsyncClient)
+
+        response = MagicMock()
+        response.status_code = 200
+        response.raise_for_status = MagicMock()
+        response.json.return_value = {
+            "choices": [
+                {"index": 1, "message": {"content": " second "}},
+                {"index": 0, "message": {"content": "first"}},
+            ]
+        }
+        service.client.post.return_value = response
+
+        outputs = await service.humanize_many("text", n=2, temperature=0.9, max_tokens=64)
+
+        assert outputs == ["first", "second"]
+        service.client.post.assert_called_once()
+        payload = service.client.post.call_args.kwargs["json"]
+        assert payload["n"] == 2
+        assert payload["temperature"] == 0.9
+
+    @pytest.mark.asyncio
+    async def test_humanize_stream_parses_sse_deltas(self):
+        body = (
+            'data: {"choices": [{"delta": {"role": "assistant"}}]}\n\n'
+            'data: {"choices": [{"delta": {"content": "Hel"}}]}\n\n'
+            'data: {"choices": [{"delta": {"content": "lo"}}]}\n\n'
+            "data: [DONE]\n\n"
+        )
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            assert b'"stream": true' in request.content or b'"stream":true' in request.content
+            return httpx.Response(200, text=body)
+
+        service = HumanizerService(base_url="http://vllm", model_name="humanizer")
+        service._available = True
+        service.client = httpx.AsyncClient(
+            base_url="http://vllm", transport=httpx.MockTransport(handler)
+        )
+
+        deltas = [d async for d in service.humanize_stream("text", temperature=0.7, max_tokens=32)]
+        await service.client.aclose()
+
+        assert deltas == ["Hel", "lo"]
+
+
+class _StreamingFake:
+    is_loaded = True
+
+    async def humanize_stream(self, *, text, temperature, max_tokens):
+        for part in ["Humanized ", "text."]:
+            yield part
+
+
+class TestHumanizeStreamEndpoint:
+    def test_stream_emits_deltas_then_result(self):
+        app.state.humanizer = _StreamingFake()
+        client = TestClient(app, raise_server_exceptions=False)
+
+        with client.stream(
+            "POST",
+            "/api/humanize/stream",
+            json={"text": "Some text.", "options": {"enable_detector_gate": False}},
+        ) as response:
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("text/event-stream")
+            payload = "".join(response.iter_text())
+
+        events = [
+            block.split("\n", 1) for block in payload.strip().split("\n\n")
+        ]
+        names = [e[0].removeprefix("event: ") for e in events]
+        assert names == ["delta", "delta", "result"]
+        assert '"humanized_text": "Humanized text."' in events[-1][1]
+
+
+class _SegmentDetector(BaseDetector):
+    name = "segments"
+    display_name = "Segments"
+    description = "Flags sentences containing 'robotic'"
+
+    def is_available(self):
+        return True
+
+    async def detect(self, client, text):
+        flagged = [s for s in text.split(". ") if "robotic" in s]
+        return DetectorResult(
+            detector=self.name,
+            score=0.9 if flagged else 0.1,
+            label=None,
+            details={"h": flagged},
+            error=None,
+        )
+
+
+class _SlowStreamingFake:
+    """Streams "<text>!" a word at a time, yielding between words."""
+
+    async def humanize(self, *, text, temperature, max_tokens):
+        return text + "!"
+
+    async def humanize_stream(self, *, text, temperature, max_tokens):
+        for word in (text + "!").split(" "):
+            await asyncio.sleep(0)
+            yield word + " "
+
+
+@pytest.mark.asyncio
+async def test_targeted_retry_streams_spliced_attempt_as_one_delta():
+    from app.api.humanize import _StreamingHumanizer
+
+    registry = DetectorRegistry()
+    registry.register(_SegmentDetector())
+    queue: asyncio.Queue = asyncio.Queue()
+    streaming = _StreamingHumanizer(_SlowStreamingFake(), queue)
+
+    result = await humanize_with_detector_gate(
+        humanizer=streaming,
+        registry=registry,
+        http_client=None,
+        text="A robotic line. Fine line. Another robotic line",
+        base_temperature=0.7,
+        max_tokens=64,
+        max_attempts=2,
+        threshold=0.35,
+        detector_name="segments",
+        mode="targeted",
+        on_attempt=streaming.on_attempt,
+    )
+
+    deltas = []
+    while not queue.empty():
+        deltas.append(queue.get_nowait()[1])
+
+    assert len(result.attempts) == 2
+    assert "".join(d["text"] for d in deltas if d["attempt"] == 1).strip() == (
+        "A robotic line. Fine line. Another robotic line!"
+    )
+    # The two flagged sentences were rewritten concurrently in attempt 2;
+    # instead of their interleaved fragments, the spliced text comes as one delta
+    retry = [d for d in deltas if d["attempt"] == 2]
+    assert retry == [{"attempt": 2, "text": result.attempts[1].humanized_text}]
+
+
+class _BatchFake:
+    is_loaded = True
+
+    async def humanize(self, *, text, temperature, max_tokens):
+        if text == "boom":
+            raise RuntimeError("vLLM error")
+        return text.upper()
+
+
+class TestHumanizeBatchEndpoint:
+    _ITEMS = [
+        {"text": "first", "options": {"enable_detector_gate": False}},
+        {"text": "boom", "options": {"enable_detector_gate": False}},
+        {"text": "third", "options": {"enable_detector_gate": False}},
+    ]
+
+    def test_batch_isolates_item_failures(self):
+        app.state.humanizer = _BatchFake()
+        client = TestClient(app, raise_server_exceptions=False)
+
+        response = client.post("/api/humanize/batch", json={"items": self._ITEMS})
+
+        assert response.status_code == 200
+        items = response.json()["items"]
+        assert [i["index"] for i in items] == [0, 1, 2]
+        assert items[0]["result"]["humanized_text"] == "FIRST"
+        assert items[1]["result"] is None
+        assert items[1]["error"] == "Model inference failed"
+        assert items[2]["result"]["humanized_text"] == "THIRD"
+
+    def test_batch_streams_ndjson(self):
+        app.state.humanizer = _BatchFake()
+        client = TestClient(app, raise_server_exceptions=False)
+
+        with client.stream(
+            "POST", "/api/humanize/batch?stream=true", json={"items": self._ITEMS}
+        ) as response:
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("application/x-ndjson")
+            lines = [json.loads(line) for line in response.iter_lines() if line]
+
+        assert sorted(item["index"] for item in lines) == [0, 1, 2]
+        errors = [item for item in lines if item["error"]]
+        assert [item["index"] for item in errors] == [1]
+
+    def test_batch_rejects_empty(self):
+        app.state.humanizer = _BatchFake()
+        client = TestClient(app, raise_server_exceptions=False)
+
+        response = client.post("/api/humanize/batch", json={"items": []})
+        assert response.status_code == 422
+
+
+class _FakeReplica:
+    def __init__(self, base_url: str, *, up: bool = True):
+        self.base_url = base_url
+        self.client = None
+        self.up = up
+        self.is_loaded = up
+        self.fail = False
+        self.status: int | None = None
+        self.calls = 0
+        self.gate: asyncio.Event | None = None
+
+    async def connect(self):
+        self.is_loaded = self.up
+
+    async def disconnect(self):
+        pass
+
+    async def ping(self):
+        self.is_loaded = self.up
+        return self.up
+
+    async def humanize(self, *, text, temperature, max_tokens):
+        self.calls += 1
+        if self.gate is not None:
+            await self.gate.wait()
+        if self.fail:
+            raise httpx.ConnectError("replica down")
+        if self.status is not None:
+            request = httpx.Request("POST", f"{self.base_url}/v1/chat/completions")
+            raise httpx.HTTPStatusError(
+                "error", request=request, response=httpx.Response(self.status, request=request)
+            )
+        return f"{self.base_url}:{text}"
+
+
+class TestHumanizerPool:
+    async def _pool(self, replicas, **kwargs):
+        from app.services.humanizer_pool import HumanizerPool
+
+        pool = HumanizerPool(replicas, probe_interval_seconds=0, **kwargs)
+        await pool.connect()
+        return pool
+
+    @pytest.mark.asyncio
+    async def test_prefix_affinity_is_stable(self):
+        replicas = [_FakeReplica(f"http://r{i}") for i in range(3)]
+        pool = await self._pool(replicas)
+
+        first = await pool.humanize("same text", temperature=0.7, max_tokens=16)
+        for _ in range(5):
+            assert await pool.humanize("same text", temperature=0.7, max_tokens=16) == first
+
+    @pytest.mark.asyncio
+    async def test_least_outstanding_without_affinity(self):
+        busy, idle = _FakeReplica("http://busy"), _FakeReplica("http://idle")
+        busy.gate = asyncio.Event()
+        pool = await self._pool([busy, idle], prefix_affinity=False)
+
+        blocked = asyncio.create_task(pool.humanize("a", temperature=0.7, max_tokens=16))
+        await asyncio.sleep(0)
+        routed = await pool.humanize("b", temperature=0.7, max_tokens=16)
+        busy.gate.set()
+        await blocked
+
+        assert routed == "http://idle:b"
+        assert busy.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_failing_replica_ejected_then_readmitted(self):
+        bad, good = _FakeReplica("http://bad"), _FakeReplica("http://good")
+        bad.fail = True
+        pool = await self._pool([bad, good], prefix_affinity=False, eject_after_failures=2)
+
+        for _ in range(2):
+            with pytest.raises(httpx.ConnectError):
+                await pool.humanize("x", temperature=0.7, max_tokens=16)
+        assert [r["healthy"] for r in pool.stats()] == [False, True]
+        assert await pool.humanize("x", temperature=0.7, max_tokens=16) == "http://good:x"
+
+        bad.fail = False
+        await pool.probe()
+        assert [r["healthy"] for r in pool.stats()] == [True, True]
+
+    @pytest.mark.asyncio
+    async def test_client_errors_do_not_eject(self):
+        replica = _FakeReplica("http://r")
+        replica.status = 400
+        pool = await self._pool([replica], eject_after_failures=2)
+
+        for _ in range(3):
+            with pytest.raises(httpx.HTTPStatusError):
+                await pool.humanize("x", temperature=0.7, max_tokens=16)
+
+        assert pool.stats()[0]["healthy"]
+        assert pool.stats()[0]["consecutive_failures"] == 0
+
+        replica.status = 503
+        for _ in range(2):
+            with pytest.raises(httpx.HTTPStatusError):
+                await pool.humanize("x", temperature=0.7, max_tokens=16)
+        assert not pool.stats()[0]["healthy"]
+
+    @pytest.mark.asyncio
+    async def test_all_breakers_open_raises_circuit_open(self):
+        from app.services.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+        replicas = [_FakeReplica("http://r1"), _FakeReplica("http://r2")]
+        for replica, open_seconds in zip(replicas, (30, 10)):
+            replica.breaker = CircuitBreaker(
+                replica.base_url,
+                window_seconds=60,
+                min_calls=1,
+                error_rate_threshold=0.5,
+                slow_call_seconds=10,
+                slow_call_rate_threshold=0.5,
+                open_seconds=open_seconds,
+            )
+            replica.breaker.record(ok=False, duration=0.1)
+        pool = await self._pool(replicas)
+
+        with pytest.raises(CircuitOpenError) as excinfo:
+            await pool.humanize("x", temperature=0.7, max_tokens=16)
+        assert excinfo.value.retry_after == 10
+
+    @pytest.mark.asyncio
+    async def test_no_healthy_replicas(self):
+        pool = await self._pool([_FakeReplica("http://down", up=False)])
+
+        assert not pool.is_loaded
+        with pytest.raises(RuntimeError):
+            await pool.humanize("x", temperature=0.7, max_tokens=16)
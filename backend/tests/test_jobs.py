@@ -0,0 +1,337 @@
+"""Unit tests for the background job runner using async SQLite in-memory."""
+
+import asyncio
+import json
+import uuid
+from collections import defaultdict, deque
+from unittest.mock import patch
+
+import httpx
+import pytest
+import pytest_asyncio
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import SQLModel
+
+from app.api.jobs import get_job
+from app.db.crud import create_request, get_request
+from app.models.database import RequestStatus, RequestType
+from app.models.schemas import DetectorResult
+from app.services.detectors.base import BaseDetector
+from app.services.detectors.registry import DetectorRegistry
+from app.services.jobs import (
+    JobContext,
+    load_job_result,
+    reap_dead_workers,
+    run_job,
+    run_worker,
+)
+
+
+class _EchoHumanizer:
+    is_loaded = True
+
+    async def humanize(self, *, text: str, temperature: float, max_tokens: int) -> str:
+        return text.upper()
+
+
+class _BrokenHumanizer:
+    is_loaded = True
+
+    async def humanize(self, *, text: str, temperature: float, max_tokens: int) -> str:
+        raise RuntimeError("vLLM unreachable")
+
+
+class _FixedDetector(BaseDetector):
+    name = "fixed"
+    display_name = "Fixed"
+    description = "Always returns the same score"
+
+    def is_available(self) -> bool:
+        return True
+
+    async def detect(self, client, text: str) -> DetectorResult:
+        return DetectorResult(
+            detector=self.name, score=0.1, label="human", details=None, error=None
+        )
+
+
+@pytest_asyncio.fixture()
+async def session_factory():
+    engine = create_async_engine("sqlite+aiosqlite://", echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    yield sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+def _context(session_factory, humanizer) -> JobContext:
+    registry = DetectorRegistry()
+    registry.register(_FixedDetector())
+    return JobContext(
+        session_factory=session_factory,
+        humanizer=humanizer,
+        registry=registry,
+        http_client=httpx.AsyncClient(),
+    )
+
+
+async def _pending(session_factory, request_type: RequestType, text: str, **kwargs):
+    async with session_factory() as session:
+        return await create_request(
+            session, request_type=request_type, input_text=text, is_job=True, **kwargs
+        )
+
+
+async def _fetch(session_factory, record_id):
+    async with session_factory() as session:
+        return await get_request(session, record_id)
+
+
+@pytest.mark.asyncio
+async def test_humanize_job_completes(session_factory):
+    record = await _pending(session_factory, RequestType.humanize, "hello")
+    job = {
+        "id": str(record.id),
+        "type": "humanize",
+        "payload": {"text": "hello", "options": {"enable_detector_gate": False}},
+    }
+
+    redis = _FakeRedis()
+    with patch("app.services.jobs.get_redis", return_value=redis):
+        await run_job(_context(session_factory, _EchoHumanizer()), job)
+        result = await load_job_result(record.id)
+
+    stored = await _fetch(session_factory, record.id)
+    assert stored.status == RequestStatus.completed.value
+    assert stored.output_text == "HELLO"
+    # The row keeps the compact layout; the full response lives in Redis
+    assert stored.detector_results["attempts"][0]["output_length"] == 5
+    assert "humanized_text" not in stored.detector_results["attempts"][0]
+    assert result["humanized_text"] == "HELLO"
+    assert result["attempts"][0]["humanized_text"] == "HELLO"
+
+
+@pytest.mark.asyncio
+async def test_detect_job_completes(session_factory):
+    record = await _pending(session_factory, RequestType.detect, "check me")
+    job = {"id": str(record.id), "type": "detect", "payload": {"text": "check me"}}
+
+    redis = _FakeRedis()
+    with patch("app.services.jobs.get_redis", return_value=redis):
+        await run_job(_context(session_factory, None), job)
+        result = await load_job_result(record.id)
+
+    stored = await _fetch(session_factory, record.id)
+    assert stored.status == RequestStatus.completed.value
+    assert stored.detector_results == {"detectors": {"fixed": {"score": 0.1, "label": "human"}}}
+    assert [r["detector"] for r in result["results"]] == ["fixed"]
+
+
+@pytest.mark.asyncio
+async def test_job_completes_when_result_cannot_be_stored(session_factory):
+    record = await _pending(session_factory, RequestType.detect, "check me")
+    job = {"id": str(record.id), "type": "detect", "payload": {"text": "check me"}}
+
+    with patch("app.services.jobs.get_redis", side_effect=RuntimeError("Redis is down")):
+        await run_job(_context(session_factory, None), job)
+        assert await load_job_result(record.id) is None
+
+    stored = await _fetch(session_factory, record.id)
+    assert stored.status == RequestStatus.completed.value
+
+
+@pytest.mark.asyncio
+async def test_failed_job_records_error(session_factory):
+    record = await _pending(session_factory, RequestType.humanize, "hello")
+    job = {"id": str(record.id), "type": "humanize", "payload": {"text": "hello"}}
+
+    await run_job(_context(session_factory, _BrokenHumanizer()), job)
+
+    stored = await _fetch(session_factory, record.id)
+    assert stored.status == RequestStatus.failed.value
+    assert stored.detector_results == {"error": "vLLM unreachable"}
+
+
+@pytest.mark.asyncio
+async def test_humanize_job_without_model_fails(session_factory):
+    record = await _pending(session_factory, RequestType.humanize, "hello")
+    job = {"id": str(record.id), "type": "humanize", "payload": {"text": "hello"}}
+
+    await run_job(_context(session_factory, None), job)
+
+    stored = await _fetch(session_factory, record.id)
+    assert stored.status == RequestStatus.failed.value
+    assert "not available" in stored.detector_results["error"]
+
+
+@pytest.mark.asyncio
+async def test_run_job_survives_database_errors():
+    def broken_factory():
+        raise RuntimeError("database is down")
+
+    job = {"id": "00000000-0000-0000-0000-000000000001", "type": "detect", "payload": {}}
+    await run_job(_context(broken_factory, None), job)
+
+
+class _FakeRedis:
+    """In-memory stand-in for the handful of Redis commands the worker uses."""
+
+    def __init__(self):
+        self.lists = defaultdict(deque)
+        self.keys = {}
+        self.sets = defaultdict(set)
+        self.hashes = defaultdict(dict)
+
+    async def lpush(self, key, value):
+        self.lists[key].appendleft(value)
+
+    async def lmove(self, src, dst, src_side, dst_side):
+        if not self.lists[src]:
+            return None
+        value = self.lists[src].pop() if src_side == "RIGHT" else self.lists[src].popleft()
+        if dst_side == "RIGHT":
+            self.lists[dst].append(value)
+        else:
+            self.lists[dst].appendleft(value)
+        return value
+
+    async def blmove(self, src, dst, timeout, src_side, dst_side):
+        value = await self.lmove(src, dst, src_side, dst_side)
+        if value is None:
+            await asyncio.sleep(0.01)
+        return value
+
+    async def lrem(self, key, count, value):
+        if value in self.lists[key]:
+            self.lists[key].remove(value)
+
+    async def set(self, key, value, ex=None):
+        self.keys[key] = value
+
+    async def get(self, key):
+        return self.keys.get(key)
+
+    async def exists(self, key):
+        return int(key in self.keys)
+
+    async def delete(self, key):
+        self.keys.pop(key, None)
+
+    async def sadd(self, key, member):
+        self.sets[key].add(member)
+
+    async def srem(self, key, member):
+        self.sets[key].discard(member)
+
+    async def smembers(self, key):
+        return set(self.sets[key])
+
+    async def hincrby(self, key, field, amount):
+        self.hashes[key][field] = int(self.hashes[key].get(field, 0)) + amount
+
+    async def hget(self, key, field):
+        return self.hashes[key].get(field)
+
+    async def hdel(self, key, field):
+        self.hashes[key].pop(field, None)
+
+
+async def _run_worker_until(ctx, redis, done) -> None:
+    stop = asyncio.Event()
+    with patch("app.services.jobs.get_redis", return_value=redis):
+        worker = asyncio.create_task(
+            run_worker(ctx, queue_name="q", stop=stop, worker_id="w1", heartbeat_seconds=60)
+        )
+        for _ in range(100):
+            if await done():
+                break
+            await asyncio.sleep(0.01)
+        stop.set()
+        await worker
+
+
+@pytest.mark.asyncio
+async def test_worker_acknowledges_finished_jobs(session_factory):
+    record = await _pending(session_factory, RequestType.detect, "check me")
+    redis = _FakeRedis()
+    await redis.lpush(
+        "q", json.dumps({"id": str(record.id), "type": "detect", "payload": {"text": "check me"}})
+    )
+
+    async def completed():
+        stored = await _fetch(session_factory, record.id)
+        return stored.status == RequestStatus.completed.value
+
+    await _run_worker_until(_context(session_factory, None), redis, completed)
+
+    assert await completed()
+    assert not redis.lists["q"]
+    assert not redis.lists["q:processing:w1"]
+    assert "q:heartbeat:w1" not in redis.keys
+
+
+@pytest.mark.asyncio
+async def test_reaper_requeues_jobs_of_dead_workers():
+    redis = _FakeRedis()
+    envelope = json.dumps({"id": "job-1", "type": "detect", "payload": {}})
+    await redis.sadd("q:workers", "dead")
+    await redis.lpush("q:processing:dead", envelope)
+    await redis.sadd("q:workers", "alive")
+    await redis.set("q:heartbeat:alive", "1")
+    await redis.lpush("q:processing:alive", "in flight")
+
+    assert await reap_dead_workers(redis, "q") == 1
+
+    assert list(redis.lists["q"]) == [envelope]
+    assert redis.hashes["q:redeliveries"] == {"job-1": 1}
+    assert await redis.smembers("q:workers") == {"alive"}
+    assert list(redis.lists["q:processing:alive"]) == ["in flight"]
+
+
+@pytest.mark.asyncio
+async def test_job_redelivered_too_often_is_failed(session_factory):
+    record = await _pending(session_factory, RequestType.detect, "check me")
+    redis = _FakeRedis()
+    await redis.lpush(
+        "q", json.dumps({"id": str(record.id), "type": "detect", "payload": {"text": "check me"}})
+    )
+    redis.hashes["q:redeliveries"][str(record.id)] = 99
+
+    async def failed():
+        stored = await _fetch(session_factory, record.id)
+        return stored.status == RequestStatus.failed.value
+
+    await _run_worker_until(_context(session_factory, None), redis, failed)
+
+    stored = await _fetch(session_factory, record.id)
+    assert stored.status == RequestStatus.failed.value
+    assert "interrupted" in stored.detector_results["error"]
+    assert not redis.lists["q:processing:w1"]
+
+
+@pytest.mark.asyncio
+async def test_job_status_only_visible_to_its_submitter(session_factory):
+    owner, other = uuid.uuid4(), uuid.uuid4()
+    record = await _pending(session_factory, RequestType.detect, "check me", user_id=owner)
+
+    async with session_factory() as session:
+        status = await get_job(record.id, session=session, user_id=owner)
+        assert status.status == RequestStatus.pending.value
+
+        for caller in (other, None):
+            with pytest.raises(HTTPException) as excinfo:
+                await get_job(record.id, session=session, user_id=caller)
+            assert excinfo.value.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_job_status_hides_non_job_requests(session_factory):
+    async with session_factory() as session:
+        record = await create_request(
+            session, request_type=RequestType.detect, input_text="synchronous"
+        )
+        with pytest.raises(HTTPException) as excinfo:
+            await get_job(record.id, session=session, user_id=None)
+    assert excinfo.value.status_code == 404
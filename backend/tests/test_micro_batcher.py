@@ -0,0 +1,151 @@
+"""Unit tests for the micro-batcher and batched HumanizerService calls."""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.services.humanizer import HumanizerService
+from app.services.micro_batcher import MicroBatcher
+
+
+_CHATML = "<|im_start|>user\n{content}<|im_end|>\n<|im_start|>assistant\n"
+
+
+def _render_chatml(messages: list[dict]) -> str:
+    """What vLLM's chat template makes of /v1/chat/completions messages."""
+    turns = "".join(
+        f"<|im_start|>{m['role']}\n{m['content']}<|im_end|>\n" for m in messages
+    )
+    return turns + "<|im_start|>assistant\n"
+
+
+class _Recorder:
+    def __init__(self, fail: bool = False):
+        self.batches: list[tuple] = []
+        self.fail = fail
+
+    async def __call__(self, key, items):
+        self.batches.append((key, list(items)))
+        await asyncio.sleep(0)
+        if self.fail:
+            raise RuntimeError("upstream down")
+        return [f"{key}:{item}" for item in items]
+
+
+@pytest.mark.asyncio
+async def test_items_within_window_share_one_batch():
+    runner = _Recorder()
+    batcher = MicroBatcher(runner, window_seconds=0.01, max_batch_size=10)
+
+    results = await asyncio.gather(*(batcher.submit("k", i) for i in range(3)))
+
+    assert results == ["k:0", "k:1", "k:2"]
+    assert runner.batches == [("k", [0, 1, 2])]
+    assert batcher.stats()["mean_batch_size"] == 3
+
+
+@pytest.mark.asyncio
+async def test_full_batch_flushes_before_window():
+    runner = _Recorder()
+    batcher = MicroBatcher(runner, window_seconds=10, max_batch_size=2)
+
+    results = await asyncio.wait_for(
+        asyncio.gather(batcher.submit("k", "a"), batcher.submit("k", "b")), timeout=1
+    )
+
+    assert results == ["k:a", "k:b"]
+
+
+@pytest.mark.asyncio
+async def test_keys_are_batched_separately():
+    runner = _Recorder()
+    batcher = MicroBatcher(runner, window_seconds=0.01, max_batch_size=10)
+
+    await asyncio.gather(batcher.submit("x", 1), batcher.submit("y", 2), batcher.submit("x", 3))
+
+    assert sorted(runner.batches) == [("x", [1, 3]), ("y", [2])]
+
+
+@pytest.mark.asyncio
+async def test_batch_failure_reaches_every_caller():
+    batcher = MicroBatcher(_Recorder(fail=True), window_seconds=0.01, max_batch_size=10)
+
+    results = await asyncio.gather(
+        batcher.submit("k", 1), batcher.submit("k", 2), return_exceptions=True
+    )
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+@pytest.mark.asyncio
+async def test_humanizer_demuxes_completions_by_choice_index():
+    requests: list[dict] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        assert request.url.path == "/v1/completions"
+        body = json.loads(request.content)
+        requests.append(body)
+        choices = [
+            {"index": i, "text": f" out-{i} "} for i in range(len(body["prompt"]))
+        ]
+        return httpx.Response(200, json={"choices": list(reversed(choices))})
+
+    service = HumanizerService(
+        base_url="http://vllm", model_name="humanizer",
+        batch_window_ms=10, batch_max_size=8, batch_prompt_template=_CHATML,
+    )
+    service._available = True
+    service.client = httpx.AsyncClient(
+        base_url="http://vllm", transport=httpx.MockTransport(handler)
+    )
+
+    outputs = await asyncio.gather(
+        *(service.humanize(f"text {i}", temperature=0.7, max_tokens=32) for i in range(3))
+    )
+    await service.client.aclose()
+
+    assert outputs == ["out-0", "out-1", "out-2"]
+    assert len(requests) == 1
+    assert len(requests[0]["prompt"]) == 3
+    assert "Input text:\ntext 2" in requests[0]["prompt"][2]
+
+
+def test_batching_requires_a_prompt_template():
+    with pytest.raises(ValueError, match="HUMANIZER_BATCH_PROMPT_TEMPLATE"):
+        HumanizerService(
+            base_url="http://vllm", model_name="humanizer",
+            batch_window_ms=10, batch_max_size=8,
+        )
+
+
+@pytest.mark.asyncio
+async def test_batched_and_unbatched_calls_send_the_same_prompt():
+    prompts: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        if request.url.path == "/v1/chat/completions":
+            prompts.append(_render_chatml(body["messages"]))
+            return httpx.Response(200, json={"choices": [{"message": {"content": "out"}}]})
+        prompts.extend(body["prompt"])
+        return httpx.Response(200, json={"choices": [{"index": 0, "text": "out"}]})
+
+    outputs = []
+    for batch_window_ms in (0, 10):
+        service = HumanizerService(
+            base_url="http://vllm", model_name="humanizer",
+            batch_window_ms=batch_window_ms, batch_max_size=8,
+            batch_prompt_template=_CHATML,
+        )
+        service._available = True
+        service.client = httpx.AsyncClient(
+            base_url="http://vllm", transport=httpx.MockTransport(handler)
+        )
+        outputs.append(await service.humanize("Some text.", temperature=0.7, max_tokens=32))
+        await service.client.aclose()
+
+    assert outputs == ["out", "out"]
+    assert len(prompts) == 2
+    assert prompts[0] == prompts[1]
@@ -0,0 +1,191 @@
+"""Unit tests for detector rate limiting and quota accounting."""
+
+import asyncio
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models.schemas import DetectorResult
+from app.services.detectors.base import BaseDetector
+from app.services.circuit_breaker import CircuitBreaker, CircuitState
+from app.services.detectors.circuit import CircuitBreakerDetector
+from app.services.detectors.hedged import HedgedDetector
+from app.services.detectors.limits import (
+    DetectorQuota,
+    RateLimitedDetector,
+    current_period,
+    detect_with_provider_timeout,
+)
+from app.services.detectors.fanout import run_detectors
+from app.services.rate_limit import RateLimitExceeded, TokenBucketLimiter
+
+
+class _EchoDetector(BaseDetector):
+    name = "echo"
+    display_name = "Echo"
+    description = "Returns a fixed score"
+
+    def is_available(self):
+        return True
+
+    async def detect(self, client, text):
+        return DetectorResult(
+            detector=self.name, score=0.1, label="human", details=None, error=None
+        )
+
+
+@pytest.mark.asyncio
+async def test_limiter_paces_calls_beyond_burst():
+    limiter = TokenBucketLimiter("t", rate_per_second=20, burst=1, use_redis=False)
+
+    start = time.monotonic()
+    for _ in range(3):
+        await limiter.acquire()
+    elapsed = time.monotonic() - start
+
+    # First token is free, the next two are paced 50 ms apart
+    assert elapsed >= 0.09
+    assert limiter.waited_seconds > 0
+
+
+@pytest.mark.asyncio
+async def test_limiter_without_redis_falls_back_to_local():
+    limiter = TokenBucketLimiter("t", rate_per_second=1000, burst=10, use_redis=True)
+    await limiter.acquire()
+    assert limiter.waited_seconds == 0
+
+
+@pytest.mark.asyncio
+async def test_limiter_fails_fast_past_max_wait_without_taking_a_token():
+    limiter = TokenBucketLimiter(
+        "t", rate_per_second=10, burst=1, use_redis=False, max_wait_seconds=0.15
+    )
+    assert await limiter.reserve() == 0
+    assert await limiter.reserve() == pytest.approx(0.1, abs=0.01)
+
+    with pytest.raises(RateLimitExceeded) as excinfo:
+        await limiter.reserve()
+    assert excinfo.value.retry_after == 1
+    assert limiter.rejected == 1
+
+    # The rejected caller left the queue as it was: the next token is still
+    # due 100 ms after the second one, not 200 ms
+    await asyncio.sleep(0.1)
+    assert await limiter.reserve() == pytest.approx(0.1, abs=0.02)
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_call_past_max_wait_is_a_detector_error():
+    breaker = CircuitBreaker(
+        "capped",
+        window_seconds=60,
+        min_calls=1,
+        error_rate_threshold=0.5,
+        slow_call_seconds=10,
+        slow_call_rate_threshold=0.5,
+        open_seconds=30,
+    )
+    limiter = TokenBucketLimiter(
+        "t", rate_per_second=1, burst=1, use_redis=False, max_wait_seconds=0.5
+    )
+    quota = DetectorQuota(use_redis=False)
+    detector = CircuitBreakerDetector(
+        RateLimitedDetector(_EchoDetector(), limiter=limiter, quota=quota), breaker
+    )
+    await detector.detect(None, "x")
+
+    start = time.monotonic()
+    [result] = await run_detectors([detector], None, "y")
+
+    assert time.monotonic() - start < 0.5
+    assert result.score is None
+    assert "rate limit exceeded" in result.error
+    # Shed before the provider: not a provider failure, not a billed call
+    assert breaker.state == CircuitState.closed
+    assert (await quota.usage())["echo"]["calls"] == 1
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_detector_records_usage():
+    quota = DetectorQuota(use_redis=False)
+    detector = RateLimitedDetector(_EchoDetector(), limiter=None, quota=quota)
+
+    await detector.detect(None, "12345")
+    await detector.detect(None, "123")
+
+    assert await quota.usage() == {"echo": {"calls": 2, "characters": 8}}
+    assert await quota.usage("1999-01") == {}
+
+
+def _paced_echo(rate_per_second: float) -> RateLimitedDetector:
+    return RateLimitedDetector(
+        _EchoDetector(),
+        limiter=TokenBucketLimiter("t", rate_per_second=rate_per_second, burst=1, use_redis=False),
+        quota=DetectorQuota(use_redis=False),
+    )
+
+
+@pytest.mark.asyncio
+async def test_pacing_is_not_counted_as_slow_by_the_breaker():
+    breaker = CircuitBreaker(
+        "paced",
+        window_seconds=60,
+        min_calls=2,
+        error_rate_threshold=0.5,
+        slow_call_seconds=0.1,
+        slow_call_rate_threshold=0.5,
+        open_seconds=30,
+    )
+    detector = CircuitBreakerDetector(_paced_echo(5), breaker)
+
+    # A burst of 3: the last two wait 200 and 400 ms for their tokens
+    await asyncio.gather(*(detector.detect(None, "x") for _ in range(3)))
+
+    assert breaker.state == CircuitState.closed
+
+
+@pytest.mark.asyncio
+async def test_pacing_does_not_trigger_hedges():
+    detector = HedgedDetector(_paced_echo(5), initial_delay_seconds=0.1, budget_ratio=1.0)
+
+    # Queued 200 and 400 ms behind the limiter, well past the hedge delay
+    results = await asyncio.gather(*(detector.detect(None, "x") for _ in range(3)))
+
+    assert all(r.score == 0.1 for r in results)
+    assert detector.hedges == 0
+
+
+@pytest.mark.asyncio
+async def test_provider_timeout_excludes_pacing():
+    detector = _paced_echo(5)
+    await detector.detect(None, "x")  # use up the burst; the next call waits 200 ms
+
+    result = await detect_with_provider_timeout(detector, None, "x", timeout_seconds=0.1)
+
+    assert result.score == 0.1
+
+
+def test_quota_endpoint_reports_usage_and_remaining(monkeypatch):
+    from app.config import settings
+
+    quota = DetectorQuota(use_redis=False)
+    quota._local[f"{current_period()}:echo"] = {"calls": 3, "characters": 120}
+    monkeypatch.setattr(settings, "DETECTOR_MONTHLY_QUOTAS", {"echo": 10})
+    app.state.detector_quota = quota
+    try:
+        client = TestClient(app, raise_server_exceptions=False)
+        response = client.get("/api/detectors/quota")
+    finally:
+        app.state.detector_quota = None
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["period"] == current_period()
+    assert body["detectors"]["echo"] == {
+        "calls": 3,
+        "characters": 120,
+        "monthly_quota": 10,
+        "remaining": 7,
+    }
@@ -0,0 +1,186 @@
+"""Tests for the write-behind request log."""
+
+import asyncio
+import uuid
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import SQLModel
+
+from app.db.crud import list_requests
+from app.models.database import RequestStatus, RequestType
+from app.models.schemas import DetectorResult, HumanizeAttempt
+from app.services.request_log import (
+    RequestLogWriter,
+    compact_attempts,
+    compact_detector_results,
+)
+
+
+@pytest_asyncio.fixture()
+async def session_factory():
+    engine = create_async_engine("sqlite+aiosqlite://", echo=False)
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def enforce_foreign_keys(dbapi_connection, _):
+        dbapi_connection.execute("PRAGMA foreign_keys=ON")
+
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    yield sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    await engine.dispose()
+
+
+def _submit(writer: RequestLogWriter, text: str) -> bool:
+    return writer.submit(
+        request_type=RequestType.humanize,
+        input_text=text,
+        output_text=text.upper(),
+        status=RequestStatus.completed,
+        processing_time_ms=10,
+    )
+
+
+async def _stored(session_factory) -> list:
+    async with session_factory() as session:
+        return await list_requests(session, limit=100)
+
+
+@pytest.mark.asyncio
+async def test_rows_are_written_in_batches(session_factory):
+    writer = RequestLogWriter(session_factory, batch_size=3, flush_interval_seconds=0.05)
+    writer.start()
+    try:
+        for i in range(7):
+            assert _submit(writer, f"text {i}")
+        for _ in range(50):
+            if writer.written == 7:
+                break
+            await asyncio.sleep(0.02)
+    finally:
+        await writer.stop()
+
+    rows = await _stored(session_factory)
+    assert len(rows) == 7
+    assert writer.batches == 3
+    assert all(r.request_type == "humanize" and r.status == "completed" for r in rows)
+    assert {r.output_text for r in rows} == {f"TEXT {i}" for i in range(7)}
+
+
+@pytest.mark.asyncio
+async def test_stop_drains_queued_rows(session_factory):
+    writer = RequestLogWriter(session_factory, batch_size=100, flush_interval_seconds=60)
+    writer.start()
+    for i in range(5):
+        _submit(writer, f"text {i}")
+    await asyncio.sleep(0)
+
+    await writer.stop()
+
+    assert len(await _stored(session_factory)) == 5
+    assert writer.stats()["queued"] == 0
+
+
+@pytest.mark.asyncio
+async def test_full_queue_drops_instead_of_blocking(session_factory):
+    writer = RequestLogWriter(session_factory, max_queue=2)
+
+    results = [_submit(writer, f"text {i}") for i in range(4)]
+
+    assert results == [True, True, False, False]
+    assert writer.dropped == 2
+    await writer.stop()
+    assert len(await _stored(session_factory)) == 2
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_counts_rows_as_dropped():
+    def broken_factory():
+        raise RuntimeError("database is down")
+
+    writer = RequestLogWriter(broken_factory)
+    _submit(writer, "text")
+
+    await writer.stop()
+
+    assert writer.written == 0
+    assert writer.dropped == 1
+
+
+@pytest.mark.asyncio
+async def test_bad_row_is_dropped_without_the_rest_of_its_batch(session_factory):
+    writer = RequestLogWriter(session_factory, batch_size=10)
+    for i in range(5):
+        _submit(writer, f"text {i}")
+    # A JWT for a since-deleted user: user_id violates the foreign key
+    writer.submit(
+        request_type=RequestType.humanize,
+        input_text="orphan",
+        status=RequestStatus.completed,
+        user_id=uuid.uuid4(),
+    )
+
+    await writer.stop()
+
+    assert writer.written == 5
+    assert writer.dropped == 1
+    assert len(await _stored(session_factory)) == 5
+
+
+def test_compact_detector_results_drops_sentence_text():
+    payload = compact_detector_results([
+        DetectorResult(
+            detector="gptzero",
+            score=0.8,
+            label="ai",
+            details={"sentences": [{"sentence": "Hello there.", "generated_prob": 0.8}]},
+            error=None,
+        ),
+        DetectorResult(detector="copyleaks", score=None, label=None, details=None, error="boom"),
+    ])
+
+    assert payload == {
+        "detectors": {
+            "gptzero": {
+                "score": 0.8,
+                "label": "ai",
+                "details": {"sentences": [{"generated_prob": 0.8}]},
+            },
+            "copyleaks": {"score": None, "label": None, "error": "boom"},
+        }
+    }
+
+
+def test_compact_attempts_keeps_scores_not_text():
+    payload = compact_attempts([
+        HumanizeAttempt(
+            attempt=1,
+            humanized_text="first try",
+            ai_score=0.9,
+            detector="gptzero",
+            temperature_used=0.7,
+        ),
+        HumanizeAttempt(
+            attempt=2,
+            humanized_text="second",
+            ai_score=None,
+            detector="gptzero",
+            detector_error="timeout",
+            temperature_used=0.8,
+        ),
+    ])
+
+    assert payload["attempts"][0] == {
+        "attempt": 1,
+        "score": 0.9,
+        "detector": "gptzero",
+        "temperature": 0.7,
+        "output_length": 9,
+    }
+    assert payload["attempts"][1]["error"] == "timeout"
+    assert "humanized_text" not in payload["attempts"][1]
@@ -0,0 +1,77 @@
+"""Unit tests for request coalescing (single-flight)."""
+
+import asyncio
+
+import pytest
+
+from app.services.single_flight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_call():
+    flights = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.02)
+        return "result"
+
+    results = await asyncio.gather(*(flights.do("k", work) for _ in range(5)))
+
+    assert results == ["result"] * 5
+    assert calls == 1
+    assert flights.coalesced == 4
+    assert flights.in_flight() == 0
+
+
+@pytest.mark.asyncio
+async def test_exception_propagates_to_all_waiters():
+    flights = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    results = await asyncio.gather(
+        flights.do("k", work), flights.do("k", work), return_exceptions=True
+    )
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_does_not_cancel_others():
+    flights = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    first = asyncio.create_task(flights.do("k", work))
+    second = asyncio.create_task(flights.do("k", work))
+    await asyncio.sleep(0.01)
+    first.cancel()
+
+    assert await second == "done"
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+
+@pytest.mark.asyncio
+async def test_work_cancelled_when_last_waiter_leaves():
+    flights = SingleFlight()
+    cancelled = asyncio.Event()
+
+    async def work():
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    waiter = asyncio.create_task(flights.do("k", work))
+    await asyncio.sleep(0.01)
+    waiter.cancel()
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+    assert flights.in_flight() == 0